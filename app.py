@@ -4,16 +4,45 @@ Handles OpenAI API requests securely on the server side
 """
 
 import os
+import re
 import json
+import asyncio
 import logging
 import argparse
 import socket
 import uuid
+import time
+import math
+import hashlib
+import contextvars
+import contextlib
+import concurrent.futures
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_runtime import LLMRuntime
+from llm_providers import provider_from_env
+from llm_cache import ResponseCache, DiskResponseCache, TieredResponseCache, make_cache_key
+from single_flight import SingleFlight, SQLiteLeaseTable
+from idempotency import IdempotencyStore, IdempotencyConflict
+from conversation_context import ConversationContextManager
+from llm_usage import UsageStats
+from structured_output import (
+    RISK_SCHEMA, RISK_LIST_SCHEMA, DETAILS_SCHEMA, JUSTIFICATIONS_SCHEMA, StructuredOutputError, StructuredOutputStats,
+    json_schema_format, parse_json_response, coerce_risk, coerce_risk_list, coerce_details,
+    details_sections_schema, coerce_details_sections
+)
+from streaming import JSONObjectStream, format_sse
+from resilience import RetryPolicy, CircuitBreaker, ResilientCaller, UpstreamUnavailable, RETRYABLE_STATUS_CODES
+from rate_limit import AdmissionController, LocalBuckets, SQLiteBuckets, INTERACTIVE, BACKGROUND, PRIORITY_CLASSES
+from background_work import WorkGroups
+from hedging import Hedger
+from prefetch import SessionPrefetcher, prompt_fingerprint
+from jobs import JobManager, MemoryJobStore, SQLiteJobStore, JobQueueFull, public as public_job
+from metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from ttl_store import TTLStore, SQLiteTTLStore, RedisTTLStore, EntryLocked
+from conversation_tokens import ConversationTokens, InvalidConversationToken
 
 # Load environment variables
 load_dotenv()
@@ -34,21 +63,700 @@ app = Flask(__name__, static_folder='risk-assessment', static_url_path='')
 # Allow all origins in development - restrict in production
 CORS(app, origins=["*"], supports_credentials=True)
 
-# Initialize OpenAI client
-openai_api_key = os.getenv('OPENAI_API_KEY')
-if not openai_api_key:
-    logger.error("OPENAI_API_KEY not found in environment variables")
-    raise ValueError("OPENAI_API_KEY must be set in .env file")
+# Select the LLM provider (OpenAI by default; LLM_PROVIDER=fake for the local load-testing server)
+try:
+    llm_provider = provider_from_env()
+except ValueError as e:
+    logger.error(str(e))
+    raise
+
+# Retries with backoff, per-request deadlines and a circuit breaker around every upstream call
+resilient_caller = ResilientCaller(
+    RetryPolicy(
+        max_attempts=int(os.getenv('LLM_RETRY_MAX_ATTEMPTS', 3)),
+        base_delay=float(os.getenv('LLM_RETRY_BASE_DELAY', 0.5)),
+        max_delay=float(os.getenv('LLM_RETRY_MAX_DELAY', 8))
+    ),
+    CircuitBreaker(
+        failure_threshold=int(os.getenv('LLM_CIRCUIT_FAILURE_THRESHOLD', 5)),
+        reset_seconds=float(os.getenv('LLM_CIRCUIT_RESET_SECONDS', 30))
+    ),
+    attempt_timeout=float(os.getenv('LLM_ATTEMPT_TIMEOUT_SECONDS', 30))
+)
+
+# Overall time budget for the model calls of one HTTP request (clients may ask for less via X-Request-Timeout)
+LLM_REQUEST_DEADLINE_SECONDS = float(os.getenv('LLM_REQUEST_DEADLINE_SECONDS', 60))
+# Jobs (POST /api/jobs) run the long batches, so they get a budget of their own
+JOB_DEADLINE_SECONDS = float(os.getenv('JOB_DEADLINE_SECONDS', 600))
+
+# Client-side admission control: requests/tokens per minute sized to the account tier, plus a concurrency cap.
+# Buckets are per worker unless LLM_RATE_LIMIT_PATH points every worker on the host at one SQLite file.
+LLM_RATE_LIMIT_RPM = int(os.getenv('LLM_RATE_LIMIT_RPM', 500))
+LLM_RATE_LIMIT_TPM = int(os.getenv('LLM_RATE_LIMIT_TPM', 200000))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 64))
+
+llm_admission = None
+if LLM_RATE_LIMIT_RPM > 0 or LLM_RATE_LIMIT_TPM > 0 or LLM_MAX_CONCURRENCY > 0:
+    bucket_options = {
+        'requests_per_minute': LLM_RATE_LIMIT_RPM,
+        'tokens_per_minute': LLM_RATE_LIMIT_TPM,
+        'burst_seconds': float(os.getenv('LLM_RATE_LIMIT_BURST_SECONDS', 10))
+    }
+    llm_rate_limit_path = os.getenv('LLM_RATE_LIMIT_PATH')
+    try:
+        buckets = SQLiteBuckets(llm_rate_limit_path, **bucket_options) if llm_rate_limit_path else LocalBuckets(**bucket_options)
+    except Exception as e:
+        logger.error(f"Failed to open host-wide rate limit buckets, limiting per worker: {e}")
+        buckets = LocalBuckets(**bucket_options)
+    llm_admission = AdmissionController(
+        buckets,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        max_wait=float(os.getenv('LLM_ADMISSION_MAX_WAIT_SECONDS', 10)),
+        # Concurrency slots background work can never take, so interactive calls always find one
+        interactive_reserve=int(os.getenv('LLM_INTERACTIVE_RESERVE', LLM_MAX_CONCURRENCY // 4)),
+        on_wait=lambda seconds, priority: observe_admission_wait(seconds, priority)
+    )
+
+# Speculative work the user isn't waiting on; a request can override its route's class with X-Request-Priority
+BACKGROUND_ENDPOINTS = {
+    'generate_justifications',
+    'generate_rekon_context',
+    'generate_rekon_risk',
+    'generate_rekon_compliance',
+    'generate_rekon_metrics'
+}
+
+# Pending background model calls by the client's X-Work-Group, so a client can drop them when the user moves on
+background_work = WorkGroups()
+
+# Opt-in hedging for short completions: a second identical call once the first is slower than the route's recent
+# LLM_HEDGE_PERCENTILE latency. LLM_HEDGE_MAX_RATE caps the share of calls hedged (the extra token spend).
+LLM_HEDGING = os.getenv('LLM_HEDGING', 'false').lower() == 'true'
+HEDGED_ENDPOINTS = {
+    'generate_justification',
+    'generate_rekon_context',
+    'generate_rekon_risk',
+    'generate_rekon_compliance',
+    'generate_rekon_metrics'
+}
+hedger = Hedger(
+    percentile=float(os.getenv('LLM_HEDGE_PERCENTILE', 95)),
+    min_samples=int(os.getenv('LLM_HEDGE_MIN_SAMPLES', 20)),
+    max_hedge_rate=float(os.getenv('LLM_HEDGE_MAX_RATE', 0.1))
+)
+
+# Generations /api/start-assessment starts before the session's page loads (or per request with "prefetch": true)
+SESSION_PREFETCH = os.getenv('SESSION_PREFETCH', 'false').lower() == 'true'
+session_prefetcher = SessionPrefetcher()
+# Finished prefetches are written to the session store here rather than on the LLM loop
+prefetch_writer = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='prefetch-save')
+
+# Sessions and conversations are per worker unless SESSION_DB_PATH points every worker on the host at one SQLite
+# file, or SESSION_REDIS_URL every worker on every node at one Redis
+session_db_path = os.getenv('SESSION_DB_PATH')
+session_redis_url = os.getenv('SESSION_REDIS_URL')
+
+def open_state_store(name, columns=(), json_columns=(), **limits):
+    """A store in the shared session Redis or database if there is one, else in this worker's memory"""
+    if session_redis_url:
+        try:
+            store = RedisTTLStore(
+                session_redis_url, name,
+                prefix=os.getenv('SESSION_REDIS_PREFIX', 'airekon:'),
+                lock_ttl=max(LLM_REQUEST_DEADLINE_SECONDS, JOB_DEADLINE_SECONDS) + 30,
+                **limits
+            )
+            store.client.ping()
+            return store
+        except Exception as e:
+            logger.error(f"Failed to connect to session Redis, trying the next store for {name}: {e}")
+    if session_db_path:
+        try:
+            return SQLiteTTLStore(session_db_path, name, columns=columns, json_columns=json_columns,
+                                  lock_ttl=max(LLM_REQUEST_DEADLINE_SECONDS, JOB_DEADLINE_SECONDS) + 30, **limits)
+        except Exception as e:
+            logger.error(f"Failed to open session database, keeping {name} in memory: {e}")
+    return TTLStore(name, **limits)
+
+# Integrated assessment sessions (from /api/start-assessment), evicted when idle, too old or over the caps
+assessment_sessions = open_state_store(
+    'assessment_sessions',
+    columns=('status', 'created_at'),
+    json_columns=('event_data', 'results'),
+    max_entries=int(os.getenv('SESSION_STORE_MAX_ENTRIES', 10000)),
+    max_bytes=int(float(os.getenv('SESSION_STORE_MAX_MB', 256)) * 1024 * 1024),
+    idle_ttl=int(os.getenv('SESSION_IDLE_TTL_SECONDS', 86400)),
+    max_age=int(os.getenv('SESSION_MAX_AGE_SECONDS', 259200)),
+    on_evict=lambda session_id, session, reason: session_prefetcher.discard(session_id)
+)
 
 try:
-    client = OpenAI(api_key=openai_api_key)
-    logger.info("OpenAI client initialized successfully")
+    # All model calls run on a shared asyncio loop (AsyncOpenAI) so a worker
+    # thread only waits on a future while the request is in flight.
+    # The client's own retries are off - resilient_caller owns retrying.
+    llm = LLMRuntime(llm_provider, caller=resilient_caller, admission=llm_admission, max_retries=0)
+    logger.info(f"LLM client initialized for {llm_provider.describe()}")
 except Exception as e:
-    logger.error(f"Failed to initialize OpenAI client: {e}")
+    logger.error(f"Failed to initialize LLM client: {e}")
     raise
 
+DEFAULT_MODEL = os.getenv('LLM_MODEL', "gpt-4o-mini-2024-07-18")
+
+# Upper bound on concurrent model calls for parallel "generate more" requests
+ADDITIONAL_RISKS_MAX_CONCURRENCY = int(os.getenv('ADDITIONAL_RISKS_MAX_CONCURRENCY', 4))
+
+# Limits for the batch justification endpoint
+JUSTIFICATION_BATCH_MAX_ITEMS = int(os.getenv('JUSTIFICATION_BATCH_MAX_ITEMS', 200))
+JUSTIFICATION_BATCH_MAX_CONCURRENCY = int(os.getenv('JUSTIFICATION_BATCH_MAX_CONCURRENCY', 4))
+
+# System prompts shared by the JSON, streaming and batch endpoints
+OVERVIEW_SYSTEM_PROMPT = "You are an expert risk assessment consultant. Generate a single paragraph about event overview and context. Return only the paragraph text without any HTML tags, markdown, or formatting."
+OPERATIONAL_SYSTEM_PROMPT = "You are an expert risk assessment consultant. Generate a single paragraph about operational considerations and risk factors. Return only the paragraph text without any HTML tags, markdown, or formatting."
+RISK_ASSESSMENT_SYSTEM_PROMPT = "You are an expert risk assessment consultant. Generate detailed risk assessments in JSON format. Each risk should have: id, risk (description), category, impact (1-5), likelihood (1-5), and mitigation."
+REKON_CONTEXT_SYSTEM_PROMPT = "You are an expert risk assessment consultant. Generate exactly 3 CONCISE bullet points for the RekonContext Index. Each bullet point should be 1 short sentence (10-15 words max) and highly specific to the event details provided. Return only a JSON array of strings."
+REKON_RISK_SYSTEM_PROMPT = "You are an expert risk assessment consultant. Generate exactly 3 CONCISE bullet points for the RekonRisk Index. Each bullet point should be 1 short sentence (10-15 words max) and specific to the actual risks identified. Return only a JSON array of strings."
+REKON_COMPLIANCE_SYSTEM_PROMPT = "You are an expert risk assessment consultant. Generate exactly 3 CONCISE bullet points for the RekonCompliance Status. Each bullet point should be 1 short sentence (10-15 words max) about regulatory alignment (Martyn's Law, ProtectUK, ISO 27001). Return only a JSON array of strings."
+REKON_METRICS_SYSTEM_PROMPT = "You are an expert risk assessment consultant. Generate exactly 3 CONCISE bullet points for each requested Rekon metric. Each bullet point should be 1 short sentence (10-15 words max) and specific to the event and the actual risks identified. Return only a JSON object with one array of strings per metric."
+JUSTIFICATION_SYSTEM_PROMPT = "You are an expert risk assessment consultant. Provide SPECIFIC, CONCISE justifications (1-2 sentences max). For sources, use bullet points (•) with 3-5 SPECIFIC, REAL documents/standards with full names and years (e.g., 'ISO 31000:2018 Risk Management Guidelines', 'NFPA 1600:2019 Standard on Continuity'). Mark each as [public] or [proprietary]. NO vague descriptors."
+
+# RekonContext level names by score, as in REKON_CONTEXT_LEVELS in main.js
+REKON_CONTEXT_LEVELS = {
+    1: 'Routine', 2: 'Elevated', 3: 'Sensitive', 4: 'Significant', 5: 'Major', 6: 'Critical', 7: 'Extraordinary'
+}
+# Sections of the combined Rekon metrics endpoint and the assessment fields each needs
+REKON_SECTIONS = {
+    'context': ('score', 'level'),
+    'risk': ('score', 'level'),
+    'compliance': ('status',)
+}
+HIGH_SENSITIVITY_VENUE_TYPES = [
+    'VIP Visit / Dignitary Protection', 'Public Rally / Protest', 'Official Public Ceremony', 'State Funeral'
+]
+
+# Response cache for endpoints whose prompts are pure functions of the event data
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', 1024)),
+    ttl_seconds=int(os.getenv('LLM_CACHE_TTL_SECONDS', 3600))
+)
+
+# Concurrent identical model calls share one upstream request
+single_flight = SingleFlight()
+
+# Optional disk tier shared by all gunicorn workers on this host (survives restarts)
+disk_cache = None
+lease_table = None
+llm_disk_cache_path = os.getenv('LLM_DISK_CACHE_PATH')
+if llm_disk_cache_path:
+    try:
+        disk_cache = DiskResponseCache(
+            llm_disk_cache_path,
+            max_entries=int(os.getenv('LLM_DISK_CACHE_MAX_ENTRIES', 50000)),
+            max_bytes=int(os.getenv('LLM_DISK_CACHE_MAX_MB', 256)) * 1024 * 1024,
+            ttl_seconds=int(os.getenv('LLM_DISK_CACHE_TTL_SECONDS', 86400))
+        )
+        response_cache = TieredResponseCache(response_cache, disk_cache)
+        warmed = response_cache.warm(int(os.getenv('LLM_DISK_CACHE_WARM_ENTRIES', 512)))
+        logger.info(f"Disk response cache at {llm_disk_cache_path} ({warmed} entries warmed)")
+
+        # Workers on this host also coalesce identical cacheable calls with each other
+        if os.getenv('LLM_CROSS_WORKER_COALESCING', 'true').lower() == 'true':
+            lease_table = SQLiteLeaseTable(llm_disk_cache_path)
+    except Exception as e:
+        logger.error(f"Failed to open disk response cache, using memory only: {e}")
+        disk_cache = None
+
+# Stored responses for requests carrying an Idempotency-Key header
+idempotency_store = IdempotencyStore(
+    ttl_seconds=int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 86400)),
+    max_entries=int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', 10000))
+)
+
+# Long generations can run as jobs on a bounded pool instead of holding the HTTP request open
+JOB_ROUTES = {
+    'generate-risks',
+    'generate-additional-risks',
+    'generate-next-risk',
+    'generate-single-risk',
+    'generate-justifications',
+    'generate-overview',
+    'generate-operational'
+}
+# Long-polls and subscriptions end after this, below typical proxy idle timeouts
+JOBS_MAX_WAIT_SECONDS = float(os.getenv('JOBS_MAX_WAIT_SECONDS', 25))
+job_store = MemoryJobStore()
+jobs_db_path = os.getenv('JOBS_DB_PATH')
+if jobs_db_path:
+    try:
+        job_store = SQLiteJobStore(jobs_db_path)
+    except Exception as e:
+        logger.error(f"Failed to open job database, keeping jobs in memory: {e}")
+jobs = JobManager(
+    execute=lambda job_id, route, data, headers: execute_job(job_id, route, data, headers),
+    store=job_store,
+    max_workers=int(os.getenv('JOBS_MAX_WORKERS', 4)),
+    max_queued=int(os.getenv('JOBS_MAX_QUEUED', 100)),
+    ttl_seconds=int(os.getenv('JOBS_TTL_SECONDS', 3600)),
+    on_cancel=lambda job_id: background_work.cancel(job_work_group(job_id))
+)
+
+# Per-request LLM settings, set on the Flask thread and carried onto the LLM event loop
+llm_request_settings = contextvars.ContextVar('llm_request_settings', default={})
+
+# Token usage per endpoint, including prompt tokens served from the provider's prefix cache
+llm_usage = UsageStats()
+
+# Prometheus metrics served at /metrics; most series are read from the stats objects above at scrape time
+metrics_registry = MetricsRegistry()
+http_request_duration = metrics_registry.histogram(
+    'airekon_http_request_duration_seconds',
+    'Time to serve an HTTP request (to the end of the body for streams)',
+    ('route', 'method', 'status')
+)
+llm_request_duration = metrics_registry.histogram(
+    'airekon_llm_request_duration_seconds',
+    'Latency of upstream model calls including retries',
+    ('route', 'model', 'outcome')
+)
+llm_admission_wait = metrics_registry.histogram(
+    'airekon_llm_admission_wait_seconds',
+    'Time model calls waited for client-side rate limit capacity',
+    ('route', 'priority'),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, float('inf'))
+)
+
+# JSON endpoints ask for schema-constrained output (LLM_STRUCTURED_OUTPUTS=false for providers without json_schema support)
+STRUCTURED_OUTPUTS = llm_provider.supports_json_schema
+# Extra completions requested when a JSON reply can't be parsed or repaired
+STRUCTURED_OUTPUT_RETRIES = int(os.getenv('LLM_STRUCTURED_OUTPUT_RETRIES', 1))
+structured_output_stats = StructuredOutputStats()
+
 # Store conversation contexts for progressive risk generation
-risk_conversations = {}
+risk_conversations = open_state_store(
+    'risk_conversations',
+    json_columns=('event_data', 'messages', 'generated_risks'),
+    max_entries=int(os.getenv('CONVERSATION_STORE_MAX_ENTRIES', 10000)),
+    max_bytes=int(float(os.getenv('CONVERSATION_STORE_MAX_MB', 256)) * 1024 * 1024),
+    idle_ttl=int(os.getenv('CONVERSATION_IDLE_TTL_SECONDS', 7200)),
+    max_age=int(os.getenv('CONVERSATION_MAX_AGE_SECONDS', 86400))
+)
+
+# Stateless conversations ("stateless": true on start-risk-conversation, or CONVERSATION_STATELESS=true) keep their
+# state in a signed token held by the client instead of risk_conversations; every node needs the same secret
+CONVERSATION_STATELESS = os.getenv('CONVERSATION_STATELESS', 'false').lower() == 'true'
+conversation_token_secret = os.getenv('CONVERSATION_TOKEN_SECRET')
+if not conversation_token_secret:
+    conversation_token_secret = os.urandom(32)
+    if CONVERSATION_STATELESS:
+        logger.warning("CONVERSATION_TOKEN_SECRET is not set; conversation tokens only work in this worker")
+conversation_tokens = ConversationTokens(
+    conversation_token_secret,
+    idle_ttl=risk_conversations.idle_ttl,
+    max_age=risk_conversations.max_age
+)
+
+# Caps the prompt sent for each conversation call; older turns are represented by the covered-risks list
+conversation_context = ConversationContextManager(
+    max_prompt_tokens=int(os.getenv('CONVERSATION_MAX_PROMPT_TOKENS', 3000)),
+    recent_turns=int(os.getenv('CONVERSATION_RECENT_TURNS', 2))
+)
+
+@app.before_request
+def capture_llm_request_settings():
+    """Record per-request LLM settings taken from the incoming headers"""
+    # A job sets its own budget before dispatching the route
+    budget = llm_request_settings.get().get('budget', LLM_REQUEST_DEADLINE_SECONDS)
+    try:
+        budget = min(budget, float(request.headers.get('X-Request-Timeout', budget)))
+    except ValueError:
+        pass
+
+    priority = request.headers.get('X-Request-Priority', '').lower()
+    if priority not in PRIORITY_CLASSES:
+        priority = BACKGROUND if request.endpoint in BACKGROUND_ENDPOINTS else INTERACTIVE
+
+    llm_request_settings.set({
+        'endpoint': request.endpoint,
+        'cache_bypass': request.headers.get('X-Cache-Bypass', '').lower() in ('1', 'true', 'yes'),
+        'deadline': time.monotonic() + budget,
+        'priority': priority,
+        'work_group': request.headers.get('X-Work-Group') or None
+    })
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started for the latency histogram"""
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request_duration(response):
+    """Record request latency once the response (including a streamed body) has been sent"""
+    started = g.get('request_started')
+    if started is not None:
+        labels = {
+            'route': request.endpoint or 'unmatched',
+            'method': request.method,
+            'status': response.status_code
+        }
+        response.call_on_close(lambda: http_request_duration.observe(time.perf_counter() - started, **labels))
+    return response
+
+@app.before_request
+def replay_idempotent_request():
+    """Return the stored response when a mutating request is retried with the same Idempotency-Key"""
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if not idempotency_key or request.method not in ('POST', 'PUT', 'PATCH', 'DELETE'):
+        return None
+    if not request.path.startswith(('/api/ai/', '/api/session/', '/api/start-assessment', '/api/jobs')):
+        return None
+
+    scoped_key = f"{request.method} {request.path} {idempotency_key}"
+    fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+
+    try:
+        stored = idempotency_store.begin(scoped_key, fingerprint)
+    except IdempotencyConflict as e:
+        return jsonify({"error": str(e)}), e.status_code
+
+    if stored is not None:
+        status, headers, body = stored
+        response = Response(body, status=status, headers=headers)
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+    g.idempotency_key = scoped_key
+    return None
+
+@app.after_request
+def store_idempotent_response(response):
+    """Remember the final response of a keyed request (failures and retryable answers are released so a retry runs again)"""
+    scoped_key = g.pop('idempotency_key', None)
+    if scoped_key is None:
+        return response
+
+    if response.status_code >= 500 or response.status_code in RETRYABLE_STATUS_CODES or response.is_streamed:
+        idempotency_store.release(scoped_key)
+    else:
+        idempotency_store.complete(
+            scoped_key,
+            response.status_code,
+            {'Content-Type': response.content_type},
+            response.get_data()
+        )
+    return response
+
+@app.teardown_request
+def release_idempotency_key(error):
+    """Release the key if the request died before a response was produced"""
+    scoped_key = g.pop('idempotency_key', None)
+    if scoped_key is not None:
+        idempotency_store.release(scoped_key)
+
+async def acreate_chat_completion(messages, temperature=0.7, max_tokens=400, model=DEFAULT_MODEL, cache=False,
+                                 response_format=None, validate=None):
+    """Create a chat completion on the LLM event loop and return the message text
+
+    With cache=True identical requests are answered from the response cache;
+    the X-Cache-Bypass request header skips the lookup and refreshes the entry.
+    validate, if given, must accept the text before it is cached.
+    """
+    request_key = make_cache_key(model, messages, temperature, max_tokens, response_format)
+    use_cache = cache and response_cache.enabled
+
+    if use_cache and not llm_request_settings.get().get('cache_bypass'):
+        cached = await response_cache.aget(request_key)
+        if cached is not None:
+            return cached
+
+    # Identical requests already in flight (retries, several tabs) attach to the pending call.
+    # Background calls that everyone has given up on are cancelled rather than left to finish.
+    # Calls only coalesce within a priority class: the pending call keeps its leader's priority,
+    # deadline and cancellation, which an interactive caller must not inherit from background work.
+    priority = llm_request_settings.get().get('priority')
+    return await single_flight.run(
+        (request_key, priority),
+        lambda: fetch_chat_completion(
+            request_key, messages, temperature, max_tokens, model, use_cache, response_format, validate
+        ),
+        cancel_if_abandoned=priority == BACKGROUND
+    )
+
+async def fetch_chat_completion(request_key, messages, temperature, max_tokens, model, use_cache,
+                                response_format=None, validate=None):
+    """Make the upstream model call, at most once per host for shared cacheable requests"""
+    leased = False
+    # Like in-worker coalescing, workers only wait for each other within a priority class
+    lease_key = f"{request_key}:{llm_request_settings.get().get('priority')}"
+    if use_cache and lease_table is not None:
+        leased = await lease_table.acquire(lease_key)
+        if not leased:
+            # Another worker is making this exact call - wait for its result in the shared cache
+            content = await lease_table.wait_for(lease_key, lambda _: disk_cache.peek(request_key))
+            if content is not None:
+                return content
+
+    try:
+        settings = llm_request_settings.get()
+        request_options = {'response_format': response_format} if response_format is not None else {}
+
+        def request_completion():
+            return llm.chat(
+                deadline=settings.get('deadline'),
+                priority=settings.get('priority'),
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **request_options
+            )
+
+        started = time.perf_counter()
+        try:
+            if LLM_HEDGING and settings.get('endpoint') in HEDGED_ENDPOINTS:
+                response = await hedger.run(settings['endpoint'], request_completion)
+            else:
+                response = await request_completion()
+        except Exception:
+            observe_llm_latency(model, started, 'error')
+            raise
+        observe_llm_latency(model, started, 'ok')
+        record_llm_usage(getattr(response, 'usage', None), model)
+        content = (response.choices[0].message.content or '').strip()
+
+        if use_cache and is_valid_completion(validate, content):
+            await response_cache.aset(request_key, content)
+        return content
+    finally:
+        if leased:
+            await lease_table.release(lease_key)
+
+def is_valid_completion(validate, content):
+    """Whether content passes an optional validator (unusable replies are never cached)"""
+    if validate is None:
+        return True
+    try:
+        validate(content)
+        return True
+    except ValueError:
+        return False
+
+async def acreate_structured_completion(messages, schema_name, schema, coerce, temperature=0.7, max_tokens=400,
+                                        model=DEFAULT_MODEL, cache=False):
+    """Create a JSON completion and return it parsed and coerced into the expected shape
+
+    Requests schema-constrained output when enabled, repairs fenced or truncated
+    JSON, and only re-asks the model when the reply is unusable.
+    """
+    endpoint = llm_request_settings.get().get('endpoint')
+    response_format = json_schema_format(schema_name, schema) if STRUCTURED_OUTPUTS else None
+
+    def parse(content):
+        value, repaired = parse_json_response(content)
+        return coerce(value), repaired
+
+    attempt_messages = list(messages)
+    for attempt in range(STRUCTURED_OUTPUT_RETRIES + 1):
+        if attempt:
+            structured_output_stats.record_retry(endpoint)
+
+        content = await acreate_chat_completion(
+            attempt_messages, temperature, max_tokens, model, cache,
+            response_format=response_format,
+            validate=parse
+        )
+        try:
+            value, repaired = parse(content)
+        except ValueError as e:
+            structured_output_stats.record(endpoint, 'failed')
+            logger.warning(f"Unusable {schema_name} JSON from model (attempt {attempt + 1}): {e}")
+            attempt_messages = list(messages) + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": f"That reply could not be used ({e}). Return only the JSON described above, with no additional text."}
+            ]
+            continue
+
+        structured_output_stats.record(endpoint, 'repaired' if repaired else 'parsed')
+        return value
+
+    raise StructuredOutputError(f"No usable {schema_name} JSON after {STRUCTURED_OUTPUT_RETRIES + 1} attempts")
+
+def create_structured_completion(messages, schema_name, schema, coerce, temperature=0.7, max_tokens=400,
+                                 model=DEFAULT_MODEL, cache=False):
+    """Create a JSON completion from a Flask view (see acreate_structured_completion)"""
+    return run_llm(acreate_structured_completion(
+        list(messages), schema_name, schema, coerce, temperature, max_tokens, model, cache
+    ))
+
+def create_chat_completion(messages, temperature=0.7, max_tokens=400, model=DEFAULT_MODEL, cache=False):
+    """Create a chat completion from a Flask view without driving the HTTP call on this thread"""
+    # Copy the messages so later appends to a conversation can't race the request
+    return run_llm(acreate_chat_completion(list(messages), temperature, max_tokens, model, cache))
+
+def record_llm_usage(usage, model=None):
+    """Add a completion's token usage to the totals of the endpoint that made it"""
+    llm_usage.record(llm_request_settings.get().get('endpoint'), usage, model)
+
+def observe_llm_latency(model, started, outcome):
+    """Record the latency of one upstream model call for the current route"""
+    llm_request_duration.observe(
+        time.perf_counter() - started,
+        route=llm_request_settings.get().get('endpoint') or 'background',
+        model=model,
+        outcome=outcome
+    )
+
+def stream_chat_completion(messages, temperature=0.7, max_tokens=400, model=DEFAULT_MODEL):
+    """Stream a chat completion from a Flask view, yielding text deltas"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield from llm.stream_sync(
+            on_usage=lambda usage: record_llm_usage(usage, model),
+            deadline=llm_request_settings.get().get('deadline'),
+            priority=llm_request_settings.get().get('priority'),
+            model=model,
+            messages=list(messages),
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        outcome = 'ok'
+    except GeneratorExit:
+        outcome = 'cancelled'
+        raise
+    finally:
+        observe_llm_latency(model, started, outcome)
+
+def observe_admission_wait(seconds, priority):
+    """Record how long a model call queued for rate limit capacity (runs on the LLM loop)"""
+    endpoint = llm_request_settings.get().get('endpoint') or 'unknown'
+    llm_admission_wait.observe(seconds, route=endpoint, priority=priority)
+
+def run_llm(coro):
+    """Run a coroutine on the LLM loop from a Flask view
+
+    Work tagged with a work group (background requests, jobs) can be cancelled through that group.
+    """
+    settings = llm_request_settings.get()
+    if settings.get('work_group'):
+        return background_work.run(settings['work_group'], llm.submit, coro)
+    return llm.run(coro)
+
+def prefetch_session_content(session_id, session):
+    """Start the session's overview, operational, risk and RekonContext generations on the LLM loop
+
+    Each runs with the settings (route, priority, deadline) its own endpoint would use.
+    """
+    event_data = session['event_data']
+    score = rekon_context_score(event_data)
+    overview = build_overview_messages(event_data)
+    operational = build_operational_messages(event_data)
+    risks = build_risk_assessment_messages(event_data)
+    rekon_context = build_rekon_context_messages(event_data, score, REKON_CONTEXT_LEVELS[score])
+
+    generations = [
+        ('overview', 'generate_overview', overview,
+         lambda: acreate_chat_completion(overview, temperature=0.7, max_tokens=400, cache=True)),
+        ('operational', 'generate_operational', operational,
+         lambda: acreate_chat_completion(operational, temperature=0.7, max_tokens=400, cache=True)),
+        ('risks', 'generate_risks', risks,
+         lambda: acreate_structured_completion(
+             risks, 'risk_assessment', RISK_LIST_SCHEMA, coerce_risk_list, temperature=0.7, max_tokens=2000
+         )),
+        ('rekon_context', 'generate_rekon_context', rekon_context,
+         lambda: acreate_structured_completion(
+             rekon_context, 'details', DETAILS_SCHEMA, coerce_details, temperature=0.7, max_tokens=400, cache=True
+         ))
+    ]
+    for name, endpoint, messages, generate in generations:
+        token = llm_request_settings.set({
+            'endpoint': endpoint,
+            'cache_bypass': False,
+            'deadline': time.monotonic() + LLM_REQUEST_DEADLINE_SECONDS,
+            'priority': BACKGROUND if endpoint in BACKGROUND_ENDPOINTS else INTERACTIVE,
+            'work_group': None
+        })
+        try:
+            future = llm.submit(generate())
+        finally:
+            llm_request_settings.reset(token)
+        session_prefetcher.start(session_id, session, name, prompt_fingerprint(messages), future)
+        future.add_done_callback(lambda _, name=name: prefetch_writer.submit(
+            save_prefetch_record, session_id, name, session['prefetch'][name]
+        ))
+
+    # Stored sessions may be copies (SESSION_DB_PATH, SESSION_REDIS_URL), so the records are written back as they change
+    with entry_lock(assessment_sessions, session_id):
+        assessment_sessions[session_id] = session
+    return [name for name, _, _, _ in generations]
+
+def save_prefetch_record(session_id, name, record):
+    """Write a finished prefetch's outcome to the stored session (where other workers can serve it)
+
+    Runs on prefetch_writer, so the store's I/O and lock waits never hold up the LLM loop.
+    """
+    try:
+        with assessment_sessions.lock(session_id, timeout=LLM_REQUEST_DEADLINE_SECONDS):
+            session = assessment_sessions.get(session_id)
+            if session is None:
+                return
+            session.setdefault('prefetch', {})[name] = record
+            assessment_sessions[session_id] = session
+    except Exception as e:
+        logger.error(f"Failed to save prefetch of {name} for session {session_id}: {e}")
+
+def take_prefetched(data, name, messages):
+    """The result prefetched for the request's session (data['sessionId']) if it answered these messages, else None
+
+    A prefetch still running is waited on for the rest of the request's deadline.
+    """
+    session_id = data.get('sessionId')
+    if not session_id:
+        return None
+    session = assessment_sessions.get(session_id)
+    deadline = llm_request_settings.get().get('deadline')
+    timeout = max(0, deadline - time.monotonic()) if deadline is not None else None
+    return session_prefetcher.take(session_id, session, name, prompt_fingerprint(messages), timeout)
+
+def job_work_group(job_id):
+    """Work group of a job's model calls, cancelled with the job"""
+    return f"job-{job_id}"
+
+def execute_job(job_id, route, data, headers):
+    """Run a generation route for a job on a pool thread, as if it had been requested directly"""
+    headers = dict(headers, **{'X-Work-Group': job_work_group(job_id)})
+    token = llm_request_settings.set({'budget': JOB_DEADLINE_SECONDS})
+    try:
+        with app.test_request_context(f"/api/ai/{route}", method='POST', json=data, headers=headers):
+            response = app.full_dispatch_request()
+            return response.status_code, response.get_json(silent=True)
+    finally:
+        llm_request_settings.reset(token)
+
+def error_response(message, error):
+    """JSON error response; upstream outages keep their own status and Retry-After so clients back off"""
+    response = jsonify({"error": message})
+    if isinstance(error, UpstreamUnavailable):
+        if error.retry_after:
+            response.headers['Retry-After'] = str(max(1, math.ceil(error.retry_after)))
+        return response, error.status_code
+    if isinstance(error, EntryLocked):
+        response.headers['Retry-After'] = '1'
+        return response, error.status_code
+    if isinstance(error, InvalidConversationToken):
+        return response, error.status_code
+    return response, 500
+
+def entry_lock(store, key):
+    """Lock a session or conversation across its read-modify-write, waiting at most the rest of the request's deadline"""
+    deadline = llm_request_settings.get().get('deadline')
+    return store.lock(key, max(0, deadline - time.monotonic()) if deadline is not None else LLM_REQUEST_DEADLINE_SECONDS)
+
+def sse_response(events):
+    """Wrap an event generator in a Server-Sent Events response"""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/')
 def index():
@@ -58,7 +766,232 @@ def index():
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "message": "AIREKON Risk Assessment API is running"})
+    return jsonify({
+        "status": "healthy",
+        "message": "AIREKON Risk Assessment API is running",
+        # Clients only use /api/jobs when any worker can answer for a job (JOBS_DB_PATH)
+        "jobs": {"shared": isinstance(job_store, SQLiteJobStore)}
+    })
+
+@app.route('/api/ai/cache/stats', methods=['GET'])
+def cache_stats():
+    """Response cache hit/miss counters and request coalescing counts"""
+    stats = response_cache.stats()
+    stats['single_flight'] = single_flight.stats()
+    if lease_table is not None:
+        stats['single_flight'].update(lease_table.stats())
+    return jsonify(stats)
+
+@app.route('/api/ai/usage', methods=['GET'])
+def usage_stats():
+    """Prompt, completion and provider-cached token totals per endpoint, plus JSON parse, upstream, admission, prefetch, job and store stats"""
+    stats = llm_usage.stats()
+    stats['structured_output'] = structured_output_stats.stats()
+    stats['upstream'] = resilient_caller.stats()
+    if llm_admission is not None:
+        stats['admission'] = llm_admission.stats()
+    stats['background_work'] = background_work.stats()
+    if LLM_HEDGING:
+        stats['hedging'] = hedger.stats()
+    stats['prefetch'] = session_prefetcher.stats()
+    stats['jobs'] = jobs.stats()
+    stats['stores'] = {store.name: store.stats() for store in (risk_conversations, assessment_sessions)}
+    return jsonify(stats)
+
+@app.route('/api/ai/background/cancel', methods=['POST'])
+def cancel_background_work():
+    """Cancel the queued and in-flight background model calls of a work group (the user has moved on)"""
+    data = request.get_json(silent=True) or {}
+    work_group = data.get('work_group') or request.headers.get('X-Work-Group')
+    if not work_group:
+        return jsonify({"error": "work_group is required"}), 400
+
+    return jsonify({"cancelled": background_work.cancel(work_group)})
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a generation as a job and return its id straight away"""
+    data = request.get_json(silent=True) or {}
+    route = data.get('route')
+    if route not in JOB_ROUTES:
+        return jsonify({"error": f"route must be one of: {', '.join(sorted(JOB_ROUTES))}"}), 400
+    if not isinstance(data.get('data'), dict) or not data['data']:
+        return jsonify({"error": "data (the route's request body) is required"}), 400
+
+    # The job runs with the caller's priority and deadline headers
+    headers = {name: request.headers[name] for name in ('X-Request-Priority', 'X-Request-Timeout', 'X-Cache-Bypass')
+               if name in request.headers}
+    try:
+        job = jobs.submit(route, data['data'], headers)
+    except JobQueueFull as e:
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, e.status_code
+
+    body = public_job(job)
+    body['status_url'] = f"/api/jobs/{job['id']}"
+    body['events_url'] = f"/api/jobs/{job['id']}/events"
+    response = jsonify(body)
+    response.headers['Location'] = body['status_url']
+    return response, 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status and, once finished, its result; ?wait=seconds long-polls until it finishes"""
+    try:
+        wait = min(float(request.args.get('wait', 0)), JOBS_MAX_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+
+    job = jobs.wait(job_id, wait) if wait > 0 else jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(public_job(job))
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def subscribe_job(job_id):
+    """Server-Sent 'status' events as the job progresses, ending with 'result' or 'error'"""
+    if jobs.get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def events():
+        for job in jobs.updates(job_id, JOBS_MAX_WAIT_SECONDS):
+            yield format_sse('status', public_job(job))
+            if job['status'] == 'succeeded':
+                yield format_sse('result', job['result'])
+            elif job['status'] in ('failed', 'cancelled'):
+                yield format_sse('error', {"error": job['error'], "status": job['status']})
+
+    return sse_response(events())
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(public_job(job))
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+@metrics_registry.register_collector
+def collect_app_metrics():
+    """Scrape-time samples read from the usage, parsing, cache, coalescing, upstream, admission, background, hedging, prefetch, job and store stats"""
+    usage = llm_usage.series()
+    parsing = structured_output_stats.stats()['endpoints']
+    cache = response_cache.stats()
+    tiers = {'memory': cache['memory'], 'disk': cache['disk']} if cache['backend'] == 'tiered' else {'memory': cache}
+    flight = single_flight.stats()
+    upstream = resilient_caller.stats()
+    circuit_states = {'closed': 0, 'half_open': 1, 'open': 2}
+    admission = llm_admission.stats() if llm_admission is not None else None
+    stores = {store.name: store.stats() for store in (risk_conversations, assessment_sessions)}
+
+    samples = [
+        ('airekon_llm_calls_total', 'counter', 'Upstream completions by route and model',
+         [({'route': route, 'model': model}, totals['calls']) for route, model, totals in usage]),
+        ('airekon_llm_prompt_tokens_total', 'counter', 'Prompt tokens sent upstream',
+         [({'route': route, 'model': model}, totals['prompt_tokens']) for route, model, totals in usage]),
+        ('airekon_llm_completion_tokens_total', 'counter', 'Completion tokens received',
+         [({'route': route, 'model': model}, totals['completion_tokens']) for route, model, totals in usage]),
+        ('airekon_llm_cached_tokens_total', 'counter', 'Prompt tokens served from the provider prefix cache',
+         [({'route': route, 'model': model}, totals['cached_tokens']) for route, model, totals in usage]),
+        ('airekon_llm_json_parse_total', 'counter', 'JSON replies by parse outcome (parsed, repaired, failed)',
+         [({'route': route, 'outcome': outcome}, counts[outcome])
+          for route, counts in parsing.items() for outcome in ('parsed', 'repaired', 'failed')]),
+        ('airekon_llm_json_retries_total', 'counter', 'Completions re-requested because the JSON was unusable',
+         [({'route': route}, counts['retries']) for route, counts in parsing.items()]),
+        ('airekon_llm_cache_hits_total', 'counter', 'Response cache hits by tier',
+         [({'tier': tier}, stats['hits']) for tier, stats in tiers.items()]),
+        ('airekon_llm_cache_misses_total', 'counter', 'Response cache misses by tier',
+         [({'tier': tier}, stats['misses']) for tier, stats in tiers.items()]),
+        ('airekon_llm_cache_entries', 'gauge', 'Response cache entries by tier',
+         [({'tier': tier}, stats['entries']) for tier, stats in tiers.items()]),
+        ('airekon_llm_cache_hit_ratio', 'gauge', 'Share of cache lookups answered from any tier',
+         [({}, cache['hit_ratio'])]),
+        ('airekon_llm_in_flight', 'gauge', 'Distinct upstream calls currently in flight',
+         [({}, flight['in_flight'])]),
+        ('airekon_llm_coalesced_total', 'counter', 'Calls that attached to an identical in-flight call',
+         [({}, flight['coalesced'])]),
+        ('airekon_llm_upstream_retries_total', 'counter', 'Upstream attempts retried after a transient failure',
+         [({}, upstream['retries'])]),
+        ('airekon_llm_upstream_failures_total', 'counter', 'Upstream calls that failed after retries',
+         [({}, upstream['failures'])]),
+        ('airekon_llm_deadline_exceeded_total', 'counter', 'Upstream calls stopped by the request deadline',
+         [({}, upstream['deadline_exceeded'])]),
+        ('airekon_llm_circuit_state', 'gauge', 'Circuit breaker state (0 closed, 1 half-open, 2 open)',
+         [({}, circuit_states[upstream['circuit_breaker']['state']])]),
+        ('airekon_llm_circuit_rejected_total', 'counter', 'Calls failed fast by the open circuit breaker',
+         [({}, upstream['circuit_breaker']['rejected'])]),
+        ('airekon_store_entries', 'gauge', 'Entries held in in-memory stores',
+         [({'store': 'risk_conversations'}, stores['risk_conversations']['entries']),
+          ({'store': 'assessment_sessions'}, stores['assessment_sessions']['entries']),
+          ({'store': 'idempotency'}, idempotency_store.stats()['entries'])]),
+        ('airekon_store_bytes', 'gauge', 'Approximate size of the session and conversation stores',
+         [({'store': name}, stats['bytes']) for name, stats in stores.items()]),
+        ('airekon_store_evictions_total', 'counter', 'Store entries evicted by reason (idle, max_age, max_entries, max_bytes)',
+         [({'store': name, 'reason': reason}, count)
+          for name, stats in stores.items() for reason, count in stats['evictions'].items()]),
+        ('airekon_store_lock_acquired_total', 'counter', 'Per-entry locks taken on the session and conversation stores',
+         [({'store': name}, stats['locks']['acquired']) for name, stats in stores.items()]),
+        ('airekon_store_lock_contended_total', 'counter', 'Per-entry lock acquisitions that had to wait for another request',
+         [({'store': name}, stats['locks']['contended']) for name, stats in stores.items()]),
+        ('airekon_store_lock_timeouts_total', 'counter', 'Per-entry lock waits that gave up (answered 409)',
+         [({'store': name}, stats['locks']['timeouts']) for name, stats in stores.items()]),
+        ('airekon_store_lock_wait_seconds_total', 'counter', 'Time spent waiting for per-entry locks',
+         [({'store': name}, stats['locks']['wait_seconds']) for name, stats in stores.items()]),
+        ('airekon_store_locks_held', 'gauge', 'Per-entry locks currently held',
+         [({'store': name}, stats['locks']['held']) for name, stats in stores.items()]),
+        ('airekon_store_lock_waiters', 'gauge', 'Requests currently waiting for a per-entry lock',
+         [({'store': name}, stats['locks']['waiting']) for name, stats in stores.items()])
+    ]
+    if admission is not None:
+        priorities = admission['priorities']
+        samples += [
+            ('airekon_llm_admission_queue_depth', 'gauge', 'Model calls waiting for rate limit capacity',
+             [({'priority': name}, stats['queue_depth']) for name, stats in priorities.items()]),
+            ('airekon_llm_admission_in_flight', 'gauge', 'Admitted model calls holding a concurrency slot',
+             [({'priority': name}, stats['in_flight']) for name, stats in priorities.items()]),
+            ('airekon_llm_admission_admitted_total', 'counter', 'Model calls admitted by the client-side rate limiter',
+             [({'priority': name}, stats['admitted']) for name, stats in priorities.items()]),
+            ('airekon_llm_admission_shed_total', 'counter', 'Model calls shed with 503 by the client-side rate limiter',
+             [({'priority': name}, stats['shed']) for name, stats in priorities.items()]),
+            ('airekon_llm_rate_limit_bucket_level', 'gauge', 'Requests/tokens currently available in each bucket',
+             [({'bucket': name}, level) for name, level in admission['bucket_levels'].items()])
+        ]
+    prefetch = session_prefetcher.stats()
+    job_stats = jobs.stats()
+    samples += [
+        ('airekon_llm_background_cancelled_total', 'counter', 'Background model calls cancelled with their work group',
+         [({}, background_work.stats()['cancelled'])]),
+        ('airekon_session_prefetch_total', 'counter',
+         'Session prefetches by outcome (started, served, joined while running, stale prompt, failed)',
+         [({'outcome': outcome}, prefetch[outcome]) for outcome in ('started', 'served', 'joined', 'stale', 'failed')]),
+        ('airekon_session_prefetch_running', 'gauge', 'Session prefetches still generating',
+         [({}, prefetch['running'])]),
+        ('airekon_jobs_total', 'counter', 'Generation jobs by outcome (submitted, rejected, succeeded, failed, cancelled)',
+         [({'outcome': outcome}, job_stats[outcome])
+          for outcome in ('submitted', 'rejected', 'succeeded', 'failed', 'cancelled')]),
+        ('airekon_jobs_active', 'gauge', 'Generation jobs queued or running in this worker',
+         [({}, job_stats['active'])])
+    ]
+    if LLM_HEDGING:
+        hedging = hedger.stats()['routes']
+        samples += [
+            ('airekon_llm_hedge_eligible_total', 'counter', 'Calls on hedged routes',
+             [({'route': route}, counters['calls']) for route, counters in hedging.items()]),
+            ('airekon_llm_hedged_total', 'counter', 'Calls that sent a hedge request',
+             [({'route': route}, counters['hedged']) for route, counters in hedging.items()]),
+            ('airekon_llm_hedge_wins_total', 'counter', 'Hedged calls answered by the hedge request',
+             [({'route': route}, counters['hedge_wins']) for route, counters in hedging.items()]),
+            ('airekon_llm_hedge_delay_seconds', 'gauge', 'Current wait before hedging (recent latency percentile)',
+             [({'route': route}, counters['hedge_delay_seconds'])
+              for route, counters in hedging.items() if counters['hedge_delay_seconds'] is not None])
+        ]
+    return samples
 
 @app.route('/api/start-assessment', methods=['POST'])
 def start_assessment():
@@ -68,6 +1001,9 @@ def start_assessment():
         if not data:
             return jsonify({"error": "No event data provided"}), 400
 
+        # Not part of the event data: whether to start the AI generations now
+        prefetch = str(data.pop('prefetch', SESSION_PREFETCH)).lower() in ('1', 'true', 'yes')
+
         # Validate required fields
         required_fields = ['eventTitle', 'eventDate', 'location', 'attendance', 'eventType']
         missing_fields = [field for field in required_fields if not data.get(field)]
@@ -79,20 +1015,27 @@ def start_assessment():
         session_id = str(uuid.uuid4())
 
         # Store event data in session (in production, use Redis or database)
-        if not hasattr(app, 'assessment_sessions'):
-            app.assessment_sessions = {}
-
-        app.assessment_sessions[session_id] = {
+        session = {
             'event_data': data,
             'created_at': datetime.now().isoformat(),
             'status': 'started'
         }
+        assessment_sessions[session_id] = session
+
+        # Start generating before the browser gets here; the page picks the results up by session ID
+        prefetched = []
+        if prefetch:
+            try:
+                prefetched = prefetch_session_content(session_id, session)
+            except Exception as e:
+                logger.error(f"Failed to start prefetch for session {session_id}: {str(e)}")
 
         # Return session ID and redirect URL
         return jsonify({
             "session_id": session_id,
             "redirect_url": f"/?session={session_id}",
-            "status": "success"
+            "status": "success",
+            "prefetch": prefetched
         })
 
     except Exception as e:
@@ -103,18 +1046,16 @@ def start_assessment():
 def get_session_data(session_id):
     """Get session data for a specific assessment"""
     try:
-        if not hasattr(app, 'assessment_sessions'):
-            return jsonify({"error": "Session not found"}), 404
-
-        if session_id not in app.assessment_sessions:
+        session_data = assessment_sessions.get(session_id)
+        if session_data is None:
             return jsonify({"error": "Session not found"}), 404
 
-        session_data = app.assessment_sessions[session_id]
         return jsonify({
             "session_id": session_id,
             "event_data": session_data['event_data'],
             "status": session_data['status'],
-            "created_at": session_data['created_at']
+            "created_at": session_data['created_at'],
+            "prefetch": SessionPrefetcher.statuses(session_data)
         })
 
     except Exception as e:
@@ -125,21 +1066,21 @@ def get_session_data(session_id):
 def complete_assessment(session_id):
     """Complete assessment and store final results"""
     try:
-        if not hasattr(app, 'assessment_sessions'):
-            return jsonify({"error": "Session not found"}), 404
-
-        if session_id not in app.assessment_sessions:
-            return jsonify({"error": "Session not found"}), 404
-
-        # Get the results data from request
-        results_data = request.get_json()
-        if not results_data:
-            return jsonify({"error": "No results data provided"}), 400
-
-        # Store results in session
-        app.assessment_sessions[session_id]['results'] = results_data
-        app.assessment_sessions[session_id]['status'] = 'completed'
-        app.assessment_sessions[session_id]['completed_at'] = datetime.now().isoformat()
+        with entry_lock(assessment_sessions, session_id):
+            session = assessment_sessions.get(session_id)
+            if session is None:
+                return jsonify({"error": "Session not found"}), 404
+
+            # Get the results data from request
+            results_data = request.get_json()
+            if not results_data:
+                return jsonify({"error": "No results data provided"}), 400
+
+            # Store results in session (written back so the store re-measures it)
+            session['results'] = results_data
+            session['status'] = 'completed'
+            session['completed_at'] = datetime.now().isoformat()
+            assessment_sessions[session_id] = session
 
         logger.info(f"Assessment {session_id} completed successfully")
 
@@ -151,20 +1092,16 @@ def complete_assessment(session_id):
 
     except Exception as e:
         logger.error(f"Error completing assessment: {str(e)}")
-        return jsonify({"error": f"Failed to complete assessment: {str(e)}"}), 500
+        return error_response(f"Failed to complete assessment: {str(e)}", e)
 
 @app.route('/api/session/<session_id>/results', methods=['GET'])
 def export_results(session_id):
     """Export complete assessment results in standardized format"""
     try:
-        if not hasattr(app, 'assessment_sessions'):
-            return jsonify({"error": "Session not found"}), 404
-
-        if session_id not in app.assessment_sessions:
+        session = assessment_sessions.get(session_id)
+        if session is None:
             return jsonify({"error": "Session not found"}), 404
 
-        session = app.assessment_sessions[session_id]
-
         # Check if assessment is completed
         if session.get('status') != 'completed':
             return jsonify({"error": "Assessment not completed yet"}), 400
@@ -196,14 +1133,12 @@ def export_results(session_id):
 def cleanup_session(session_id):
     """Clean up session data after main app has retrieved results"""
     try:
-        if not hasattr(app, 'assessment_sessions'):
+        session = assessment_sessions.pop(session_id)
+        if session is None:
             return jsonify({"error": "Session not found"}), 404
 
-        if session_id not in app.assessment_sessions:
-            return jsonify({"error": "Session not found"}), 404
-
-        # Remove session data
-        del app.assessment_sessions[session_id]
+        # Drop any generation still running for the removed session
+        session_prefetcher.discard(session_id)
 
         logger.info(f"Session {session_id} cleaned up successfully")
 
@@ -237,34 +1172,19 @@ def generate_overview():
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        # Build the prompt for overview paragraph
-        prompt = build_overview_prompt(data)
-        
-        # Make request to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert risk assessment consultant. Generate a single paragraph about event overview and context. Return only the paragraph text without any HTML tags, markdown, or formatting."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=400
-        )
-        
-        content = response.choices[0].message.content.strip()
+        messages = build_overview_messages(data)
+
+        # Integrated sessions may already have it (see /api/start-assessment)
+        content = take_prefetched(data, 'overview', messages)
+        if content is None:
+            content = create_chat_completion(messages, temperature=0.7, max_tokens=400, cache=True)
         # logger.info(f"Generated overview paragraph: {len(content)} characters")
 
         return jsonify({"content": content})
         
     except Exception as e:
         logger.error(f"Error generating overview: {str(e)}")
-        return jsonify({"error": f"Failed to generate overview: {str(e)}"}), 500
+        return error_response(f"Failed to generate overview: {str(e)}", e)
 
 @app.route('/api/ai/generate-operational', methods=['POST'])
 def generate_operational():
@@ -274,34 +1194,63 @@ def generate_operational():
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        # Build the prompt for operational paragraph
-        prompt = build_operational_prompt(data)
-        
-        # Make request to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert risk assessment consultant. Generate a single paragraph about operational considerations and risk factors. Return only the paragraph text without any HTML tags, markdown, or formatting."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=400
-        )
-        
-        content = response.choices[0].message.content.strip()
+        messages = build_operational_messages(data)
+
+        # Integrated sessions may already have it (see /api/start-assessment)
+        content = take_prefetched(data, 'operational', messages)
+        if content is None:
+            content = create_chat_completion(messages, temperature=0.7, max_tokens=400, cache=True)
         # logger.info(f"Generated operational paragraph: {len(content)} characters")
 
         return jsonify({"content": content})
         
     except Exception as e:
         logger.error(f"Error generating operational paragraph: {str(e)}")
-        return jsonify({"error": f"Failed to generate operational paragraph: {str(e)}"}), 500
+        return error_response(f"Failed to generate operational paragraph: {str(e)}", e)
+
+@app.route('/api/ai/generate-overview/stream', methods=['POST'])
+def stream_overview():
+    """Stream the overview paragraph as Server-Sent Events"""
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    messages = build_overview_messages(data)
+    return sse_response(stream_paragraph_events(messages, 'overview', take_prefetched(data, 'overview', messages)))
+
+@app.route('/api/ai/generate-operational/stream', methods=['POST'])
+def stream_operational():
+    """Stream the operational considerations paragraph as Server-Sent Events"""
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    messages = build_operational_messages(data)
+    return sse_response(stream_paragraph_events(
+        messages, 'operational paragraph', take_prefetched(data, 'operational', messages)
+    ))
+
+def stream_paragraph_events(messages, label, prefetched=None):
+    """Yield 'delta' events for each text chunk, then a 'done' event with the full paragraph
+
+    A prefetched paragraph is sent as a single delta.
+    """
+    if prefetched is not None:
+        yield format_sse('delta', {"text": prefetched})
+        yield format_sse('done', {"content": prefetched})
+        return
+
+    parts = []
+    try:
+        for delta in stream_chat_completion(messages, temperature=0.7, max_tokens=400):
+            parts.append(delta)
+            yield format_sse('delta', {"text": delta})
+
+        yield format_sse('done', {"content": ''.join(parts).strip()})
+
+    except Exception as e:
+        logger.error(f"Error streaming {label}: {str(e)}")
+        yield format_sse('error', {"error": f"Failed to generate {label}: {str(e)}"})
 
 @app.route('/api/ai/generate-risks', methods=['POST'])
 def generate_risks():
@@ -311,41 +1260,30 @@ def generate_risks():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
-        # Build the prompt for risk assessment
-        prompt = build_risk_assessment_prompt(data)
+        messages = build_risk_assessment_messages(data)
 
-        # Make request to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert risk assessment consultant. Generate detailed risk assessments in JSON format. Each risk should have: id, risk (description), category, impact (1-5), likelihood (1-5), and mitigation."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-
-        content = response.choices[0].message.content.strip()
-
-        # Parse JSON response
+        # Make request to OpenAI (unless the session's risks were prefetched)
         try:
-            risks = json.loads(content)
+            risks = take_prefetched(data, 'risks', messages)
+            if risks is None:
+                risks = create_structured_completion(
+                    messages,
+                    schema_name='risk_assessment',
+                    schema=RISK_LIST_SCHEMA,
+                    coerce=coerce_risk_list,
+                    temperature=0.7,
+                    max_tokens=2000
+                )
             validated_risks = validate_and_format_risks(risks)
             logger.info(f"Generated {len(validated_risks)} risks")
             return jsonify({"risks": validated_risks})
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
             logger.error(f"Failed to parse risk assessment JSON: {e}")
             return jsonify({"error": "Invalid risk assessment format received from AI"}), 500
 
     except Exception as e:
         logger.error(f"Error generating risks: {str(e)}")
-        return jsonify({"error": f"Failed to generate risks: {str(e)}"}), 500
+        return error_response(f"Failed to generate risks: {str(e)}", e)
 
 @app.route('/api/ai/start-risk-conversation', methods=['POST'])
 def start_risk_conversation():
@@ -355,10 +1293,18 @@ def start_risk_conversation():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
+        # Not part of the event data: whether the conversation lives in a token rather than on the server
+        stateless = str(data.pop('stateless', CONVERSATION_STATELESS)).lower() in ('1', 'true', 'yes')
+
         # Generate a unique conversation ID
         import uuid
         conversation_id = str(uuid.uuid4())
 
+        if stateless:
+            token = conversation_tokens.encode({'conversation_id': conversation_id, 'event_data': data, 'generated_risks': []})
+            logger.info(f"Started stateless risk conversation {conversation_id}")
+            return jsonify({"conversation_id": conversation_id, "conversation_token": token})
+
         # Initialize conversation with system prompt and event context
         system_prompt = build_risk_conversation_system_prompt()
         event_context = build_event_context_message(data)
@@ -377,7 +1323,7 @@ def start_risk_conversation():
 
     except Exception as e:
         logger.error(f"Error starting risk conversation: {str(e)}")
-        return jsonify({"error": f"Failed to start risk conversation: {str(e)}"}), 500
+        return error_response(f"Failed to start risk conversation: {str(e)}", e)
 
 @app.route('/api/ai/generate-next-risk', methods=['POST'])
 def generate_next_risk():
@@ -387,57 +1333,168 @@ def generate_next_risk():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
+        if data.get('conversation_token'):
+            return generate_next_risk_stateless(data)
+
         conversation_id = data.get('conversation_id')
         risk_number = data.get('risk_number', 1)
 
-        if not conversation_id or conversation_id not in risk_conversations:
+        if not conversation_id:
             return jsonify({"error": "Invalid or expired conversation ID"}), 400
 
-        conversation = risk_conversations[conversation_id]
+        # Hold the conversation so concurrent calls can't interleave their turns
+        with entry_lock(risk_conversations, conversation_id):
+            conversation = risk_conversations.get(conversation_id)
+            if conversation is None:
+                return jsonify({"error": "Invalid or expired conversation ID"}), 400
 
-        # Build prompt for next risk that avoids previous ones
-        next_risk_prompt = build_next_risk_prompt(conversation['generated_risks'], risk_number)
+            # Build prompt for next risk that avoids previous ones
+            next_risk_prompt = build_next_risk_prompt(conversation['generated_risks'], risk_number)
 
-        # Add the request to conversation
-        conversation['messages'].append({
-            "role": "user",
-            "content": next_risk_prompt
-        })
+            # The request joins the conversation only together with a usable reply
+            turn = {"role": "user", "content": next_risk_prompt}
+
+            # Make request to OpenAI with a token-capped window of the conversation
+            messages, prompt_tokens = conversation_context.build(conversation['messages'] + [turn])
+            try:
+                risk = create_structured_completion(
+                    messages=messages,
+                    schema_name='risk',
+                    schema=RISK_SCHEMA,
+                    coerce=coerce_risk,
+                    temperature=0.8,  # Higher temperature for more variety
+                    max_tokens=400
+                )
+            except StructuredOutputError as e:
+                logger.error(f"Failed to parse risk JSON: {e}")
+                return jsonify({"error": "Invalid risk format received from AI"}), 500
+
+            validated_risk = validate_and_format_single_risk(risk, risk_number)
+
+            # Add both turns (the reply as clean JSON, whatever the raw reply looked like) and the risk
+            conversation['messages'] = conversation['messages'] + [
+                turn, {"role": "assistant", "content": json.dumps(validated_risk)}
+            ]
+            conversation['generated_risks'] = conversation['generated_risks'] + [validated_risk]
+            risk_conversations[conversation_id] = conversation
+
+            # logger.info(f"Generated risk {risk_number} in conversation {conversation_id}: {validated_risk['risk'][:50]}...")
+            return jsonify({"risk": validated_risk, "prompt_tokens": prompt_tokens})
 
-        # Make request to OpenAI with full conversation context
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=conversation['messages'],
+    except Exception as e:
+        logger.error(f"Error generating next risk: {str(e)}")
+        return error_response(f"Failed to generate next risk: {str(e)}", e)
+
+def generate_next_risk_stateless(data):
+    """generate-next-risk for a conversation carried in data['conversation_token']; the reply carries the extended token"""
+    state, started_at = conversation_tokens.decode(data['conversation_token'])
+    generated_risks = state['generated_risks']
+    risk_number = data.get('risk_number', len(generated_risks) + 1)
+
+    # Rebuilt from the risks generated so far, then capped like a stored conversation
+    messages = rebuild_conversation_messages(state['event_data'], generated_risks)
+    messages.append({"role": "user", "content": build_next_risk_prompt(generated_risks, risk_number)})
+    messages, prompt_tokens = conversation_context.build(messages)
+    try:
+        risk = create_structured_completion(
+            messages=messages,
+            schema_name='risk',
+            schema=RISK_SCHEMA,
+            coerce=coerce_risk,
             temperature=0.8,  # Higher temperature for more variety
             max_tokens=400
         )
+    except StructuredOutputError as e:
+        logger.error(f"Failed to parse risk JSON: {e}")
+        return jsonify({"error": "Invalid risk format received from AI"}), 500
+
+    validated_risk = validate_and_format_single_risk(risk, risk_number)
+    state['generated_risks'] = generated_risks + [validated_risk]
+    return jsonify({
+        "risk": validated_risk,
+        "prompt_tokens": prompt_tokens,
+        "conversation_token": conversation_tokens.encode(state, started_at)
+    })
+
+@app.route('/api/ai/generate-next-risk/stream', methods=['POST'])
+def stream_next_risks():
+    """Stream the next risk(s) in a conversation, emitting each risk as soon as its JSON closes"""
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    conversation_id = data.get('conversation_id')
+    if not conversation_id:
+        return jsonify({"error": "Invalid or expired conversation ID"}), 400
+    try:
+        count = max(1, min(int(data.get('count', 1)), 10))
+    except (ValueError, TypeError):
+        return jsonify({"error": "count must be an integer"}), 400
 
-        content = response.choices[0].message.content.strip()
+    # Hold the conversation until the stream ends so concurrent calls can't interleave their turns
+    hold = contextlib.ExitStack()
+    try:
+        hold.enter_context(entry_lock(risk_conversations, conversation_id))
+    except EntryLocked as e:
+        return error_response(str(e), e)
 
-        # Add AI response to conversation
-        conversation['messages'].append({
-            "role": "assistant",
-            "content": content
-        })
+    try:
+        conversation = risk_conversations.get(conversation_id)
+        if conversation is None:
+            hold.close()
+            return jsonify({"error": "Invalid or expired conversation ID"}), 400
+        risk_number = data.get('risk_number', len(conversation['generated_risks']) + 1)
 
-        # Parse JSON response
-        try:
-            risk = json.loads(content)
-            validated_risk = validate_and_format_single_risk(risk, risk_number)
+        # A single risk uses the same prompt as generate-next-risk; several are requested as consecutive objects
+        if count == 1:
+            prompt = build_next_risk_prompt(conversation['generated_risks'], risk_number)
+        else:
+            prompt = build_risk_batch_prompt(conversation['generated_risks'], risk_number, count)
 
-            # Store the generated risk in conversation context
-            conversation['generated_risks'].append(validated_risk)
+        # The new turns stay off the stored conversation until the stream completes
+        turn = {"role": "user", "content": prompt}
+        messages, prompt_tokens = conversation_context.build(conversation['messages'] + [turn])
+    except Exception:
+        hold.close()
+        raise
 
-            # logger.info(f"Generated risk {risk_number} in conversation {conversation_id}: {validated_risk['risk'][:50]}...")
-            return jsonify({"risk": validated_risk})
+    def generate():
+        scanner = JSONObjectStream()
+        parts = []
+        risks = []
+        try:
+            with hold:
+                for delta in stream_chat_completion(messages, temperature=0.8, max_tokens=400 * count):
+                    parts.append(delta)
+
+                    for risk_json in scanner.feed(delta):
+                        try:
+                            risk = coerce_risk(parse_json_response(risk_json)[0])
+                        except StructuredOutputError as e:
+                            logger.error(f"Failed to parse streamed risk JSON: {e}")
+                            continue
+
+                        validated_risk = validate_and_format_single_risk(risk, risk_number + len(risks))
+                        risks.append(validated_risk)
+                        yield format_sse('risk', {"risk": validated_risk})
+
+                # Only now add the turns and risks, so a disconnect or model error mid-stream leaves
+                # the conversation as it was
+                risk_conversations[conversation_id] = dict(
+                    conversation,
+                    messages=conversation['messages'] + [turn, {"role": "assistant", "content": ''.join(parts).strip()}],
+                    generated_risks=conversation['generated_risks'] + risks
+                )
+            yield format_sse('done', {"risks": risks, "prompt_tokens": prompt_tokens})
 
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse risk JSON: {e}")
-            return jsonify({"error": "Invalid risk format received from AI"}), 500
+        except Exception as e:
+            logger.error(f"Error streaming next risk: {str(e)}")
+            yield format_sse('error', {"error": f"Failed to generate next risk: {str(e)}"})
 
-    except Exception as e:
-        logger.error(f"Error generating next risk: {str(e)}")
-        return jsonify({"error": f"Failed to generate next risk: {str(e)}"}), 500
+    # A client that disconnects before the stream starts never runs generate()
+    response = sse_response(generate())
+    response.call_on_close(hold.close)
+    return response
 
 @app.route('/api/ai/generate-additional-risks', methods=['POST'])
 def generate_additional_risks():
@@ -451,64 +1508,184 @@ def generate_additional_risks():
         existing_risks = data.get('existing_risks', [])
         num_additional = data.get('num_additional', 3)
 
-        if not conversation_id or conversation_id not in risk_conversations:
+        if not conversation_id:
             return jsonify({"error": "Invalid or expired conversation ID"}), 400
 
-        conversation = risk_conversations[conversation_id]
-        additional_risks = []
+        try:
+            max_concurrency = int(data.get('max_concurrency', ADDITIONAL_RISKS_MAX_CONCURRENCY))
+        except (ValueError, TypeError):
+            return jsonify({"error": "max_concurrency must be an integer"}), 400
+
+        # Hold the conversation so concurrent calls can't interleave their turns
+        with entry_lock(risk_conversations, conversation_id):
+            conversation = risk_conversations.get(conversation_id)
+            if conversation is None:
+                return jsonify({"error": "Invalid or expired conversation ID"}), 400
+
+            # Parallel mode fans the risks out concurrently (one round trip of wall-clock time)
+            if data.get('parallel'):
+                additional_risks, prompt_token_counts = generate_additional_risks_parallel(
+                    conversation,
+                    num_additional,
+                    max(1, min(max_concurrency, ADDITIONAL_RISKS_MAX_CONCURRENCY))
+                )
+                risk_conversations[conversation_id] = conversation
+                return jsonify({"risks": additional_risks, "prompt_tokens": prompt_token_counts})
+
+            additional_risks = []
+            prompt_token_counts = []
+            # New turns join the conversation only once every risk has been generated
+            new_messages = []
+
+            # Generate additional risks
+            for i in range(num_additional):
+                risk_number = len(conversation['generated_risks']) + len(additional_risks) + 1
+
+                # Build prompt for additional risk that continues importance ranking
+                additional_risk_prompt = build_additional_risk_prompt(
+                    conversation['generated_risks'] + additional_risks,
+                    risk_number
+                )
 
-        # Generate additional risks
-        for i in range(num_additional):
-            risk_number = len(conversation['generated_risks']) + i + 1
+                # Add context reminder about importance ranking
+                importance_reminder = f"""Remember: You are continuing the importance-based risk assessment. The first 8 risks were the most critical. Now generate risk #{risk_number} which should be the next most important concern for this specific event."""
 
-            # Build prompt for additional risk that continues importance ranking
-            additional_risk_prompt = build_additional_risk_prompt(
-                conversation['generated_risks'] + additional_risks,
-                risk_number
-            )
+                # The request, with importance context
+                turn = {
+                    "role": "user",
+                    "content": f"{importance_reminder}\n\n{additional_risk_prompt}"
+                }
 
-            # Add context reminder about importance ranking
-            importance_reminder = f"""Remember: You are continuing the importance-based risk assessment. The first 8 risks were the most critical. Now generate risk #{risk_number} which should be the next most important concern for this specific event."""
+                # Make request to OpenAI with a token-capped window of the conversation
+                messages, prompt_tokens = conversation_context.build(conversation['messages'] + new_messages + [turn])
+                prompt_token_counts.append(prompt_tokens)
+                try:
+                    risk = create_structured_completion(
+                        messages=messages,
+                        schema_name='risk',
+                        schema=RISK_SCHEMA,
+                        coerce=coerce_risk,
+                        temperature=0.8,
+                        max_tokens=400
+                    )
+                except StructuredOutputError as e:
+                    logger.error(f"Failed to parse additional risk JSON: {e}")
+                    continue
+
+                validated_risk = validate_and_format_single_risk(risk, risk_number)
 
-            # Add the request to conversation with importance context
-            conversation['messages'].append({
-                "role": "user",
-                "content": f"{importance_reminder}\n\n{additional_risk_prompt}"
-            })
+                # Keep the request with its reply
+                new_messages += [turn, {"role": "assistant", "content": json.dumps(validated_risk)}]
+                additional_risks.append(validated_risk)
+
+                # logger.info(f"Generated additional risk {risk_number}: {validated_risk['risk'][:50]}...")
 
-            # Make request to OpenAI
-            response = client.chat.completions.create(
-                model="gpt-4o-mini-2024-07-18",
-                messages=conversation['messages'],
+            conversation['messages'] = conversation['messages'] + new_messages
+            conversation['generated_risks'] = conversation['generated_risks'] + additional_risks
+            risk_conversations[conversation_id] = conversation
+            return jsonify({"risks": additional_risks, "prompt_tokens": prompt_token_counts})
+
+    except Exception as e:
+        logger.error(f"Error generating additional risks: {str(e)}")
+        return error_response(f"Failed to generate additional risks: {str(e)}", e)
+
+def generate_additional_risks_parallel(conversation, num_additional, max_concurrency):
+    """Generate additional risks concurrently and merge them back in importance order"""
+    base_messages = list(conversation['messages'])
+    existing_risks = list(conversation['generated_risks'])
+    first_number = len(existing_risks) + 1
+    category_hints = suggest_uncovered_categories(existing_risks, num_additional)
+
+    async def generate_slot(semaphore, risk_number, category_hint):
+        """Generate the risk for a single importance slot"""
+        additional_risk_prompt = build_additional_risk_prompt(existing_risks, risk_number)
+        importance_reminder = f"""Remember: You are continuing the importance-based risk assessment. The first 8 risks were the most critical. Now generate risk #{risk_number} which should be the next most important concern for this specific event."""
+        parallel_note = f"""Risks #{first_number}-#{first_number + num_additional - 1} are being generated at the same time. For risk #{risk_number}, prefer the "{category_hint}" category if it fits this event."""
+        prompt_message = {
+            "role": "user",
+            "content": f"{importance_reminder}\n\n{additional_risk_prompt}\n\n{parallel_note}"
+        }
+
+        messages, prompt_tokens = conversation_context.build(base_messages + [prompt_message])
+        async with semaphore:
+            risk = await acreate_structured_completion(
+                messages=messages,
+                schema_name='risk',
+                schema=RISK_SCHEMA,
+                coerce=coerce_risk,
                 temperature=0.8,
                 max_tokens=400
             )
+        return prompt_message, risk, prompt_tokens
 
-            content = response.choices[0].message.content.strip()
+    async def fan_out():
+        semaphore = asyncio.Semaphore(max_concurrency)
+        return await asyncio.gather(
+            *[generate_slot(semaphore, first_number + i, category_hints[i]) for i in range(num_additional)],
+            return_exceptions=True
+        )
 
-            # Add AI response to conversation
-            conversation['messages'].append({
-                "role": "assistant",
-                "content": content
-            })
+    results = run_llm(fan_out())
 
-            try:
-                risk = json.loads(content)
-                validated_risk = validate_and_format_single_risk(risk, risk_number)
-                additional_risks.append(validated_risk)
-                conversation['generated_risks'].append(validated_risk)
+    # Nothing came back because upstream is down - report that rather than an empty list
+    if all(isinstance(result, Exception) for result in results):
+        outage = next((result for result in results if isinstance(result, UpstreamUnavailable)), None)
+        if outage is not None:
+            raise outage
 
-                # logger.info(f"Generated additional risk {risk_number}: {validated_risk['risk'][:50]}...")
+    # Results come back in slot order, which is the importance order
+    additional_risks = []
+    prompt_token_counts = []
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Failed to generate additional risk in parallel: {result}")
+            continue
 
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse additional risk JSON: {e}")
-                continue
+        prompt_message, risk, prompt_tokens = result
+        prompt_token_counts.append(prompt_tokens)
 
-        return jsonify({"risks": additional_risks})
+        validated_risk = validate_and_format_single_risk(risk, 0)
+        if is_duplicate_risk(validated_risk, existing_risks + additional_risks):
+            logger.warning("Dropped duplicate risk from parallel generation")
+            continue
 
-    except Exception as e:
-        logger.error(f"Error generating additional risks: {str(e)}")
-        return jsonify({"error": f"Failed to generate additional risks: {str(e)}"}), 500
+        validated_risk['id'] = len(existing_risks) + len(additional_risks) + 1
+        additional_risks.append(validated_risk)
+        conversation['messages'].append(prompt_message)
+        conversation['messages'].append({"role": "assistant", "content": json.dumps(validated_risk)})
+
+    conversation['generated_risks'].extend(additional_risks)
+    return additional_risks, prompt_token_counts
+
+def suggest_uncovered_categories(existing_risks, count):
+    """Suggest categories for parallel risk slots, least covered first"""
+    valid_categories = ['Crowd Safety', 'Environmental', 'Security', 'Medical', 'Operational', 'Logistics']
+    coverage = {category: 0 for category in valid_categories}
+    for risk in existing_risks:
+        if risk.get('category') in coverage:
+            coverage[risk['category']] += 1
+
+    ranked = sorted(valid_categories, key=lambda category: coverage[category])
+    return [ranked[i % len(ranked)] for i in range(count)]
+
+def is_duplicate_risk(risk, other_risks, threshold=0.6):
+    """Check whether a risk repeats one already identified (word overlap on the description)"""
+    words = risk_keywords(risk)
+    if not words:
+        return False
+
+    for other in other_risks:
+        other_words = risk_keywords(other)
+        if not other_words:
+            continue
+        overlap = len(words & other_words) / len(words | other_words)
+        if overlap >= threshold:
+            return True
+    return False
+
+def risk_keywords(risk):
+    """Significant words of a risk description, used for duplicate detection"""
+    return {word for word in re.findall(r'[a-z]+', str(risk.get('risk', '')).lower()) if len(word) > 3}
 
 @app.route('/api/ai/generate-single-risk', methods=['POST'])
 def generate_single_risk():
@@ -525,37 +1702,34 @@ def generate_single_risk():
         prompt = build_single_risk_prompt(data, risk_number, total_risks)
 
         # Make request to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert risk assessment consultant. Generate a single detailed risk in JSON format. The risk should have: id, risk (description), category, impact (1-5), likelihood (1-5), and mitigation."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=400
-        )
-
-        content = response.choices[0].message.content.strip()
-
-        # Parse JSON response
         try:
-            risk = json.loads(content)
+            risk = create_structured_completion(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are an expert risk assessment consultant. Generate a single detailed risk in JSON format. The risk should have: id, risk (description), category, impact (1-5), likelihood (1-5), and mitigation."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                schema_name='risk',
+                schema=RISK_SCHEMA,
+                coerce=coerce_risk,
+                temperature=0.7,
+                max_tokens=400
+            )
             validated_risk = validate_and_format_single_risk(risk, risk_number)
             # logger.info(f"Generated single risk {risk_number}: {validated_risk['risk'][:50]}...")
             return jsonify({"risk": validated_risk})
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
             logger.error(f"Failed to parse single risk JSON: {e}")
             return jsonify({"error": "Invalid risk format received from AI"}), 500
 
     except Exception as e:
         logger.error(f"Error generating single risk: {str(e)}")
-        return jsonify({"error": f"Failed to generate single risk: {str(e)}"}), 500
+        return error_response(f"Failed to generate single risk: {str(e)}", e)
 
 @app.route('/api/ai/generate-justification', methods=['POST'])
 def generate_justification():
@@ -572,27 +1746,13 @@ def generate_justification():
         if not field_name or not field_value:
             return jsonify({"error": "fieldName and fieldValue are required"}), 400
 
-        # Build the prompt for justification
-        prompt = build_justification_prompt(field_name, field_value, context)
-
         # Make request to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert risk assessment consultant. Provide SPECIFIC, CONCISE justifications (1-2 sentences max). For sources, use bullet points (•) with 3-5 SPECIFIC, REAL documents/standards with full names and years (e.g., 'ISO 31000:2018 Risk Management Guidelines', 'NFPA 1600:2019 Standard on Continuity'). Mark each as [public] or [proprietary]. NO vague descriptors."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
+        content = create_chat_completion(
+            messages=build_justification_messages(field_name, field_value, context),
             temperature=0.7,
-            max_tokens=300
+            max_tokens=300,
+            cache=True
         )
-
-        content = response.choices[0].message.content.strip()
         justification = parse_justification_response(content)
 
         # logger.info(f"Generated justification for {field_name}: {field_value}")
@@ -600,7 +1760,118 @@ def generate_justification():
 
     except Exception as e:
         logger.error(f"Error generating justification: {str(e)}")
-        return jsonify({"error": f"Failed to generate justification: {str(e)}"}), 500
+        return error_response(f"Failed to generate justification: {str(e)}", e)
+
+@app.route('/api/ai/generate-justifications', methods=['POST'])
+def generate_justifications():
+    """Generate justifications for many fields with one structured call per risk"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+
+        items = data.get('items', [])
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "items must be a non-empty array"}), 400
+
+        if len(items) > JUSTIFICATION_BATCH_MAX_ITEMS:
+            return jsonify({"error": f"At most {JUSTIFICATION_BATCH_MAX_ITEMS} items per batch"}), 400
+
+        for item in items:
+            if not isinstance(item, dict) or not item.get('fieldName') or not item.get('fieldValue'):
+                return jsonify({"error": "Each item must be an object with fieldName and fieldValue"}), 400
+
+        justifications = run_llm(agenerate_justification_batch(items))
+
+        return jsonify({
+            "justifications": [
+                {
+                    "key": item.get('key'),
+                    "fieldName": item['fieldName'],
+                    "fieldValue": item['fieldValue'],
+                    "reasoning": justification['reasoning'],
+                    "sources": justification['sources']
+                }
+                for item, justification in zip(items, justifications)
+            ]
+        })
+
+    except Exception as e:
+        logger.error(f"Error generating justifications: {str(e)}")
+        return error_response(f"Failed to generate justifications: {str(e)}", e)
+
+async def agenerate_justification(field_name, field_value, context):
+    """Generate a single justification on the LLM event loop"""
+    content = await acreate_chat_completion(
+        messages=build_justification_messages(field_name, field_value, context),
+        temperature=0.7,
+        max_tokens=300,
+        cache=True
+    )
+    return parse_justification_response(content)
+
+async def agenerate_justification_batch(items):
+    """Answer a batch of justification requests, grouped by shared risk/event context"""
+    results = [None] * len(items)
+    groups = {}
+
+    for index, item in enumerate(items):
+        if item['fieldName'] == 'Contextual Summary':
+            # The summary has its own prompt shape - answer it individually
+            groups.setdefault(('single', index), []).append(index)
+        else:
+            context_key = json.dumps(item.get('context', {}), sort_keys=True, default=str)
+            groups.setdefault(('batch', context_key), []).append(index)
+
+    semaphore = asyncio.Semaphore(JUSTIFICATION_BATCH_MAX_CONCURRENCY)
+
+    async def answer_group(kind, indexes):
+        async with semaphore:
+            if kind == 'single':
+                item = items[indexes[0]]
+                results[indexes[0]] = await agenerate_justification(item['fieldName'], item['fieldValue'], item.get('context', {}))
+                return
+
+            group_items = [items[index] for index in indexes]
+            for index, justification in zip(indexes, await agenerate_structured_justifications(group_items)):
+                results[index] = justification
+
+    await asyncio.gather(*[answer_group(kind, indexes) for (kind, _), indexes in groups.items()])
+    return results
+
+async def agenerate_structured_justifications(group_items):
+    """Justify every field of one risk in a single JSON call, falling back per field if unusable"""
+    context = group_items[0].get('context', {})
+
+    def validate(content):
+        # Only a reply justifying every field is worth caching
+        if any(justification is None for justification in parse_batch_justification_response(content, len(group_items))):
+            raise ValueError('Batch justification reply is missing fields')
+
+    content = await acreate_chat_completion(
+        messages=[
+            {"role": "system", "content": build_justification_system_prompt()},
+            {"role": "user", "content": build_batch_justification_prompt(group_items, context)}
+        ],
+        temperature=0.7,
+        max_tokens=min(250 * len(group_items) + 200, 3000),
+        cache=True,
+        response_format=json_schema_format('justifications', JUSTIFICATIONS_SCHEMA) if STRUCTURED_OUTPUTS else None,
+        validate=validate
+    )
+
+    parsed = parse_batch_justification_response(content, len(group_items))
+    missing = [index for index, justification in enumerate(parsed) if justification is None]
+    if missing:
+        logger.warning(f"Batch justification missing {len(missing)} of {len(group_items)} fields, retrying individually")
+        fallbacks = await asyncio.gather(*[
+            agenerate_justification(group_items[index]['fieldName'], group_items[index]['fieldValue'], context)
+            for index in missing
+        ])
+        for index, justification in zip(missing, fallbacks):
+            parsed[index] = justification
+
+    return parsed
 
 @app.route('/api/ai/generate-rekon-context', methods=['POST'])
 def generate_rekon_context():
@@ -616,50 +1887,33 @@ def generate_rekon_context():
         if not score or not level:
             return jsonify({"error": "score and level are required"}), 400
 
-        # Build the prompt for RekonContext details
-        prompt = build_rekon_context_prompt(data, score, level)
+        messages = build_rekon_context_messages(data, score, level)
 
-        # Make request to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert risk assessment consultant. Generate exactly 3 CONCISE bullet points for the RekonContext Index. Each bullet point should be 1 short sentence (10-15 words max) and highly specific to the event details provided. Return only a JSON array of strings."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=400
-        )
-
-        content = response.choices[0].message.content.strip()
-
-        # Parse JSON response
+        # Make request to OpenAI (unless the session's details were prefetched)
         try:
-            details = json.loads(content)
-            if not isinstance(details, list) or len(details) != 3:
-                raise ValueError("Expected array of 3 strings")
+            details = take_prefetched(data, 'rekon_context', messages)
+            if details is None:
+                details = create_structured_completion(
+                    messages,
+                    schema_name='details',
+                    schema=DETAILS_SCHEMA,
+                    coerce=coerce_details,
+                    temperature=0.7,
+                    max_tokens=400,
+                    cache=True
+                )
 
             # logger.info(f"Generated RekonContext details for level {level} (score {score})")
             return jsonify({"details": details})
 
-        except (json.JSONDecodeError, ValueError) as e:
+        except StructuredOutputError as e:
             logger.error(f"Failed to parse RekonContext JSON: {e}")
             # Fallback to default structure
-            fallback_details = [
-                f"Event complexity requires {level.lower()} level planning and coordination.",
-                f"Risk profile indicates {level.lower()} operational oversight needed.",
-                f"Stakeholder engagement appropriate for {level.lower()} significance events."
-            ]
-            return jsonify({"details": fallback_details})
+            return jsonify({"details": rekon_context_fallback(level)})
 
     except Exception as e:
         logger.error(f"Error generating RekonContext details: {str(e)}")
-        return jsonify({"error": f"Failed to generate RekonContext details: {str(e)}"}), 500
+        return error_response(f"Failed to generate RekonContext details: {str(e)}", e)
 
 @app.route('/api/ai/generate-rekon-risk', methods=['POST'])
 def generate_rekon_risk():
@@ -677,50 +1931,29 @@ def generate_rekon_risk():
         if not score or not level:
             return jsonify({"error": "score and level are required"}), 400
 
-        # Build the prompt for RekonRisk details
-        prompt = build_rekon_risk_prompt(event_data, risks, score, level)
-
         # Make request to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert risk assessment consultant. Generate exactly 3 CONCISE bullet points for the RekonRisk Index. Each bullet point should be 1 short sentence (10-15 words max) and specific to the actual risks identified. Return only a JSON array of strings."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=400
-        )
-
-        content = response.choices[0].message.content.strip()
-
-        # Parse JSON response
         try:
-            details = json.loads(content)
-            if not isinstance(details, list) or len(details) != 3:
-                raise ValueError("Expected array of 3 strings")
+            details = create_structured_completion(
+                messages=build_rekon_risk_messages(event_data, risks, score, level),
+                schema_name='details',
+                schema=DETAILS_SCHEMA,
+                coerce=coerce_details,
+                temperature=0.7,
+                max_tokens=400,
+                cache=True
+            )
 
             # logger.info(f"Generated RekonRisk details for level {level} (score {score})")
             return jsonify({"details": details})
 
-        except (json.JSONDecodeError, ValueError) as e:
+        except StructuredOutputError as e:
             logger.error(f"Failed to parse RekonRisk JSON: {e}")
             # Fallback to default structure
-            fallback_details = [
-                f"Risk assessment indicates {level.lower()} level threats requiring active management.",
-                f"Impact potential suggests {level.lower()} priority mitigation strategies needed.",
-                f"Overall risk profile demands {level.lower()} level monitoring and response capabilities."
-            ]
-            return jsonify({"details": fallback_details})
+            return jsonify({"details": rekon_risk_fallback(level)})
 
     except Exception as e:
         logger.error(f"Error generating RekonRisk details: {str(e)}")
-        return jsonify({"error": f"Failed to generate RekonRisk details: {str(e)}"}), 500
+        return error_response(f"Failed to generate RekonRisk details: {str(e)}", e)
 
 @app.route('/api/ai/generate-rekon-compliance', methods=['POST'])
 def generate_rekon_compliance():
@@ -737,67 +1970,172 @@ def generate_rekon_compliance():
         if not status:
             return jsonify({"error": "status is required"}), 400
 
-        # Build the prompt for RekonCompliance details
-        prompt = build_rekon_compliance_prompt(event_data, risks, status)
-
         # Make request to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert risk assessment consultant. Generate exactly 3 CONCISE bullet points for the RekonCompliance Status. Each bullet point should be 1 short sentence (10-15 words max) about regulatory alignment (Martyn's Law, ProtectUK, ISO 27001). Return only a JSON array of strings."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=400
-        )
-
-        content = response.choices[0].message.content.strip()
-
-        # Parse JSON response
         try:
-            details = json.loads(content)
-            if not isinstance(details, list) or len(details) != 3:
-                raise ValueError("Expected array of 3 strings")
+            details = create_structured_completion(
+                messages=build_rekon_compliance_messages(event_data, risks, status),
+                schema_name='details',
+                schema=DETAILS_SCHEMA,
+                coerce=coerce_details,
+                temperature=0.7,
+                max_tokens=400,
+                cache=True
+            )
 
             # logger.info(f"Generated RekonCompliance details for status {status}")
             return jsonify({"details": details})
 
-        except (json.JSONDecodeError, ValueError) as e:
+        except StructuredOutputError as e:
             logger.error(f"Failed to parse RekonCompliance JSON: {e}")
             # Fallback to default structure based on status
-            if status == "Exceeds Compliance":
-                fallback_details = [
-                    "Assessment demonstrates comprehensive approach exceeding regulatory requirements.",
-                    "Risk identification and mitigation strategies surpass industry standards.",
-                    "Documentation and controls align with best practice frameworks."
-                ]
-            elif status == "Compliant":
-                fallback_details = [
-                    "Assessment meets essential regulatory requirements and standards.",
-                    "Risk management approach aligns with compliance frameworks.",
-                    "Basic security and safety considerations are appropriately addressed."
-                ]
-            else:  # Non-Compliant
-                fallback_details = [
-                    "Assessment lacks key elements required by regulatory frameworks.",
-                    "Critical security and safety risks are not adequately addressed.",
-                    "Additional risk identification and mitigation planning required."
-                ]
-            return jsonify({"details": fallback_details})
+            return jsonify({"details": rekon_compliance_fallback(status)})
 
     except Exception as e:
         logger.error(f"Error generating RekonCompliance details: {str(e)}")
-        return jsonify({"error": f"Failed to generate RekonCompliance details: {str(e)}"}), 500
+        return error_response(f"Failed to generate RekonCompliance details: {str(e)}", e)
+
+@app.route('/api/ai/generate-rekon-metrics', methods=['POST'])
+def generate_rekon_metrics():
+    """Generate the requested RekonContext, RekonRisk and RekonCompliance details in one request"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+
+        event_data = data.get('eventData', {})
+        risks = data.get('risks', [])
+
+        sections = {}
+        for name, fields in REKON_SECTIONS.items():
+            section = data.get(name)
+            if section is None:
+                continue
+            if not isinstance(section, dict) or not all(section.get(field) for field in fields):
+                return jsonify({"error": f"{name} requires {' and '.join(fields)}"}), 400
+            sections[name] = section
+
+        if not sections:
+            return jsonify({"error": f"At least one of {', '.join(REKON_SECTIONS)} is required"}), 400
+
+        if data.get('parallel'):
+            # One call per section, concurrently (same prompts and cache entries as the per-section endpoints)
+            details = run_llm(agenerate_rekon_sections(event_data, risks, sections))
+        else:
+            try:
+                details = create_structured_completion(
+                    messages=build_rekon_metrics_messages(event_data, risks, sections),
+                    schema_name='rekon_metrics',
+                    schema=details_sections_schema(list(sections)),
+                    coerce=lambda value: coerce_details_sections(value, list(sections)),
+                    temperature=0.7,
+                    max_tokens=200 + 200 * len(sections),
+                    cache=True
+                )
+            except StructuredOutputError as e:
+                logger.error(f"Failed to parse Rekon metrics JSON: {e}")
+                details = {}
+
+        # Sections the model didn't answer usably get their usual fallback
+        response = {"fallback": []}
+        for name, section in sections.items():
+            if details.get(name) is None:
+                response[name] = rekon_section_fallback(name, section)
+                response["fallback"].append(name)
+            else:
+                response[name] = details[name]
+        return jsonify(response)
+
+    except Exception as e:
+        logger.error(f"Error generating Rekon metrics details: {str(e)}")
+        return error_response(f"Failed to generate Rekon metrics details: {str(e)}", e)
+
+async def agenerate_rekon_sections(event_data, risks, sections):
+    """Generate each requested Rekon section with its own call; sections that fail come back as None"""
+    async def generate(name, section):
+        if name == 'context':
+            messages = build_rekon_context_messages(event_data, section['score'], section['level'])
+        elif name == 'risk':
+            messages = build_rekon_risk_messages(event_data, risks, section['score'], section['level'])
+        else:
+            messages = build_rekon_compliance_messages(event_data, risks, section['status'])
+        return await acreate_structured_completion(
+            messages, 'details', DETAILS_SCHEMA, coerce_details, temperature=0.7, max_tokens=400, cache=True
+        )
+
+    results = await asyncio.gather(*[generate(name, section) for name, section in sections.items()],
+                                   return_exceptions=True)
+
+    # Nothing came back because upstream is down - report that rather than fallbacks
+    if all(isinstance(result, Exception) for result in results):
+        outage = next((result for result in results if isinstance(result, UpstreamUnavailable)), None)
+        if outage is not None:
+            raise outage
+
+    details = {}
+    for name, result in zip(sections, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to generate Rekon {name} details: {result}")
+            result = None
+        details[name] = result
+    return details
+
+def rekon_context_fallback(level):
+    """Default RekonContext details when the model's reply is unusable"""
+    return [
+        f"Event complexity requires {level.lower()} level planning and coordination.",
+        f"Risk profile indicates {level.lower()} operational oversight needed.",
+        f"Stakeholder engagement appropriate for {level.lower()} significance events."
+    ]
+
+def rekon_risk_fallback(level):
+    """Default RekonRisk details when the model's reply is unusable"""
+    return [
+        f"Risk assessment indicates {level.lower()} level threats requiring active management.",
+        f"Impact potential suggests {level.lower()} priority mitigation strategies needed.",
+        f"Overall risk profile demands {level.lower()} level monitoring and response capabilities."
+    ]
+
+def rekon_compliance_fallback(status):
+    """Default RekonCompliance details for a status when the model's reply is unusable"""
+    if status == "Exceeds Compliance":
+        return [
+            "Assessment demonstrates comprehensive approach exceeding regulatory requirements.",
+            "Risk identification and mitigation strategies surpass industry standards.",
+            "Documentation and controls align with best practice frameworks."
+        ]
+    elif status == "Compliant":
+        return [
+            "Assessment meets essential regulatory requirements and standards.",
+            "Risk management approach aligns with compliance frameworks.",
+            "Basic security and safety considerations are appropriately addressed."
+        ]
+    else:  # Non-Compliant
+        return [
+            "Assessment lacks key elements required by regulatory frameworks.",
+            "Critical security and safety risks are not adequately addressed.",
+            "Additional risk identification and mitigation planning required."
+        ]
+
+def rekon_section_fallback(name, section):
+    """Default details for one section of a combined Rekon metrics request"""
+    if name == 'compliance':
+        return rekon_compliance_fallback(section['status'])
+    if name == 'risk':
+        return rekon_risk_fallback(section['level'])
+    return rekon_context_fallback(section['level'])
 
 def build_rekon_context_prompt(event_data, score, level):
     """Build prompt for RekonContext Index details"""
-    return f"""Generate 3 specific bullet points explaining the contextual complexity for this RekonContext Index assessment:
+    return f"""Generate 3 specific bullet points explaining the contextual complexity for the RekonContext Index assessment below.
+
+Generate exactly 3 CONCISE bullet points that explain:
+1. The scale and logistical complexity specific to this event
+2. The public profile and stakeholder sensitivity for this event type
+3. The regulatory oversight and planning requirements for this specific event
+
+Each bullet point should be 1 SHORT sentence (10-15 words maximum) and highly specific to the actual event details provided.
+
+Return only a JSON array of 3 strings (no bullet point symbols, just the text).
 
 Event Details:
 - Title: {event_data.get('eventTitle', 'N/A')}
@@ -810,22 +2148,46 @@ Event Details:
 
 RekonContext Assessment:
 - Score: {score}/7
-- Level: {level}
+- Level: {level}"""
 
-Generate exactly 3 CONCISE bullet points that explain:
-1. The scale and logistical complexity specific to this event
-2. The public profile and stakeholder sensitivity for this event type
-3. The regulatory oversight and planning requirements for this specific event
+def build_rekon_context_messages(event_data, score, level):
+    """Build the chat messages for RekonContext Index details"""
+    return [
+        {"role": "system", "content": REKON_CONTEXT_SYSTEM_PROMPT},
+        {"role": "user", "content": build_rekon_context_prompt(event_data, score, level)}
+    ]
 
-Each bullet point should be 1 SHORT sentence (10-15 words maximum) and highly specific to the actual event details provided.
+def rekon_context_score(event_data):
+    """RekonContext Index score (1-7), scored the same way as getRekonContext in main.js"""
+    score = 1 + {'State': 3, 'Sport': 2, 'Music': 1, 'Community': 1}.get(event_data.get('eventType'), 0)
+
+    match = re.match(r'\s*[-+]?\d+', str(event_data.get('attendance') or ''))
+    attendance = int(match.group()) if match else 0
+    if attendance > 50000:
+        score += 3
+    elif attendance > 10000:
+        score += 2
+    elif attendance > 1000:
+        score += 1
 
-Return only a JSON array of 3 strings (no bullet point symbols, just the text)."""
+    if event_data.get('venueType') in HIGH_SENSITIVITY_VENUE_TYPES:
+        score += 2
+    return min(score, 7)
 
 def build_rekon_risk_prompt(event_data, risks, score, level):
     """Build prompt for RekonRisk Index details"""
     risk_summary = "\n".join([f"- {risk.get('risk', 'N/A')} (Category: {risk.get('category', 'N/A')}, Impact: {risk.get('impact', 'N/A')}, Likelihood: {risk.get('likelihood', 'N/A')})" for risk in risks[:8]])  # Limit to first 8 for brevity
 
-    return f"""Generate 3 specific bullet points explaining the overall risk profile for this RekonRisk Index assessment:
+    return f"""Generate 3 specific bullet points explaining the overall risk profile for the RekonRisk Index assessment below.
+
+Generate exactly 3 CONCISE bullet points that explain:
+1. The nature and severity of risks identified for this specific event
+2. The impact potential and likelihood patterns across the risk categories
+3. The management and monitoring requirements based on the risk profile
+
+Each bullet point should be 1 SHORT sentence (10-15 words maximum) and reference the actual risks identified, not generic statements.
+
+Return only a JSON array of 3 strings (no bullet point symbols, just the text).
 
 Event Details:
 - Title: {event_data.get('eventTitle', 'N/A')}
@@ -838,23 +2200,23 @@ Identified Risks:
 
 RekonRisk Assessment:
 - Score: {score}/7
-- Level: {level}
-
-Generate exactly 3 CONCISE bullet points that explain:
-1. The nature and severity of risks identified for this specific event
-2. The impact potential and likelihood patterns across the risk categories
-3. The management and monitoring requirements based on the risk profile
-
-Each bullet point should be 1 SHORT sentence (10-15 words maximum) and reference the actual risks identified, not generic statements.
-
-Return only a JSON array of 3 strings (no bullet point symbols, just the text)."""
+- Level: {level}"""
 
 def build_rekon_compliance_prompt(event_data, risks, status):
     """Build prompt for RekonCompliance Status details"""
     security_risks = [risk for risk in risks if risk.get('category') == 'Security']
     risk_categories = list(set([risk.get('category', 'Unknown') for risk in risks]))
 
-    return f"""Generate 3 specific bullet points explaining the compliance status for this RekonCompliance assessment:
+    return f"""Generate 3 specific bullet points explaining the compliance status for the RekonCompliance assessment below.
+
+Generate exactly 3 CONCISE bullet points that explain how this assessment aligns with:
+1. Martyn's Law (terrorism risk assessment and public safety)
+2. ProtectUK guidance (threat detection and security measures)
+3. ISO 27001 (information security risk management)
+
+Each bullet point should be 1 SHORT sentence (10-15 words maximum) and specific to the actual risks identified and the compliance status achieved.
+
+Return only a JSON array of 3 strings (no bullet point symbols, just the text).
 
 Event Details:
 - Title: {event_data.get('eventTitle', 'N/A')}
@@ -865,30 +2227,85 @@ Event Details:
 Risk Assessment Summary:
 - Total Risks Identified: {len(risks)}
 - Security Risks: {len(security_risks)}
-- Risk Categories Covered: {', '.join(risk_categories)}
+- Risk Categories Covered: {', '.join(sorted(risk_categories))}
 
-RekonCompliance Status: {status}
+RekonCompliance Status: {status}"""
 
-Generate exactly 3 CONCISE bullet points that explain how this assessment aligns with:
+def build_rekon_risk_messages(event_data, risks, score, level):
+    """Build the chat messages for RekonRisk Index details"""
+    return [
+        {"role": "system", "content": REKON_RISK_SYSTEM_PROMPT},
+        {"role": "user", "content": build_rekon_risk_prompt(event_data, risks, score, level)}
+    ]
+
+def build_rekon_compliance_messages(event_data, risks, status):
+    """Build the chat messages for RekonCompliance Status details"""
+    return [
+        {"role": "system", "content": REKON_COMPLIANCE_SYSTEM_PROMPT},
+        {"role": "user", "content": build_rekon_compliance_prompt(event_data, risks, status)}
+    ]
+
+def build_rekon_metrics_prompt(event_data, risks, sections):
+    """Build one prompt for several Rekon metrics, sending the event and risk details once"""
+    metrics = []
+    if 'context' in sections:
+        metrics.append(f""""context" - RekonContext Index (Score: {sections['context']['score']}/7, Level: {sections['context']['level']}). Explain:
+1. The scale and logistical complexity specific to this event
+2. The public profile and stakeholder sensitivity for this event type
+3. The regulatory oversight and planning requirements for this specific event""")
+    if 'risk' in sections:
+        metrics.append(f""""risk" - RekonRisk Index (Score: {sections['risk']['score']}/7, Level: {sections['risk']['level']}). Explain:
+1. The nature and severity of risks identified for this specific event
+2. The impact potential and likelihood patterns across the risk categories
+3. The management and monitoring requirements based on the risk profile""")
+    if 'compliance' in sections:
+        metrics.append(f""""compliance" - RekonCompliance Status: {sections['compliance']['status']}. Explain how this assessment aligns with:
 1. Martyn's Law (terrorism risk assessment and public safety)
 2. ProtectUK guidance (threat detection and security measures)
-3. ISO 27001 (information security risk management)
+3. ISO 27001 (information security risk management)""")
 
-Each bullet point should be 1 SHORT sentence (10-15 words maximum) and specific to the actual risks identified and the compliance status achieved.
+    prompt = f"""Generate 3 specific bullet points for each Rekon metric below.
 
-Return only a JSON array of 3 strings (no bullet point symbols, just the text)."""
+{chr(10).join(metrics)}
+
+Each bullet point should be 1 SHORT sentence (10-15 words maximum) and specific to the actual event details and risks identified, not generic statements.
+
+Return only a JSON object with the keys {', '.join(f'"{name}"' for name in sections)}, each an array of 3 strings (no bullet point symbols, just the text).
+
+Event Details:
+- Title: {event_data.get('eventTitle', 'N/A')}
+- Date: {event_data.get('eventDate', 'N/A')}
+- Location: {event_data.get('location', 'N/A')}
+- Attendance: {event_data.get('attendance', 'N/A')} people
+- Event Type: {event_data.get('eventType', 'N/A')}
+- Venue Type: {event_data.get('venueType', 'N/A')}
+- Description: {event_data.get('description', 'Not provided')}"""
+
+    if 'risk' in sections or 'compliance' in sections:
+        risk_summary = "\n".join([f"- {risk.get('risk', 'N/A')} (Category: {risk.get('category', 'N/A')}, Impact: {risk.get('impact', 'N/A')}, Likelihood: {risk.get('likelihood', 'N/A')})" for risk in risks[:8]])
+        security_risks = [risk for risk in risks if risk.get('category') == 'Security']
+        risk_categories = list(set([risk.get('category', 'Unknown') for risk in risks]))
+        prompt += f"""
+
+Identified Risks:
+{risk_summary}
+
+Risk Assessment Summary:
+- Total Risks Identified: {len(risks)}
+- Security Risks: {len(security_risks)}
+- Risk Categories Covered: {', '.join(sorted(risk_categories))}"""
+    return prompt
+
+def build_rekon_metrics_messages(event_data, risks, sections):
+    """Build the chat messages for a combined Rekon metrics request"""
+    return [
+        {"role": "system", "content": REKON_METRICS_SYSTEM_PROMPT},
+        {"role": "user", "content": build_rekon_metrics_prompt(event_data, risks, sections)}
+    ]
 
 def build_overview_prompt(event_data):
     """Build prompt for overview paragraph"""
-    return f"""Write a professional overview paragraph for a risk assessment of this event:
-
-Event Title: {event_data.get('eventTitle', 'N/A')}
-Event Date: {event_data.get('eventDate', 'N/A')}
-Location: {event_data.get('location', 'N/A')}
-Attendance: {event_data.get('attendance', 'N/A')} people
-Event Type: {event_data.get('eventType', 'N/A')}
-Venue Type: {event_data.get('venueType', 'N/A')}
-Description: {event_data.get('description', 'Not provided')}
+    return f"""Write a professional overview paragraph for a risk assessment of the event below.
 
 Write exactly ONE paragraph (3-4 short sentences) covering:
 - Event description and its purpose
@@ -896,11 +2313,7 @@ Write exactly ONE paragraph (3-4 short sentences) covering:
 - Location context and venue characteristics
 - Target audience and community impact
 
-Return only the paragraph text, no HTML tags, no formatting."""
-
-def build_operational_prompt(event_data):
-    """Build prompt for operational considerations paragraph"""
-    return f"""Write a professional operational considerations paragraph for a risk assessment of this event:
+Return only the paragraph text, no HTML tags, no formatting.
 
 Event Title: {event_data.get('eventTitle', 'N/A')}
 Event Date: {event_data.get('eventDate', 'N/A')}
@@ -908,7 +2321,18 @@ Location: {event_data.get('location', 'N/A')}
 Attendance: {event_data.get('attendance', 'N/A')} people
 Event Type: {event_data.get('eventType', 'N/A')}
 Venue Type: {event_data.get('venueType', 'N/A')}
-Description: {event_data.get('description', 'Not provided')}
+Description: {event_data.get('description', 'Not provided')}"""
+
+def build_overview_messages(event_data):
+    """Build the chat messages for the overview paragraph"""
+    return [
+        {"role": "system", "content": OVERVIEW_SYSTEM_PROMPT},
+        {"role": "user", "content": build_overview_prompt(event_data)}
+    ]
+
+def build_operational_prompt(event_data):
+    """Build prompt for operational considerations paragraph"""
+    return f"""Write a professional operational considerations paragraph for a risk assessment of the event below.
 
 Write exactly ONE paragraph (3-4 short sentences) covering:
 - Key risk factors and safety considerations
@@ -916,20 +2340,26 @@ Write exactly ONE paragraph (3-4 short sentences) covering:
 - Industry-specific considerations for this event type
 - Regulatory and compliance factors
 
-Return only the paragraph text, no HTML tags, no formatting."""
+Return only the paragraph text, no HTML tags, no formatting.
+
+Event Title: {event_data.get('eventTitle', 'N/A')}
+Event Date: {event_data.get('eventDate', 'N/A')}
+Location: {event_data.get('location', 'N/A')}
+Attendance: {event_data.get('attendance', 'N/A')} people
+Event Type: {event_data.get('eventType', 'N/A')}
+Venue Type: {event_data.get('venueType', 'N/A')}
+Description: {event_data.get('description', 'Not provided')}"""
+
+def build_operational_messages(event_data):
+    """Build the chat messages for the operational considerations paragraph"""
+    return [
+        {"role": "system", "content": OPERATIONAL_SYSTEM_PROMPT},
+        {"role": "user", "content": build_operational_prompt(event_data)}
+    ]
 
 def build_risk_assessment_prompt(event_data):
     """Build prompt for risk assessment generation"""
-    return f"""Generate a comprehensive risk assessment for the following event. Return ONLY valid JSON array format.
-
-Event Details:
-- Title: {event_data.get('eventTitle', 'N/A')}
-- Date: {event_data.get('eventDate', 'N/A')}
-- Location: {event_data.get('location', 'N/A')}
-- Attendance: {event_data.get('attendance', 'N/A')} people
-- Event Type: {event_data.get('eventType', 'N/A')}
-- Venue Type: {event_data.get('venueType', 'N/A')}
-- Description: {event_data.get('description', 'Not provided')}
+    return f"""Generate a comprehensive risk assessment for the event below. Return ONLY valid JSON array format.
 
 Generate 8 specific risks relevant to this event. Each risk must have:
 - id: sequential number starting from 1
@@ -939,7 +2369,23 @@ Generate 8 specific risks relevant to this event. Each risk must have:
 - likelihood: number 1-5 (1=rare, 5=almost certain)
 - mitigation: specific, actionable mitigation strategy
 
-Return only the JSON array, no additional text or formatting."""
+Return only the JSON array, no additional text or formatting.
+
+Event Details:
+- Title: {event_data.get('eventTitle', 'N/A')}
+- Date: {event_data.get('eventDate', 'N/A')}
+- Location: {event_data.get('location', 'N/A')}
+- Attendance: {event_data.get('attendance', 'N/A')} people
+- Event Type: {event_data.get('eventType', 'N/A')}
+- Venue Type: {event_data.get('venueType', 'N/A')}
+- Description: {event_data.get('description', 'Not provided')}"""
+
+def build_risk_assessment_messages(event_data):
+    """Build the chat messages for the risk assessment table"""
+    return [
+        {"role": "system", "content": RISK_ASSESSMENT_SYSTEM_PROMPT},
+        {"role": "user", "content": build_risk_assessment_prompt(event_data)}
+    ]
 
 def build_risk_conversation_system_prompt():
     """Build system prompt for risk conversation"""
@@ -969,7 +2415,16 @@ You will generate risks one by one, with each being the NEXT MOST IMPORTANT risk
 
 def build_event_context_message(event_data):
     """Build initial event context message"""
-    return f"""I need a comprehensive risk assessment for the following event, with risks ranked by IMPORTANCE:
+    return f"""I need a comprehensive risk assessment for the event described below, with risks ranked by IMPORTANCE.
+
+CRITICAL REQUIREMENTS:
+1. Generate risks in ORDER OF IMPORTANCE (most critical first)
+2. Each risk must be HIGHLY SPECIFIC to this exact event type and circumstances
+3. Consider what would ACTUALLY be the biggest concerns for event organizers
+4. Think about real-world scenarios that could occur at THIS specific event
+5. Ensure each risk is ACTIONABLE and REALISTIC
+
+I will ask you to generate 8 risks, starting with the MOST CRITICAL and working down to less critical but still important risks. Each should represent what would genuinely be the next biggest concern for this specific event.
 
 Event Details:
 - Title: {event_data.get('eventTitle', 'N/A')}
@@ -978,16 +2433,22 @@ Event Details:
 - Attendance: {event_data.get('attendance', 'N/A')} people
 - Event Type: {event_data.get('eventType', 'N/A')}
 - Venue Type: {event_data.get('venueType', 'N/A')}
-- Description: {event_data.get('description', 'Not provided')}
+- Description: {event_data.get('description', 'Not provided')}"""
 
-CRITICAL REQUIREMENTS:
-1. Generate risks in ORDER OF IMPORTANCE (most critical first)
-2. Each risk must be HIGHLY SPECIFIC to this exact event type and circumstances
-3. Consider what would ACTUALLY be the biggest concerns for event organizers
-4. Think about real-world scenarios that could occur at THIS specific event
-5. Ensure each risk is ACTIONABLE and REALISTIC
+def rebuild_conversation_messages(event_data, generated_risks):
+    """The message log of a conversation that asked for each of generated_risks in turn"""
+    messages = [
+        {"role": "system", "content": build_risk_conversation_system_prompt()},
+        {"role": "user", "content": build_event_context_message(event_data)}
+    ]
+    for index, risk in enumerate(generated_risks):
+        messages.append({"role": "user", "content": build_next_risk_prompt(generated_risks[:index], index + 1)})
+        messages.append({"role": "assistant", "content": json.dumps(risk)})
+    return messages
 
-I will ask you to generate 8 risks, starting with the MOST CRITICAL and working down to less critical but still important risks. Each should represent what would genuinely be the next biggest concern for this specific event."""
+def format_covered_risks(risks, description_chars=80):
+    """Compact one-line-per-risk list of the risks already covered in a conversation"""
+    return chr(10).join([f"#{i+1}: {risk['risk'][:description_chars]}... (Category: {risk['category']}, Impact: {risk['impact']}, Likelihood: {risk['likelihood']})" for i, risk in enumerate(risks)])
 
 def build_next_risk_prompt(previous_risks, risk_number):
     """Build prompt for next risk in order of importance"""
@@ -1020,9 +2481,6 @@ Return only valid JSON format."""
 
     return f"""Generate the {importance_guidance.get(risk_number, 'NEXT MOST CRITICAL')} risk (#{risk_number}) for this specific event.
 
-PREVIOUS RISKS ALREADY IDENTIFIED:
-{chr(10).join([f"#{i+1}: {risk['risk'][:80]}... (Category: {risk['category']}, Impact: {risk['impact']}, Likelihood: {risk['likelihood']})" for i, risk in enumerate(previous_risks)])}
-
 For risk #{risk_number}, identify the NEXT MOST IMPORTANT risk that:
 1. Is DIFFERENT from all previous risks (avoid similar themes/categories if possible)
 2. Is HIGHLY SPECIFIC to this event type and circumstances
@@ -1032,7 +2490,28 @@ For risk #{risk_number}, identify the NEXT MOST IMPORTANT risk that:
 
 Focus on what would ACTUALLY be the next biggest concern for this specific event after the risks already identified.
 
-Return only valid JSON format."""
+Return only valid JSON format.
+
+PREVIOUS RISKS ALREADY IDENTIFIED:
+{format_covered_risks(previous_risks)}"""
+
+def build_risk_batch_prompt(previous_risks, first_number, count):
+    """Build prompt for streaming several risks in order of importance"""
+    last_number = first_number + count - 1
+    previous_summary = format_covered_risks(previous_risks)
+
+    return f"""Generate risks #{first_number} to #{last_number} for this specific event, in DESCENDING ORDER OF IMPORTANCE.
+
+Each of these {count} risks must:
+1. Be DIFFERENT from all previous risks and from each other (avoid similar themes/categories if possible)
+2. Be HIGHLY SPECIFIC to this event type and circumstances
+3. Represent a REALISTIC and SIGNIFICANT threat
+4. Have appropriate impact/likelihood scores for its importance level
+
+Return each risk as a separate valid JSON object, one after another, most critical first. No additional text.
+
+PREVIOUS RISKS ALREADY IDENTIFIED:
+{previous_summary or 'None yet - start with the MOST CRITICAL risk.'}"""
 
 def build_additional_risk_prompt(existing_risks, risk_number):
     """Build prompt for generating additional risks in order of importance"""
@@ -1049,11 +2528,9 @@ def build_additional_risk_prompt(existing_risks, risk_number):
     else:
         importance_level = f"{risk_number}th most critical (lower priority but still relevant)"
 
+    # The IMPORTANCE RANKING CRITERIA live in the conversation's system prompt, which is part of the cached prefix
     return f"""Generate the {importance_level} risk (#{risk_number}) for this event, continuing the importance-based ranking.
 
-EXISTING RISKS ALREADY IDENTIFIED (in order of importance):
-{chr(10).join([f"#{i+1}: {risk['risk'][:80]}... (Category: {risk['category']}, Impact: {risk['impact']}, Likelihood: {risk['likelihood']})" for i, risk in enumerate(existing_risks)])}
-
 For risk #{risk_number}, identify the NEXT MOST IMPORTANT risk that:
 1. Continues the DESCENDING ORDER OF IMPORTANCE from the existing risks
 2. Is COMPLETELY DIFFERENT from all existing risks (avoid similar themes/categories)
@@ -1061,18 +2538,14 @@ For risk #{risk_number}, identify the NEXT MOST IMPORTANT risk that:
 4. Is still RELEVANT and REALISTIC for this event type and circumstances
 5. Has appropriate impact/likelihood scores reflecting its importance level
 6. Uses a different category if possible to ensure comprehensive coverage
-
-IMPORTANCE RANKING CRITERIA (same as initial risks):
-- Potential for serious injury/death
-- Likelihood of occurrence for THIS event type
-- Scale of potential disruption
-- Legal/regulatory consequences
-- Financial impact
-- Reputational damage
+7. Ranks by the same IMPORTANCE RANKING CRITERIA as the initial risks
 
 This should be the NEXT most important risk after the existing {len(existing_risks)} risks, not just any secondary risk.
 
-Return only valid JSON format."""
+Return only valid JSON format.
+
+EXISTING RISKS ALREADY IDENTIFIED (in order of importance):
+{format_covered_risks(existing_risks)}"""
 
 def build_single_risk_prompt(event_data, risk_number, total_risks):
     """Build prompt for single risk generation (legacy)"""
@@ -1099,23 +2572,12 @@ Focus on risk #{risk_number} being a {'high priority' if risk_number <= 2 else '
 
 Return only the JSON object, no additional text or formatting."""
 
-def build_justification_prompt(field_name, field_value, context):
-    """Build prompt for justification generation"""
-    # Special handling for contextual summary
-    if field_name == 'Contextual Summary':
-        return f"""Explain why this specific contextual summary was generated for this event:
-
-Event: {context.get('eventTitle', 'N/A')}
-Date: {context.get('eventDate', 'N/A')}
-Location: {context.get('location', 'N/A')}
-Type: {context.get('eventType', 'N/A')}
-Venue: {context.get('venueType', 'N/A')}
-Attendance: {context.get('attendance', 'N/A')}
-
-Provide a brief explanation (1-2 sentences) of why these specific themes were chosen for THIS event.
+def build_justification_system_prompt():
+    """Build the static justification instructions shared by every justification call"""
+    return f"""{JUSTIFICATION_SYSTEM_PROMPT}
 
-Format as:
-REASONING: [Brief explanation of why these themes were chosen]
+Unless asked for JSON, format every answer as:
+REASONING: [Concise explanation of why the value or summary is correct]
 SOURCES:
 • [Specific document/standard name] [public]
 • [Specific document/standard name] [public]
@@ -1129,42 +2591,97 @@ Use 3-5 bullet points with SPECIFIC, REAL documents/standards such as:
 - BS 31100:2011 Code of Practice for Risk Management
 - Purple Guide to Health, Safety and Welfare at Music and Other Events
 - Event Safety Alliance Event Safety Guide
+- NFPA 101:2021 Life Safety Code
+- ISO 45001:2018 Occupational Health and Safety Management Systems
 Mark each as [public] or [proprietary]."""
 
+def build_justification_event_context(context):
+    """Build the event block that opens every justification prompt for the same event"""
+    return f"""Event: {context.get('eventTitle', 'N/A')}
+Date: {context.get('eventDate', 'N/A')}
+Location: {context.get('location', 'N/A')}
+Event Type: {context.get('eventType', 'N/A')}
+Venue Type: {context.get('venueType', 'N/A')}
+Attendance: {context.get('attendance', 'N/A')}"""
+
+def build_justification_prompt(field_name, field_value, context):
+    """Build prompt for justification generation"""
+    # Special handling for contextual summary
+    if field_name == 'Contextual Summary':
+        return f"""{build_justification_event_context(context)}
+
+Explain why this specific contextual summary was generated for this event.
+
+Provide a brief explanation (1-2 sentences) of why these specific themes were chosen for THIS event."""
+
     # For risk assessment fields
-    return f"""Provide a specific justification for why this exact value was chosen:
+    return f"""{build_justification_event_context(context)}
+Risk: {context.get('riskDescription', 'N/A')}
+
+Provide a specific justification for why this exact value was chosen:
 
 Field: {field_name}
 Specific Value: "{field_value}"
-Event: {context.get('eventTitle', 'N/A')}
-Event Type: {context.get('eventType', 'N/A')}
-Venue Type: {context.get('venueType', 'N/A')}
-Attendance: {context.get('attendance', 'N/A')}
-Location: {context.get('location', 'N/A')}
-Risk: {context.get('riskDescription', 'N/A')}
 
 Explain why THIS SPECIFIC VALUE ("{field_value}") is correct for this risk and event. Be concise.
 
-Give a brief explanation (1-2 sentences) that directly addresses this exact value.
+Give a brief explanation (1-2 sentences) that directly addresses this exact value."""
 
-Format as:
-REASONING: [Concise explanation for why "{field_value}" is correct]
-SOURCES:
-• [Specific document/standard name] [public]
-• [Specific document/standard name] [public]
-• [Specific document/standard name] [proprietary]
-• [Specific document/standard name] [public]
+def build_justification_messages(field_name, field_value, context):
+    """Build the chat messages for a single field justification"""
+    return [
+        {"role": "system", "content": build_justification_system_prompt()},
+        {"role": "user", "content": build_justification_prompt(field_name, field_value, context)}
+    ]
 
-Use 3-5 bullet points with SPECIFIC, REAL documents/standards such as:
-- ISO 31000:2018 Risk Management Guidelines
-- NFPA 1600:2019 Standard on Continuity, Emergency, and Risk Management
-- HSE HSG65 Managing for Health and Safety
-- BS 31100:2011 Code of Practice for Risk Management
-- Purple Guide to Health, Safety and Welfare at Music and Other Events
-- Event Safety Alliance Event Safety Guide
-- NFPA 101:2021 Life Safety Code
-- ISO 45001:2018 Occupational Health and Safety Management Systems
-Mark each as [public] or [proprietary]."""
+def build_batch_justification_prompt(items, context):
+    """Build prompt justifying several fields of the same risk in one response"""
+    fields = chr(10).join([f'{i + 1}. {item["fieldName"]}: "{item["fieldValue"]}"' for i, item in enumerate(items)])
+
+    return f"""{build_justification_event_context(context)}
+Risk: {context.get('riskDescription', 'N/A')}
+
+Provide a specific justification for why each of these exact values was chosen. For EACH field, explain why THIS SPECIFIC VALUE is correct for this risk and event in 1-2 concise sentences, with 3-5 sources as described above.
+
+Return ONLY valid JSON in this format, listing the sources as a JSON array of strings instead of bullet points:
+{{"justifications": [{{"field": 1, "reasoning": "...", "sources": ["... [public]", "... [proprietary]"]}}]}}
+Include one entry per field, using the field numbers below.
+
+FIELDS TO JUSTIFY:
+{fields}"""
+
+def parse_batch_justification_response(response, count):
+    """Parse a batch justification response into per-field {reasoning, sources} (None where unusable)"""
+    justifications = [None] * count
+
+    try:
+        parsed, _ = parse_json_response(response)
+    except StructuredOutputError as e:
+        logger.error(f"Failed to parse batch justification JSON: {e}")
+        return justifications
+
+    entries = parsed.get('justifications', []) if isinstance(parsed, dict) else parsed
+    if not isinstance(entries, list):
+        return justifications
+
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get('reasoning'):
+            continue
+
+        try:
+            index = int(entry.get('field', position + 1)) - 1
+        except (ValueError, TypeError):
+            index = position
+        if not 0 <= index < count:
+            continue
+
+        sources = [str(source).replace('•', '').strip() for source in entry.get('sources') or [] if str(source).strip()]
+        justifications[index] = {
+            'reasoning': str(entry['reasoning']).strip(),
+            'sources': sources or list(DEFAULT_JUSTIFICATION_SOURCES)
+        }
+
+    return justifications
 
 def validate_and_format_risks(risks):
     """Validate and format risks from AI response"""
@@ -1210,6 +2727,14 @@ def validate_score(score):
     except (ValueError, TypeError):
         return 3
 
+# Default sources if parsing fails
+DEFAULT_JUSTIFICATION_SOURCES = [
+    'ISO 31000:2018 Risk Management Guidelines [public]',
+    'NFPA 1600:2019 Standard on Continuity, Emergency, and Risk Management [public]',
+    'HSE HSG65 Managing for Health and Safety [public]',
+    'BS 31100:2011 Code of Practice for Risk Management [public]'
+]
+
 def parse_justification_response(response):
     """Parse justification response"""
     import re
@@ -1217,15 +2742,7 @@ def parse_justification_response(response):
     reasoning_match = re.search(r'REASONING:\s*(.*?)(?=SOURCES:|$)', response, re.DOTALL)
     sources_match = re.search(r'SOURCES:\s*(.*?)$', response, re.DOTALL)
 
-    # Default sources if parsing fails
-    default_sources = [
-        'ISO 31000:2018 Risk Management Guidelines [public]',
-        'NFPA 1600:2019 Standard on Continuity, Emergency, and Risk Management [public]',
-        'HSE HSG65 Managing for Health and Safety [public]',
-        'BS 31100:2011 Code of Practice for Risk Management [public]'
-    ]
-
-    sources = default_sources
+    sources = list(DEFAULT_JUSTIFICATION_SOURCES)
     if sources_match:
         sources_text = sources_match.group(1).strip()
         # Extract bullet points (• or -)
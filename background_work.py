@@ -0,0 +1,78 @@
+"""
+Cancellable background LLM work for the AIREKON backend
+Speculative calls (justification pre-generation, Rekon details) are tagged
+with a work group by the client. When the user moves on, the client cancels
+its old group and every call still queued or in flight for it is dropped,
+as is any call made for that group afterwards.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+import concurrent.futures
+from resilience import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+
+class WorkCancelled(UpstreamUnavailable):
+    """Background model work dropped because its work group was cancelled"""
+
+    status_code = 409
+
+
+class WorkGroups:
+    """Tracks the pending model calls of each work group so a group can be cancelled at once"""
+
+    def __init__(self, remember=1000):
+        self.groups = {}
+        self.lock = threading.Lock()
+        self.cancelled = 0
+        # Recently cancelled groups, so a call that starts after the cancel is dropped too
+        self.remember = remember
+        self.cancelled_groups = OrderedDict()
+
+    def run(self, group, submit, coro):
+        """Run coro via submit() (e.g. LLMRuntime.submit) and block for it, cancellable through group"""
+        with self.lock:
+            if group in self.cancelled_groups:
+                coro.close()
+                raise WorkCancelled('Background work was cancelled')
+            future = submit(coro)
+            self.groups.setdefault(group, set()).add(future)
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError as e:
+            raise WorkCancelled('Background work was cancelled') from e
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            with self.lock:
+                pending = self.groups.get(group)
+                if pending is not None:
+                    pending.discard(future)
+                    if not pending:
+                        del self.groups[group]
+
+    def cancel(self, group):
+        """Cancel every pending call of group; returns how many were cancelled"""
+        with self.lock:
+            pending = list(self.groups.get(group, ()))
+            self.cancelled_groups[group] = True
+            while len(self.cancelled_groups) > self.remember:
+                self.cancelled_groups.popitem(last=False)
+        count = sum(1 for future in pending if future.cancel())
+        with self.lock:
+            self.cancelled += count
+        if count:
+            logger.info(f"Cancelled {count} background model calls for work group {group}")
+        return count
+
+    def stats(self):
+        with self.lock:
+            return {
+                'groups': len(self.groups),
+                'pending': sum(len(pending) for pending in self.groups.values()),
+                'cancelled': self.cancelled
+            }
@@ -0,0 +1,86 @@
+"""
+Bounded context windows for AIREKON risk conversations
+Keeps the per-call prompt size flat as a conversation grows: the system
+prompt and event context are always sent, older turns are collapsed into the
+compact list of covered risks that each next-risk prompt already carries,
+and only the most recent turns are replayed verbatim within a token budget
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding('o200k_base')
+except Exception:
+    _encoding = None
+
+# Rough per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(text):
+    """Token count of a string (tiktoken when installed, otherwise ~4 chars per token)"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def count_message_tokens(messages):
+    """Approximate prompt tokens for a list of chat messages"""
+    return sum(count_tokens(message['content']) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def compact_turn_prompt(message):
+    """Shorten a replayed user prompt to its instruction line
+
+    Old prompts restate every risk covered at the time; the new prompt already
+    carries the up-to-date list, so replaying them in full would grow the
+    prompt quadratically.
+    """
+    if message['role'] != 'user':
+        return message
+    first_line = message['content'].strip().split('\n', 1)[0]
+    return {"role": "user", "content": first_line}
+
+
+class ConversationContextManager:
+    """Builds a token-capped message window from a conversation's full message log"""
+
+    def __init__(self, max_prompt_tokens=3000, recent_turns=2, pinned_messages=2):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.recent_turns = recent_turns
+        self.pinned_messages = pinned_messages
+
+    def build(self, messages):
+        """Window for a log ending in the new user prompt; returns (messages, prompt_tokens)
+
+        The pinned head (system prompt + event context) and the new prompt are
+        always kept. Earlier user/assistant turns are added newest first while
+        they fit the budget, up to recent_turns of them.
+        """
+        head = list(messages[:self.pinned_messages])
+        prompt = messages[-1]
+        history = messages[self.pinned_messages:-1]
+
+        used = count_message_tokens(head + [prompt])
+        kept = []
+        turns = 0
+
+        # Walk back over complete (user, assistant) turns
+        index = len(history)
+        while index >= 2 and turns < self.recent_turns:
+            turn = [compact_turn_prompt(history[index - 2]), history[index - 1]]
+            turn_tokens = count_message_tokens(turn)
+            if used + turn_tokens > self.max_prompt_tokens:
+                break
+            kept = turn + kept
+            used += turn_tokens
+            turns += 1
+            index -= 2
+
+        if used > self.max_prompt_tokens:
+            logger.warning(f"Conversation prompt is {used} tokens, above the {self.max_prompt_tokens} token budget")
+
+        return head + kept + [prompt], used
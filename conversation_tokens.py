@@ -0,0 +1,82 @@
+"""
+Stateless tokens for AIREKON risk conversations
+Instead of keeping a conversation on the server, its compact state (the event
+data and the risks generated so far) is compressed, signed and handed to the
+client, which sends it back with the next call. Any worker on any node can
+continue the conversation from it, and nothing is stored per conversation.
+"""
+
+import hmac
+import json
+import time
+import zlib
+import base64
+import hashlib
+
+VERSION = 'v1'
+
+
+class InvalidConversationToken(Exception):
+    """The token is malformed, was not signed with our secret, or has expired"""
+
+    status_code = 400
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class ConversationTokens:
+    """Encodes conversation state as 'v1.<zlib JSON>.<HMAC-SHA256>' tokens and checks them on the way back
+
+    A token expires idle_ttl seconds after it was issued, or max_age seconds
+    after its conversation started (0 turns either off). max_bytes bounds the
+    decompressed state.
+    """
+
+    def __init__(self, secret, idle_ttl=0, max_age=0, max_bytes=256 * 1024):
+        self.secret = secret.encode('utf-8') if isinstance(secret, str) else secret
+        self.idle_ttl = idle_ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+
+    def _sign(self, payload):
+        return _b64encode(hmac.new(self.secret, f"{VERSION}.{payload}".encode('ascii'), hashlib.sha256).digest())
+
+    def encode(self, state, started_at=None):
+        """Token for state (a JSON-serialisable dict); started_at carries over from the conversation's first token"""
+        now = time.time()
+        envelope = {'state': state, 'started_at': started_at or now, 'issued_at': now}
+        payload = _b64encode(zlib.compress(json.dumps(envelope, separators=(',', ':')).encode('utf-8'), 9))
+        return f"{VERSION}.{payload}.{self._sign(payload)}"
+
+    def decode(self, token):
+        """(state, started_at) from a token; raises InvalidConversationToken if it can't be trusted"""
+        try:
+            version, payload, signature = token.split('.')
+        except (AttributeError, ValueError):
+            raise InvalidConversationToken('Malformed conversation token')
+        if not (payload.isascii() and signature.isascii()):
+            raise InvalidConversationToken('Malformed conversation token')
+        if version != VERSION or not hmac.compare_digest(signature, self._sign(payload)):
+            raise InvalidConversationToken('Invalid conversation token')
+
+        try:
+            decompressor = zlib.decompressobj()
+            document = decompressor.decompress(_b64decode(payload), self.max_bytes)
+            if decompressor.unconsumed_tail:
+                raise InvalidConversationToken('Conversation token is too large')
+            envelope = json.loads(document)
+        except (ValueError, zlib.error):
+            raise InvalidConversationToken('Malformed conversation token')
+
+        now = time.time()
+        if self.idle_ttl and envelope['issued_at'] + self.idle_ttl <= now:
+            raise InvalidConversationToken('Conversation token has expired')
+        if self.max_age and envelope['started_at'] + self.max_age <= now:
+            raise InvalidConversationToken('Conversation token has expired')
+        return envelope['state'], envelope['started_at']
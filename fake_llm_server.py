@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Fake chat-completions server for load testing the AIREKON backend
+Speaks enough of the OpenAI chat-completions protocol (JSON and SSE streaming)
+for the backend to run unchanged with LLM_PROVIDER=fake. Latency is drawn from
+a configurable distribution, errors can be injected, replies are canned but
+valid for our risk/details schemas, and usage reports simulated prefix-cache hits.
+
+    python fake_llm_server.py --port 8001 --latency lognormal:0.8:0.5 --error-rate 0.02
+    LLM_PROVIDER=fake LLM_BASE_URL=http://127.0.0.1:8001/v1 python app.py
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from flask import Flask, Response, request, jsonify
+from conversation_context import count_tokens, count_message_tokens
+from structured_output import RISK_SCHEMA, RISK_LIST_SCHEMA, DETAILS_SCHEMA, details_sections_schema, schema_errors
+
+app = Flask(__name__)
+
+CANNED_RISKS = [
+    {"risk": "Crowd crush at entry gates during peak arrival as queues back up onto the approach roads", "category": "Crowd Safety", "impact": 5, "likelihood": 3, "mitigation": "Stagger entry times, add gate lanes and deploy trained stewards with live queue monitoring"},
+    {"risk": "Heat exhaustion among attendees during afternoon sets with limited shade and water points", "category": "Medical", "impact": 4, "likelihood": 4, "mitigation": "Provide free water refill stations, shaded rest areas and roaming first aid teams"},
+    {"risk": "Hostile vehicle approach along the main pedestrian access route", "category": "Security", "impact": 5, "likelihood": 2, "mitigation": "Install certified vehicle barriers and control all vehicle movements near entrances"},
+    {"risk": "Main stage power failure interrupting performances and emergency announcements", "category": "Operational", "impact": 3, "likelihood": 3, "mitigation": "Provide redundant generators and a battery-backed PA for safety messaging"},
+    {"risk": "Severe weather forcing partial evacuation of open-air areas", "category": "Environmental", "impact": 4, "likelihood": 2, "mitigation": "Monitor forecasts, pre-agree weather triggers and rehearse the evacuation plan"},
+    {"risk": "Ambulance access blocked by unplanned parking on the service road", "category": "Logistics", "impact": 4, "likelihood": 3, "mitigation": "Keep an enforced emergency lane with marshals and towing on standby"},
+    {"risk": "Drug-related medical incidents in late evening crowds", "category": "Medical", "impact": 4, "likelihood": 3, "mitigation": "Staff a medical tent with drug awareness teams and clear welfare signage"},
+    {"risk": "Unattended bags causing security alerts and area closures", "category": "Security", "impact": 3, "likelihood": 3, "mitigation": "Run a bag policy, HOT protocol training and visible security patrols"},
+    {"risk": "Lost or separated children in dense crowd areas", "category": "Crowd Safety", "impact": 3, "likelihood": 3, "mitigation": "Set up a staffed meeting point, wristband contact details and radio protocol"},
+    {"risk": "Food vendor fire from gas cylinders in the catering village", "category": "Operational", "impact": 4, "likelihood": 2, "mitigation": "Inspect gas installations, enforce separation distances and place extinguishers"},
+    {"risk": "Public transport disruption stranding attendees after the event", "category": "Logistics", "impact": 3, "likelihood": 3, "mitigation": "Coordinate with operators, add shuttle buses and publish travel advice"},
+    {"risk": "Noise complaints from neighbouring residents leading to licence breaches", "category": "Environmental", "impact": 2, "likelihood": 4, "mitigation": "Monitor sound levels at the boundary and agree curfew times with the council"}
+]
+
+CANNED_DETAILS = [
+    "Attendance and site layout require coordinated multi-agency planning.",
+    "High public profile increases stakeholder and media scrutiny.",
+    "Licensing conditions demand documented controls and regular review."
+]
+
+CANNED_PARAGRAPH = (
+    "This event brings a large audience to a busy venue, which shapes every planning decision. "
+    "Crowd movement, welfare and security need coordinated management across the site. "
+    "The assessment below sets out the main risks and the controls proportionate to them."
+)
+
+CANNED_SOURCES = [
+    "ISO 31000:2018 Risk Management Guidelines [public]",
+    "Purple Guide to Health, Safety and Welfare at Music and Other Events [public]",
+    "HSE HSG65 Managing for Health and Safety [public]"
+]
+
+
+def canned_risk(risk_id):
+    """A schema-valid risk object for the given id"""
+    return dict({"id": risk_id}, **CANNED_RISKS[(risk_id - 1) % len(CANNED_RISKS)])
+
+
+def check_canned_outputs():
+    """Fail fast if the canned replies no longer match the schemas the backend requests"""
+    errors = schema_errors({"risks": [canned_risk(i) for i in range(1, len(CANNED_RISKS) + 1)]}, RISK_LIST_SCHEMA)
+    errors += schema_errors(canned_risk(1), RISK_SCHEMA)
+    errors += schema_errors({"details": CANNED_DETAILS}, DETAILS_SCHEMA)
+    errors += schema_errors({"risk": CANNED_DETAILS}, details_sections_schema(['risk']))
+    if errors:
+        raise ValueError(f"Canned outputs do not match the risk schemas: {errors}")
+
+
+class FakeConfig:
+    """Latency, error-injection and cache-simulation settings (env defaults, CLI overrides)"""
+
+    def __init__(self):
+        self.latency = os.getenv('FAKE_LLM_LATENCY', 'lognormal:0.8:0.5')
+        self.token_delay = float(os.getenv('FAKE_LLM_TOKEN_DELAY', 0.01))
+        self.error_rate = float(os.getenv('FAKE_LLM_ERROR_RATE', 0))
+        self.rate_limit_rate = float(os.getenv('FAKE_LLM_RATE_LIMIT_RATE', 0))
+        self.retry_after = float(os.getenv('FAKE_LLM_RETRY_AFTER', 1))
+        self.hang_rate = float(os.getenv('FAKE_LLM_HANG_RATE', 0))
+        self.hang_seconds = float(os.getenv('FAKE_LLM_HANG_SECONDS', 120))
+        self.malformed_rate = float(os.getenv('FAKE_LLM_MALFORMED_RATE', 0))
+        self.prefix_cache_entries = int(os.getenv('FAKE_LLM_PREFIX_CACHE_ENTRIES', 10000))
+        self.sample_latency = parse_latency(self.latency)
+
+
+def parse_latency(spec):
+    """Build a sampler from 'fixed:S', 'uniform:LO:HI', 'normal:MEAN:SD' or 'lognormal:MEDIAN:SIGMA'"""
+    kind, *params = spec.split(':')
+    values = [float(value) for value in params]
+
+    if kind == 'fixed' and len(values) == 1:
+        return lambda: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'normal' and len(values) == 2:
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == 'lognormal' and len(values) == 2:
+        import math
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"Unsupported latency spec '{spec}'")
+
+
+class PrefixCache:
+    """Simulates provider prompt caching: repeated message prefixes of 1024+ tokens count as cached"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.seen = OrderedDict()
+        self.lock = threading.Lock()
+
+    def cached_tokens(self, messages):
+        cached = 0
+        digest = hashlib.sha256()
+        prefix_tokens = 0
+        with self.lock:
+            for message in messages:
+                digest.update(json.dumps(message, sort_keys=True).encode('utf-8'))
+                prefix_tokens += count_message_tokens([message])
+                key = digest.hexdigest()
+                if key in self.seen:
+                    self.seen.move_to_end(key)
+                    cached = prefix_tokens
+                else:
+                    self.seen[key] = True
+            while len(self.seen) > self.max_entries:
+                self.seen.popitem(last=False)
+
+        # Providers only cache prompts of 1024+ tokens, in 128-token steps
+        return (cached // 128) * 128 if cached >= 1024 else 0
+
+
+config = FakeConfig()
+prefix_cache = PrefixCache(config.prefix_cache_entries)
+stats_lock = threading.Lock()
+stats = {'requests': 0, 'streams': 0, 'errors': 0, 'rate_limited': 0, 'hangs': 0, 'malformed': 0}
+
+
+def count(name):
+    with stats_lock:
+        stats[name] += 1
+
+
+def canned_reply(body):
+    """Pick a reply that fits what the backend asked for"""
+    messages = body.get('messages', [])
+    prompt = messages[-1].get('content', '') if messages else ''
+    everything = '\n'.join(str(message.get('content', '')) for message in messages)
+    schema = ((body.get('response_format') or {}).get('json_schema') or {}).get('name')
+    number = re.search(r'risk \(#(\d+)\)', prompt) or re.search(r'#(\d+)', prompt)
+    risk_id = int(number.group(1)) if number else 1
+
+    batch = re.search(r'Generate risks #(\d+) to #(\d+)', prompt)
+    if batch:
+        first, last = int(batch.group(1)), int(batch.group(2))
+        return '\n'.join(json.dumps(canned_risk(i)) for i in range(first, last + 1))
+    if 'FIELDS TO JUSTIFY:' in prompt:
+        fields = [line for line in prompt.split('FIELDS TO JUSTIFY:')[1].strip().splitlines() if line.strip()]
+        return json.dumps({"justifications": [
+            {"field": i + 1, "reasoning": "This value reflects the scale and setting of the event.", "sources": CANNED_SOURCES}
+            for i in range(len(fields))
+        ]})
+    if schema == 'risk_assessment' or 'Generate 8 specific risks' in prompt:
+        return json.dumps({"risks": [canned_risk(i) for i in range(1, 9)]})
+    sections = re.search(r'JSON object with the keys (.+?), each an array', prompt)
+    if schema == 'rekon_metrics' or sections:
+        names = re.findall(r'"(\w+)"', sections.group(1)) if sections else ['context', 'risk', 'compliance']
+        return json.dumps({name: CANNED_DETAILS for name in names})
+    if schema == 'details' or 'JSON array of 3 strings' in everything:
+        return json.dumps({"details": CANNED_DETAILS})
+    if schema == 'risk' or 'valid JSON' in prompt or 'JSON object' in prompt:
+        return json.dumps(canned_risk(risk_id))
+    if 'REASONING' in everything:
+        return "REASONING: This value reflects the scale and setting of the event.\nSOURCES:\n" + '\n'.join(f"• {source}" for source in CANNED_SOURCES)
+    return CANNED_PARAGRAPH
+
+
+def malform(content):
+    """Damage JSON the way real models sometimes do (fences, chatter, truncation)"""
+    damage = random.choice(('fence', 'chatter', 'truncate'))
+    if damage == 'fence':
+        return f"```json\n{content}\n```"
+    if damage == 'chatter':
+        return f"Here is the JSON you asked for:\n{content}\nLet me know if you need changes."
+    return content[:max(1, int(len(content) * 0.85))]
+
+
+def error_response(status, message, error_type, headers=None):
+    response = jsonify({"error": {"message": message, "type": error_type, "code": None}})
+    response.status_code = status
+    for name, value in (headers or {}).items():
+        response.headers[name] = value
+    return response
+
+
+@app.route('/v1/models', methods=['GET'])
+def list_models():
+    return jsonify({"object": "list", "data": [{"id": "fake-model", "object": "model", "owned_by": "airekon"}]})
+
+
+@app.route('/stats', methods=['GET'])
+def fake_stats():
+    with stats_lock:
+        return jsonify(dict(stats, latency=config.latency))
+
+
+@app.route('/v1/chat/completions', methods=['POST'])
+def chat_completions():
+    body = request.get_json(force=True)
+    count('requests')
+
+    roll = random.random()
+    if roll < config.rate_limit_rate:
+        count('rate_limited')
+        return error_response(429, "Rate limit reached (injected)", 'rate_limit_exceeded',
+                              {'Retry-After': str(config.retry_after)})
+    roll -= config.rate_limit_rate
+    if roll < config.error_rate:
+        count('errors')
+        time.sleep(config.sample_latency() / 4)
+        return error_response(500, "The server had an error (injected)", 'server_error')
+    roll -= config.error_rate
+    if roll < config.hang_rate:
+        count('hangs')
+        time.sleep(config.hang_seconds)
+        return error_response(504, "Upstream timed out (injected)", 'timeout')
+
+    content = canned_reply(body)
+    if content.lstrip()[:1] in '{[' and random.random() < config.malformed_rate:
+        count('malformed')
+        content = malform(content)
+
+    model = body.get('model', 'fake-model')
+    messages = body.get('messages', [])
+    prompt_tokens = count_message_tokens(messages)
+    completion_tokens = min(count_tokens(content), body.get('max_tokens') or 1 << 30)
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": prefix_cache.cached_tokens(messages)}
+    }
+    completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+
+    if body.get('stream'):
+        count('streams')
+        include_usage = (body.get('stream_options') or {}).get('include_usage')
+        return Response(
+            stream_completion(completion_id, created, model, content, usage if include_usage else None),
+            mimetype='text/event-stream'
+        )
+
+    time.sleep(config.sample_latency())
+    return jsonify({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "logprobs": None,
+            "finish_reason": "stop"
+        }],
+        "usage": usage
+    })
+
+
+def stream_completion(completion_id, created, model, content, usage):
+    """SSE chunks: time to first token from the latency distribution, then a delay per chunk"""
+    def chunk(delta, finish_reason=None, chunk_usage=None, choices=True):
+        payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                   "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}] if choices else []}
+        if chunk_usage is not None:
+            payload["usage"] = chunk_usage
+        return f"data: {json.dumps(payload)}\n\n"
+
+    time.sleep(config.sample_latency())
+    yield chunk({"role": "assistant", "content": ""})
+    for piece in re.findall(r'\S+\s*|\s+', content):
+        time.sleep(config.token_delay)
+        yield chunk({"content": piece})
+    yield chunk({}, finish_reason="stop")
+    if usage is not None:
+        yield chunk(None, chunk_usage=usage, choices=False)
+    yield "data: [DONE]\n\n"
+
+
+check_canned_outputs()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake chat-completions server for AIREKON load tests')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to bind to (default: 127.0.0.1)')
+    parser.add_argument('--port', '-p', type=int, default=8001, help='Port to run on (default: 8001)')
+    parser.add_argument('--latency', default=config.latency,
+                        help="Reply latency: fixed:S, uniform:LO:HI, normal:MEAN:SD or lognormal:MEDIAN:SIGMA")
+    parser.add_argument('--token-delay', type=float, default=config.token_delay, help='Seconds between streamed chunks')
+    parser.add_argument('--error-rate', type=float, default=config.error_rate, help='Share of requests answered with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=config.rate_limit_rate, help='Share answered with 429')
+    parser.add_argument('--retry-after', type=float, default=config.retry_after, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--hang-rate', type=float, default=config.hang_rate, help='Share of requests that hang')
+    parser.add_argument('--hang-seconds', type=float, default=config.hang_seconds, help='How long a hung request hangs')
+    parser.add_argument('--malformed-rate', type=float, default=config.malformed_rate,
+                        help='Share of JSON replies that come back fenced, chatty or truncated')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    config.latency = args.latency
+    config.sample_latency = parse_latency(args.latency)
+    config.token_delay = args.token_delay
+    config.error_rate = args.error_rate
+    config.rate_limit_rate = args.rate_limit_rate
+    config.retry_after = args.retry_after
+    config.hang_rate = args.hang_rate
+    config.hang_seconds = args.hang_seconds
+    config.malformed_rate = args.malformed_rate
+
+    print(f"Fake LLM server on http://{args.host}:{args.port}/v1 (latency {config.latency})")
+    app.run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,132 @@
+"""
+Hedged upstream calls for short AIREKON completions
+If the first request hasn't answered by a percentile of the route's recent
+latency, an identical second request is sent; whichever finishes first wins
+and the other is cancelled. A cap on the hedge rate bounds the extra spend.
+"""
+
+import math
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyWindow:
+    """The most recent successful call latencies of one route"""
+
+    def __init__(self, size=200):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, percentile):
+        ordered = sorted(self.samples)
+        index = max(0, math.ceil(percentile / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+
+class Hedger:
+    """Runs a call and, if it is slow for its route, a hedge alongside it"""
+
+    def __init__(self, percentile=95, min_samples=20, window=200, max_hedge_rate=0.1, min_delay=0.05):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.max_hedge_rate = max_hedge_rate
+        self.min_delay = min_delay
+        self.windows = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def _counters(self, route):
+        return self.counters.setdefault(route, {'calls': 0, 'hedged': 0, 'hedge_wins': 0})
+
+    def delay(self, route):
+        """Seconds to give the first request before hedging; None while the route has too little history"""
+        with self.lock:
+            window = self.windows.get(route)
+            if window is None or len(window.samples) < self.min_samples:
+                return None
+            return max(self.min_delay, window.percentile(self.percentile))
+
+    def _observe(self, route, seconds):
+        with self.lock:
+            self.windows.setdefault(route, LatencyWindow(self.window)).add(seconds)
+
+    def _may_hedge(self, route):
+        """Whether one more hedge stays within max_hedge_rate (and count it if so)"""
+        with self.lock:
+            counters = self._counters(route)
+            if counters['hedged'] + 1 > self.max_hedge_rate * counters['calls']:
+                return False
+            counters['hedged'] += 1
+            return True
+
+    async def run(self, route, factory):
+        """Await factory(), hedging with a second factory() call if the first is slow"""
+        delay = self.delay(route)
+        with self.lock:
+            self._counters(route)['calls'] += 1
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(factory())
+        hedge = None
+        try:
+            if delay is not None:
+                await asyncio.wait({primary}, timeout=delay)
+
+            if delay is None or primary.done() or not self._may_hedge(route):
+                result = await primary
+                self._observe(route, time.monotonic() - started)
+                return result
+
+            hedge_started = time.monotonic()
+            hedge = asyncio.ensure_future(factory())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    if task is hedge:
+                        with self.lock:
+                            self._counters(route)['hedge_wins'] += 1
+                        self._observe(route, time.monotonic() - hedge_started)
+                    else:
+                        self._observe(route, time.monotonic() - started)
+                    return task.result()
+
+            # Both failed - report the first request's error
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self):
+        """Per-route call, hedge and win counts with the current hedge delay"""
+        with self.lock:
+            routes = {route: dict(counters) for route, counters in self.counters.items()}
+        for route, counters in routes.items():
+            calls, hedged = counters['calls'], counters['hedged']
+            counters['hedge_rate'] = round(hedged / calls, 4) if calls else 0.0
+            counters['win_rate'] = round(counters['hedge_wins'] / hedged, 4) if hedged else 0.0
+            delay = self.delay(route)
+            counters['hedge_delay_seconds'] = round(delay, 3) if delay is not None else None
+
+        calls = sum(counters['calls'] for counters in routes.values())
+        hedged = sum(counters['hedged'] for counters in routes.values())
+        wins = sum(counters['hedge_wins'] for counters in routes.values())
+        return {
+            'routes': routes,
+            'calls': calls,
+            'hedged': hedged,
+            'hedge_wins': wins,
+            'hedge_rate': round(hedged / calls, 4) if calls else 0.0,
+            'win_rate': round(wins / hedged, 4) if hedged else 0.0
+        }
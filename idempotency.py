@@ -0,0 +1,110 @@
+"""
+Idempotency-Key support for AIREKON mutating endpoints
+Remembers the response to each keyed request so a client retry gets the
+original result back instead of re-running the model or re-mutating state
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+PENDING = 'pending'
+COMPLETED = 'completed'
+
+
+class IdempotencyConflict(Exception):
+    """The key was reused for a different request, or the original is still running"""
+
+    def __init__(self, message, status_code=409):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class IdempotencyStore:
+    """Thread-safe in-process record of keyed requests and their stored responses"""
+
+    def __init__(self, ttl_seconds=86400, max_entries=10000, wait_seconds=120):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.wait_seconds = wait_seconds
+        self.records = OrderedDict()
+        self.lock = threading.Lock()
+        self.replays = 0
+
+    def _prune(self, now):
+        """Drop expired records (oldest first) and anything past max_entries"""
+        while self.records:
+            record = next(iter(self.records.values()))
+            expired = record['expires_at'] <= now
+            if not expired and len(self.records) <= self.max_entries:
+                break
+            if not expired and record['state'] == PENDING:
+                # Never drop a request that is still running just to make room
+                break
+            self.records.popitem(last=False)
+            record['done'].set()
+
+    def begin(self, key, fingerprint):
+        """Claim a key for a new request
+
+        Returns None if the caller should run the request, or the stored
+        response (status, headers, body) if it has already completed.
+        Waits for a still-running original before deciding.
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            now = time.time()
+            with self.lock:
+                self._prune(now)
+                record = self.records.get(key)
+
+                if record is None:
+                    self.records[key] = {
+                        'state': PENDING,
+                        'fingerprint': fingerprint,
+                        'done': threading.Event(),
+                        'response': None,
+                        'expires_at': now + self.ttl_seconds
+                    }
+                    return None
+
+                if record['fingerprint'] != fingerprint:
+                    raise IdempotencyConflict("Idempotency-Key was already used for a different request", 422)
+
+                if record['state'] == COMPLETED:
+                    self.replays += 1
+                    return record['response']
+
+                done = record['done']
+
+            # The original request is still running - wait for it, then look again
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not done.wait(remaining):
+                raise IdempotencyConflict("A request with this Idempotency-Key is still in progress")
+
+    def complete(self, key, status, headers, body):
+        """Store the response for a finished request and wake any waiting retries"""
+        with self.lock:
+            record = self.records.get(key)
+            if record is None:
+                return
+            record['state'] = COMPLETED
+            record['response'] = (status, headers, body)
+            record['expires_at'] = time.time() + self.ttl_seconds
+            self.records.move_to_end(key)
+            record['done'].set()
+
+    def release(self, key):
+        """Forget a request that failed so a retry can run it again"""
+        with self.lock:
+            record = self.records.pop(key, None)
+        if record is not None:
+            record['done'].set()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.records),
+                'pending': sum(1 for record in self.records.values() if record['state'] == PENDING),
+                'replays': self.replays
+            }
@@ -0,0 +1,356 @@
+"""
+Asynchronous generation jobs for the AIREKON backend
+A long generation (a full risk register, a batch of additional risks) is
+submitted as a job and answered with a job id straight away. A bounded pool
+runs the jobs while clients poll, long-poll or subscribe for the result. Job
+state lives in memory, or in SQLite so every worker on the host can see it.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+import concurrent.futures
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+FIELDS = ('id', 'route', 'status', 'owner', 'created_at', 'started_at', 'finished_at',
+          'status_code', 'result', 'error', 'cancel_requested')
+
+
+class JobQueueFull(Exception):
+    """No room for another job; the client should retry later"""
+
+    status_code = 503
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MemoryJobStore:
+    """Job records held by this process only"""
+
+    shared = False
+
+    def __init__(self):
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def save(self, job):
+        with self.lock:
+            self.jobs[job['id']] = dict(job)
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def request_cancel(self, job_id):
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id]['cancel_requested'] = True
+
+    def cancel_requested(self, job_ids):
+        with self.lock:
+            return [job_id for job_id in job_ids if self.jobs.get(job_id, {}).get('cancel_requested')]
+
+    def prune(self, finished_before):
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items()
+                       if job['status'] in FINISHED and job['finished_at'] < finished_before]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+    def counts(self):
+        with self.lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return counts
+
+
+class SQLiteJobStore:
+    """Job records shared by every worker on the host through a SQLite (WAL) table
+
+    Jobs left queued or running by a worker that has since exited are reported as failed.
+    """
+
+    shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                route TEXT NOT NULL,
+                status TEXT NOT NULL,
+                owner INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                status_code INTEGER,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+    def _connection(self):
+        """One connection per thread (and per process after a fork)"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    def save(self, job):
+        row = dict(job)
+        row['result'] = json.dumps(row['result']) if row['result'] is not None else None
+        row['cancel_requested'] = int(bool(row['cancel_requested']))
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO jobs ({', '.join(FIELDS)}) VALUES ({', '.join('?' for _ in FIELDS)})",
+            [row[field] for field in FIELDS]
+        )
+
+    def get(self, job_id):
+        row = self._connection().execute(
+            f"SELECT {', '.join(FIELDS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        job = dict(zip(FIELDS, row))
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        if job['status'] not in FINISHED and not _process_alive(job['owner']):
+            job.update(status=FAILED, finished_at=time.time(), error='Job was interrupted (worker exited)')
+            self.save(job)
+        return job
+
+    def request_cancel(self, job_id):
+        self._connection().execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+
+    def cancel_requested(self, job_ids):
+        if not job_ids:
+            return []
+        rows = self._connection().execute(
+            f"SELECT id FROM jobs WHERE cancel_requested = 1 AND id IN ({', '.join('?' for _ in job_ids)})",
+            list(job_ids)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def prune(self, finished_before):
+        self._connection().execute(
+            f"DELETE FROM jobs WHERE status IN ({', '.join('?' for _ in FINISHED)}) AND finished_at < ?",
+            list(FINISHED) + [finished_before]
+        )
+
+    def counts(self):
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class JobManager:
+    """Runs submitted jobs on a bounded thread pool and tracks their state
+
+    execute(job_id, route, data, headers) runs one job and returns
+    (status_code, result); on_cancel(job_id) stops a running job's model calls.
+    """
+
+    def __init__(self, execute, store=None, max_workers=4, max_queued=100, ttl_seconds=3600,
+                 on_cancel=None, poll_interval=0.5):
+        self.execute = execute
+        self.store = store or MemoryJobStore()
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self.on_cancel = on_cancel
+        self.poll_interval = poll_interval
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.futures = {}
+        self.stopping = set()
+        self.changed = threading.Condition()
+        self.counters = {'submitted': 0, 'rejected': 0, SUCCEEDED: 0, FAILED: 0, CANCELLED: 0}
+        self._watcher = None
+
+    def _save(self, job):
+        self.store.save(job)
+        with self.changed:
+            self.changed.notify_all()
+
+    def submit(self, route, data, headers=None):
+        """Queue a job and return its record; raises JobQueueFull when the pool's queue is full"""
+        with self.changed:
+            if len(self.futures) >= self.max_workers + self.max_queued:
+                self.counters['rejected'] += 1
+                raise JobQueueFull('Too many jobs queued, retry later')
+
+            job = {field: None for field in FIELDS}
+            job.update(
+                id=str(uuid.uuid4()),
+                route=route,
+                status=QUEUED,
+                owner=os.getpid(),
+                created_at=time.time(),
+                cancel_requested=False
+            )
+            self.store.prune(time.time() - self.ttl_seconds)
+            self.store.save(job)
+            self.futures[job['id']] = self.pool.submit(self._run, job, data, dict(headers or {}))
+            self.counters['submitted'] += 1
+
+        if self.store.shared:
+            self._ensure_watcher()
+        return job
+
+    def _run(self, job, data, headers):
+        job = self.store.get(job['id']) or job
+        if job['status'] in FINISHED or job['cancel_requested']:
+            self._finish(job, CANCELLED, error='Job was cancelled')
+            return
+
+        job.update(status=RUNNING, started_at=time.time())
+        self._save(job)
+        try:
+            status_code, result = self.execute(job['id'], job['route'], data, headers)
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['route']}) failed: {e}")
+            status_code, result = 500, {'error': str(e)}
+
+        cancelled = (self.store.get(job['id']) or job)['cancel_requested']
+        if cancelled:
+            self._finish(job, CANCELLED, status_code, error='Job was cancelled')
+        elif 200 <= status_code < 300:
+            self._finish(job, SUCCEEDED, status_code, result=result)
+        else:
+            self._finish(job, FAILED, status_code, error=(result or {}).get('error') or f"HTTP {status_code}")
+
+    def _finish(self, job, status, status_code=None, result=None, error=None):
+        job.update(status=status, finished_at=time.time(), status_code=status_code, result=result, error=error)
+        self._save(job)
+        with self.changed:
+            self.futures.pop(job['id'], None)
+            self.stopping.discard(job['id'])
+            self.counters[status] += 1
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def wait(self, job_id, timeout):
+        """Block until the job finishes or timeout seconds pass, then return its record"""
+        deadline = time.monotonic() + timeout
+        job = self.store.get(job_id)
+        while job is not None and job['status'] not in FINISHED:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with self.changed:
+                self.changed.wait(min(remaining, self.poll_interval))
+            job = self.store.get(job_id)
+        return job
+
+    def updates(self, job_id, timeout):
+        """Yield the job record each time its status changes, until it finishes or timeout passes"""
+        deadline = time.monotonic() + timeout
+        status = None
+        job = self.store.get(job_id)
+        while job is not None:
+            if job['status'] != status:
+                status = job['status']
+                yield job
+            if status in FINISHED or time.monotonic() >= deadline:
+                return
+            job = self.wait(job_id, min(deadline - time.monotonic(), self.poll_interval))
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns its record (None if unknown)"""
+        job = self.store.get(job_id)
+        if job is None or job['status'] in FINISHED:
+            return job
+
+        self.store.request_cancel(job_id)
+        with self.changed:
+            future = self.futures.get(job_id)
+        if future is not None:
+            self._stop(job_id, future)
+        # Otherwise another worker owns it and picks the request up from the store
+        return self.store.get(job_id)
+
+    def _stop(self, job_id, future):
+        if future.cancel():
+            self._finish(self.store.get(job_id), CANCELLED, error='Job was cancelled')
+            return
+        with self.changed:
+            if job_id in self.stopping:
+                return
+            self.stopping.add(job_id)
+        if self.on_cancel is not None:
+            self.on_cancel(job_id)
+
+    def _ensure_watcher(self):
+        """With a shared store, watch for cancellations requested through other workers"""
+        with self.changed:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._watcher = threading.Thread(target=self._watch_cancellations, name='job-cancel-watcher', daemon=True)
+            self._watcher.start()
+
+    def _watch_cancellations(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self.changed:
+                pending = dict(self.futures)
+            if not pending:
+                continue
+            try:
+                for job_id in self.store.cancel_requested(list(pending)):
+                    self._stop(job_id, pending[job_id])
+            except Exception as e:
+                logger.error(f"Failed to check for cancelled jobs: {e}")
+
+    def stats(self):
+        with self.changed:
+            stats = dict(self.counters)
+            stats['active'] = len(self.futures)
+        stats['stored'] = self.store.counts()
+        return stats
+
+
+def public(job):
+    """A job record as returned by the API"""
+    def timestamp(seconds):
+        return datetime.fromtimestamp(seconds).isoformat() if seconds is not None else None
+
+    return {
+        'job_id': job['id'],
+        'route': job['route'],
+        'status': job['status'],
+        'created_at': timestamp(job['created_at']),
+        'started_at': timestamp(job['started_at']),
+        'finished_at': timestamp(job['finished_at']),
+        'status_code': job['status_code'],
+        'result': job['result'],
+        'error': job['error']
+    }
@@ -0,0 +1,67 @@
+"""
+Per-key locks for AIREKON conversations and sessions
+Each key (a conversation or session id) gets its own lock, created on first
+use and dropped once no thread holds or waits for it. Calls for different
+keys never wait on each other; calls for the same key run one at a time.
+"""
+
+import time
+import threading
+
+
+class KeyedLockManager:
+    """Thread-safe map of per-key locks with contention counters"""
+
+    def __init__(self):
+        self.entries = {}
+        self.mutex = threading.Lock()
+        self.counters = {'acquired': 0, 'contended': 0, 'timeouts': 0}
+        self.wait_seconds = 0.0
+
+    def acquire(self, key, timeout=None):
+        """Take key's lock, waiting at most timeout seconds (None waits as long as it takes); returns whether it was taken"""
+        with self.mutex:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = {'lock': threading.Lock(), 'users': 0}
+            entry['users'] += 1
+
+        acquired = entry['lock'].acquire(blocking=False)
+        if not acquired:
+            started = time.monotonic()
+            acquired = entry['lock'].acquire(timeout=-1 if timeout is None else max(0, timeout))
+            self.observe(time.monotonic() - started, acquired)
+
+        with self.mutex:
+            if acquired:
+                self.counters['acquired'] += 1
+            else:
+                self._leave(key, entry)
+        return acquired
+
+    def release(self, key):
+        with self.mutex:
+            entry = self.entries[key]
+            entry['lock'].release()
+            self._leave(key, entry)
+
+    def _leave(self, key, entry):
+        entry['users'] -= 1
+        if entry['users'] == 0:
+            del self.entries[key]
+
+    def observe(self, waited, acquired):
+        """Count a wait for a key's lock (here, or for a lock held elsewhere such as Redis)"""
+        with self.mutex:
+            self.counters['contended'] += 1
+            self.wait_seconds += waited
+            if not acquired:
+                self.counters['timeouts'] += 1
+
+    def stats(self):
+        with self.mutex:
+            stats = dict(self.counters)
+            stats['wait_seconds'] = round(self.wait_seconds, 6)
+            stats['held'] = sum(1 for entry in self.entries.values() if entry['lock'].locked())
+            stats['waiting'] = sum(entry['users'] for entry in self.entries.values()) - stats['held']
+        return stats
@@ -0,0 +1,361 @@
+"""
+Response caches for AIREKON LLM calls
+Caches completion text keyed on a canonical hash of the request so repeated
+assessments of the same event cost no tokens - in process, and optionally
+on local disk shared by every worker on the host
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def make_cache_key(model, messages, temperature, max_tokens, response_format=None):
+    """Canonical hash of everything that determines a completion"""
+    request = {
+        'model': model,
+        'messages': messages,
+        'temperature': temperature,
+        'max_tokens': max_tokens
+    }
+    # Only part of the key when set, so plain-text entries keep their existing keys
+    if response_format is not None:
+        request['response_format'] = response_format
+
+    payload = json.dumps(
+        request,
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl_seconds=None):
+        """Store a value, evicting the least recently used entries beyond max_entries"""
+        if not self.enabled:
+            return
+
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl_seconds)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    async def aget(self, key):
+        """get() for callers on an event loop (an in-memory lookup has nothing to wait for)"""
+        return self.get(key)
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+class DiskResponseCache:
+    """SQLite (WAL) response cache shared by every worker process on the host
+
+    Entries survive restarts and are capped by count and total size; the
+    least recently used rows are evicted first. Hits stay read-only: the
+    access times they refresh are written in one batch every flush_interval
+    seconds.
+    """
+
+    def __init__(self, path, max_entries=50000, max_bytes=256 * 1024 * 1024,
+                 ttl_seconds=86400, evict_every=64, flush_interval=5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every
+        self.flush_interval = flush_interval
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes_since_evict = 0
+        self.touched = {}
+        self.last_flush = time.monotonic()
+
+        connection = self._connection()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        connection.commit()
+        self.evict()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _connection(self):
+        """One connection per thread (and per process after a fork)"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+
+        with self.lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.touched[key] = now
+            due = time.monotonic() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+        return row[0]
+
+    def flush(self):
+        """Write the access times refreshed by hits, in one transaction"""
+        with self.lock:
+            touched, self.touched = self.touched, {}
+            self.last_flush = time.monotonic()
+        if not touched:
+            return
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany("UPDATE responses SET last_access = ? WHERE key = ?",
+                                   [(last_access, key) for key, last_access in touched.items()])
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def peek(self, key):
+        """Read a live entry without counting a lookup or touching its recency"""
+        row = self._connection().execute(
+            "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        """Store a value and periodically enforce the size caps"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO responses (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode('utf-8')), now + self.ttl_seconds, now)
+        )
+
+        with self.lock:
+            self.touched.pop(key, None)
+            self.writes_since_evict += 1
+            due = self.writes_since_evict >= self.evict_every
+            if due:
+                self.writes_since_evict = 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired rows, then least recently used rows beyond the caps"""
+        self.flush()
+        connection = self._connection()
+        removed = connection.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+        count, total_bytes = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+        while count > self.max_entries or total_bytes > self.max_bytes:
+            # Remove roughly 10% past the cap at a time so we don't evict on every write
+            batch = max(count - self.max_entries, 0) + max(count // 10, 1)
+            removed += connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (batch,)
+            ).rowcount
+            count, total_bytes = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+
+        with self.lock:
+            self.evictions += removed
+
+    def recent(self, limit):
+        """Most recently used live entries, for warming an in-memory cache"""
+        self.flush()
+        now = time.time()
+        rows = self._connection().execute(
+            "SELECT key, value, expires_at FROM responses WHERE expires_at > ? ORDER BY last_access DESC LIMIT ?",
+            (now, limit)
+        ).fetchall()
+        return [(key, value, expires_at - now) for key, value, expires_at in rows]
+
+    def clear(self):
+        """Drop every cached entry"""
+        self._connection().execute("DELETE FROM responses")
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        count, total_bytes = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'entries': count,
+                'bytes': total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions
+            }
+
+
+class TieredResponseCache:
+    """In-process LRU in front of the shared disk cache"""
+
+    def __init__(self, memory, disk):
+        self.memory = memory
+        self.disk = disk
+
+    @property
+    def enabled(self):
+        return self.memory.enabled or self.disk.enabled
+
+    def get(self, key):
+        """Look in memory first, then on disk (promoting disk hits into memory)"""
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        value = self.disk.get(key)
+        if value is not None:
+            self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    async def aget(self, key):
+        """get() for callers on an event loop: memory inline, the disk lookup on a worker thread"""
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        value = await asyncio.to_thread(self.disk.get, key)
+        if value is not None:
+            self.memory.set(key, value)
+        return value
+
+    async def aset(self, key, value):
+        self.memory.set(key, value)
+        await asyncio.to_thread(self.disk.set, key, value)
+
+    def warm(self, limit):
+        """Warm start: load the most recently used disk entries into memory"""
+        entries = self.disk.recent(min(limit, self.memory.max_entries))
+        # Oldest first so the most recent entries end up at the MRU end
+        for key, value, remaining_ttl in reversed(entries):
+            self.memory.set(key, value, ttl_seconds=min(remaining_ttl, self.memory.ttl_seconds))
+        return len(entries)
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self):
+        memory_stats = self.memory.stats()
+        disk_stats = self.disk.stats()
+        lookups = memory_stats['hits'] + memory_stats['misses']
+        hits = memory_stats['hits'] + disk_stats['hits']
+        return {
+            'backend': 'tiered',
+            'hits': hits,
+            'misses': lookups - hits,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'memory': memory_stats,
+            'disk': disk_stats
+        }
@@ -0,0 +1,80 @@
+"""
+LLM provider selection for the AIREKON backend
+Every provider speaks the chat-completions protocol; they differ in where the
+requests go, which credentials they need and what they support. The provider
+is chosen with LLM_PROVIDER (openai, openai-compatible or fake).
+"""
+
+import os
+from openai import AsyncOpenAI
+
+DEFAULT_FAKE_BASE_URL = 'http://127.0.0.1:8001/v1'
+
+# What each LLM_PROVIDER needs: the environment variables its key may come from (first set wins),
+# the key to use when none is set (None: one is required), and its endpoint unless LLM_BASE_URL overrides it
+PROVIDERS = {
+    # The OpenAI API
+    'openai': {
+        'key_env': ('OPENAI_API_KEY',),
+        'default_key': None,
+        'base_url': None,
+        'requires_base_url': False
+    },
+    # Any server implementing the OpenAI chat-completions API (vLLM, LiteLLM, a gateway, ...)
+    'openai-compatible': {
+        'key_env': ('LLM_API_KEY', 'OPENAI_API_KEY'),
+        'default_key': 'not-needed',
+        'base_url': None,
+        'requires_base_url': True
+    },
+    # The bundled fake_llm_server.py - no key, no cost, no network beyond localhost
+    'fake': {
+        'key_env': (),
+        'default_key': 'fake-key',
+        'base_url': DEFAULT_FAKE_BASE_URL,
+        'requires_base_url': False
+    }
+}
+
+
+class LLMProvider:
+    """A named chat-completions endpoint and the client settings needed to reach it"""
+
+    def __init__(self, name, api_key=None, base_url=None, supports_json_schema=True, **client_kwargs):
+        self.name = name
+        self.api_key = api_key
+        self.base_url = base_url
+        self.supports_json_schema = supports_json_schema
+        self.client_kwargs = client_kwargs
+
+    def create_client(self, **overrides):
+        """Create the async client (called on the LLM event loop thread)"""
+        kwargs = dict(self.client_kwargs, **overrides)
+        if self.base_url:
+            kwargs['base_url'] = self.base_url
+        return AsyncOpenAI(api_key=self.api_key, **kwargs)
+
+    def describe(self):
+        return f"{self.name} ({self.base_url or 'default endpoint'})"
+
+
+def provider_from_env():
+    """Build the provider selected by LLM_PROVIDER
+
+    Raises ValueError when the selected provider is missing required settings.
+    """
+    name = os.getenv('LLM_PROVIDER', 'openai').lower()
+    settings = PROVIDERS.get(name)
+    if settings is None:
+        raise ValueError(f"Unknown LLM_PROVIDER '{name}' (expected {', '.join(PROVIDERS)})")
+
+    base_url = os.getenv('LLM_BASE_URL') or settings['base_url']
+    if settings['requires_base_url'] and not base_url:
+        raise ValueError(f"LLM_BASE_URL must be set for LLM_PROVIDER={name}")
+
+    api_key = next((os.getenv(env) for env in settings['key_env'] if os.getenv(env)), settings['default_key'])
+    if api_key is None:
+        raise ValueError(f"{settings['key_env'][0]} must be set in .env file (or choose another LLM_PROVIDER)")
+
+    supports_json_schema = os.getenv('LLM_STRUCTURED_OUTPUTS', 'true').lower() == 'true'
+    return LLMProvider(name, api_key, base_url, supports_json_schema)
@@ -0,0 +1,160 @@
+"""
+Async LLM execution layer for the AIREKON backend
+Runs every model call on a shared asyncio event loop so Flask worker threads
+only park on a future instead of driving a blocking HTTP request themselves
+"""
+
+import os
+import queue
+import asyncio
+import logging
+import contextlib
+import contextvars
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+async def _run_in_context(coro, context):
+    """Await a coroutine as a task created inside the given context"""
+    return await context.run(asyncio.ensure_future, coro)
+
+
+class LLMRuntime:
+    """Owns a background event loop and the provider's async client bound to it
+
+    If a caller (resilience.ResilientCaller) is given, every request to the
+    provider goes through its retries, deadline budget and circuit breaker.
+    If an admission controller (rate_limit.AdmissionController) is given, each
+    call first waits for rate limit capacity and holds a concurrency slot.
+    """
+
+    def __init__(self, provider, caller=None, admission=None, **client_kwargs):
+        self.provider = provider
+        self.caller = caller
+        self.admission = admission
+        self.client_kwargs = client_kwargs
+        self.loop = None
+        self.client = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        """Start the event loop thread (again after a gunicorn fork)"""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+
+            self.loop = asyncio.new_event_loop()
+            self.client = self.provider.create_client(**self.client_kwargs)
+            self._thread = threading.Thread(
+                target=self._run_loop,
+                name='llm-event-loop',
+                daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+            logger.info("LLM event loop started")
+
+    def _run_loop(self):
+        """Run the event loop forever in the background thread"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the LLM loop and return a concurrent future
+
+        The coroutine runs in a copy of the caller's contextvars, so per-request
+        settings made on the Flask thread are visible to the model call.
+        """
+        self._ensure_started()
+        context = contextvars.copy_context()
+        return asyncio.run_coroutine_threadsafe(_run_in_context(coro, context), self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the LLM loop and block the calling thread for its result"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def _create(self, deadline=None, **kwargs):
+        """Send one chat completions request, through the caller if there is one"""
+        if self.caller is None:
+            return await self.client.chat.completions.create(**kwargs)
+        return await self.caller.call(lambda: self.client.chat.completions.create(**kwargs), deadline=deadline)
+
+    def _admit(self, deadline, priority, kwargs):
+        """Admission for one call (a no-op context when there is no admission controller)"""
+        if self.admission is None:
+            return contextlib.nullcontext()
+        return self.admission.admit(self.admission.estimate(kwargs), deadline, priority)
+
+    async def chat(self, deadline=None, priority=None, **kwargs):
+        """Create a chat completion on the async client
+
+        deadline is a time.monotonic() timestamp bounding retries of this call;
+        priority is the admission class ('interactive' or 'background').
+        """
+        async with self._admit(deadline, priority, kwargs) as permit:
+            response = await self._create(deadline=deadline, **kwargs)
+            if permit is not None:
+                await permit.settle(getattr(getattr(response, 'usage', None), 'total_tokens', None))
+            return response
+
+    def chat_sync(self, **kwargs):
+        """Create a chat completion from synchronous (Flask) code"""
+        return self.run(self.chat(**kwargs))
+
+    async def chat_stream(self, on_usage=None, deadline=None, priority=None, **kwargs):
+        """Stream a chat completion, yielding content deltas as they arrive
+
+        on_usage, if given, is called with the usage block sent after the last delta.
+        Only opening the stream is retried; a stream that breaks midway raises.
+        """
+        if on_usage is not None:
+            kwargs['stream_options'] = {'include_usage': True}
+        # The admission (and its concurrency slot) is held until the stream ends
+        async with self._admit(deadline, priority, kwargs) as permit:
+            stream = await self._create(deadline=deadline, stream=True, **kwargs)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if getattr(chunk, 'usage', None) is not None:
+                    if permit is not None:
+                        await permit.settle(chunk.usage.total_tokens)
+                    if on_usage is not None:
+                        on_usage(chunk.usage)
+
+    def stream_sync(self, on_usage=None, deadline=None, priority=None, **kwargs):
+        """Stream a chat completion into synchronous code (e.g. a Flask SSE generator)"""
+        deltas = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for delta in self.chat_stream(on_usage=on_usage, deadline=deadline, priority=priority, **kwargs):
+                    deltas.put(delta)
+            except Exception as e:
+                deltas.put(e)
+            finally:
+                deltas.put(finished)
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item = deltas.get()
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Client went away or we are done - stop the upstream stream either way
+            future.cancel()
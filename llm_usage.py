@@ -0,0 +1,76 @@
+"""
+Token usage accounting for AIREKON LLM calls
+Totals the usage block of every completion per endpoint, including the prompt
+tokens the provider served from its prefix cache
+"""
+
+import threading
+
+
+def usage_counts(usage):
+    """Prompt, completion and cached-prompt token counts from an API usage object"""
+    if usage is None:
+        return 0, 0, 0
+
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached_tokens = getattr(details, 'cached_tokens', None) or 0
+    return (
+        getattr(usage, 'prompt_tokens', None) or 0,
+        getattr(usage, 'completion_tokens', None) or 0,
+        cached_tokens
+    )
+
+
+class UsageStats:
+    """Thread-safe token counters per endpoint and model"""
+
+    def __init__(self):
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, usage, model=None):
+        """Add the usage of one completion to the endpoint's totals"""
+        prompt_tokens, completion_tokens, cached_tokens = usage_counts(usage)
+        with self.lock:
+            totals = self.totals.setdefault((endpoint or 'unknown', model or 'unknown'), {
+                'calls': 0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'cached_tokens': 0
+            })
+            totals['calls'] += 1
+            totals['prompt_tokens'] += prompt_tokens
+            totals['completion_tokens'] += completion_tokens
+            totals['cached_tokens'] += cached_tokens
+
+    def reset(self):
+        """Drop every counter"""
+        with self.lock:
+            self.totals.clear()
+
+    def series(self):
+        """[(endpoint, model, totals), ...] for every pair seen so far"""
+        with self.lock:
+            return [(endpoint, model, dict(totals)) for (endpoint, model), totals in self.totals.items()]
+
+    def stats(self):
+        """Per-endpoint totals with the share of prompt tokens served from the provider cache"""
+        endpoints = {}
+        for endpoint, _, totals in self.series():
+            merged = endpoints.setdefault(endpoint, dict.fromkeys(totals, 0))
+            for name, value in totals.items():
+                merged[name] += value
+        for totals in endpoints.values():
+            totals['cached_ratio'] = (
+                round(totals['cached_tokens'] / totals['prompt_tokens'], 4) if totals['prompt_tokens'] else 0.0
+            )
+
+        prompt_tokens = sum(totals['prompt_tokens'] for totals in endpoints.values())
+        cached_tokens = sum(totals['cached_tokens'] for totals in endpoints.values())
+        return {
+            'endpoints': endpoints,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': sum(totals['completion_tokens'] for totals in endpoints.values()),
+            'cached_tokens': cached_tokens,
+            'cached_ratio': round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0
+        }
@@ -0,0 +1,102 @@
+"""
+Server-side prefetch of AI content for integrated AIREKON sessions
+/api/start-assessment can start the session's first generations straight
+away. Each outcome is recorded on the session with a fingerprint of the
+prompt it answered, so the page's first request gets the finished result
+(or waits on the running one) instead of starting again.
+"""
+
+import json
+import hashlib
+import logging
+import threading
+import concurrent.futures
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_fingerprint(messages):
+    """Stable hash of the messages a generation was asked with"""
+    return hashlib.sha256(json.dumps(messages, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class SessionPrefetcher:
+    """Tracks prefetched generations per session and hands them to the first matching request"""
+
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.counters = {'started': 0, 'served': 0, 'joined': 0, 'stale': 0, 'failed': 0}
+
+    def start(self, session_id, session, name, fingerprint, future):
+        """Track a generation submitted for session (a concurrent future) and record its outcome on the session"""
+        record = {'status': 'running', 'fingerprint': fingerprint}
+        session.setdefault('prefetch', {})[name] = record
+        with self.lock:
+            self.pending[(session_id, name)] = future
+            self.counters['started'] += 1
+
+        def finished(done):
+            if done.cancelled():
+                record['status'] = 'cancelled'
+            elif done.exception() is not None:
+                record.update(status='failed', error=str(done.exception()))
+                logger.warning(f"Prefetch of {name} for session {session_id} failed: {done.exception()}")
+            else:
+                record.update(status='done', result=done.result())
+            with self.lock:
+                if record['status'] == 'failed':
+                    self.counters['failed'] += 1
+                self.pending.pop((session_id, name), None)
+
+        future.add_done_callback(finished)
+
+    def take(self, session_id, session, name, fingerprint, timeout=None):
+        """The prefetched result for a request with this fingerprint, or None to generate it as usual
+
+        A generation that is still running is waited on for at most timeout seconds.
+        """
+        record = (session or {}).get('prefetch', {}).get(name)
+        if record is None:
+            return None
+        if record['fingerprint'] != fingerprint:
+            # The page asked about different event details than were prefetched
+            self._count('stale')
+            return None
+
+        with self.lock:
+            future = self.pending.get((session_id, name))
+        if future is not None:
+            try:
+                result = future.result(timeout=timeout)
+            except (Exception, concurrent.futures.CancelledError):
+                return None
+            self._count('joined')
+            return result
+
+        if record['status'] != 'done':
+            return None
+        self._count('served')
+        return record['result']
+
+    def discard(self, session_id):
+        """Cancel the session's generations that are still running"""
+        with self.lock:
+            futures = [future for (pending_id, _), future in self.pending.items() if pending_id == session_id]
+        for future in futures:
+            future.cancel()
+
+    def _count(self, outcome):
+        with self.lock:
+            self.counters[outcome] += 1
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['running'] = len(self.pending)
+        return stats
+
+    @staticmethod
+    def statuses(session):
+        """Status of each of the session's prefetched generations"""
+        return {name: record['status'] for name, record in (session or {}).get('prefetch', {}).items()}
@@ -0,0 +1,420 @@
+"""
+Client-side admission control for upstream LLM calls
+Requests-per-minute and tokens-per-minute token buckets plus a concurrency cap
+in front of the provider client. Calls wait by priority class and arrival order
+for a bounded time and are shed with a Retry-After when the queue would take
+longer than that.
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import sqlite3
+import logging
+import threading
+from contextlib import asynccontextmanager
+from conversation_context import count_message_tokens
+from resilience import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first: interactive work the user is watching, then speculative background work
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+PRIORITY_CLASSES = (INTERACTIVE, BACKGROUND)
+
+
+class RateLimited(UpstreamUnavailable):
+    """Shed before calling upstream because the client-side rate limit can't admit the call in time"""
+
+
+class TokenBuckets:
+    """Requests and tokens buckets refilled continuously at their per-minute rates
+
+    Each bucket holds burst_seconds worth of its rate, so a burst drains at
+    most that much at once and the rest is spread out. A rate of 0 disables
+    that bucket. Buckets that do I/O set blocking, so the admission
+    controller calls them off the event loop.
+    """
+
+    blocking = False
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, burst_seconds=10):
+        self.rates = {}
+        if requests_per_minute > 0:
+            self.rates['requests'] = requests_per_minute / 60.0
+        if tokens_per_minute > 0:
+            self.rates['tokens'] = tokens_per_minute / 60.0
+        self.capacity = {name: max(1.0, rate * burst_seconds) for name, rate in self.rates.items()}
+
+    def _refilled(self, levels, elapsed):
+        return {
+            name: min(self.capacity[name], levels.get(name, self.capacity[name]) + rate * max(0.0, elapsed))
+            for name, rate in self.rates.items()
+        }
+
+    def _wait(self, levels, cost):
+        """Seconds until levels can pay cost (a cost above the burst size only needs a full bucket)"""
+        wait = 0.0
+        for name, rate in self.rates.items():
+            needed = min(cost[name], self.capacity[name])
+            if levels[name] < needed:
+                wait = max(wait, (needed - levels[name]) / rate)
+        return wait
+
+    def _projected(self, levels, cost):
+        """Seconds until levels could pay cost in full (for queued work as a whole)"""
+        return max([(cost[name] - levels[name]) / rate for name, rate in self.rates.items()] + [0.0])
+
+
+class LocalBuckets(TokenBuckets):
+    """Buckets for this worker process only"""
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, burst_seconds=10):
+        super().__init__(requests_per_minute, tokens_per_minute, burst_seconds)
+        self.state = dict(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _current(self):
+        now = time.monotonic()
+        self.state = self._refilled(self.state, now - self.updated)
+        self.updated = now
+        return self.state
+
+    def try_take(self, cost):
+        """Take cost ({'requests': n, 'tokens': n}) and return 0, or return the seconds to wait"""
+        with self.lock:
+            levels = self._current()
+            wait = self._wait(levels, cost)
+            if wait == 0:
+                for name in self.rates:
+                    levels[name] -= cost[name]
+            return wait
+
+    def refund(self, cost):
+        """Give back tokens that were reserved but not used"""
+        with self.lock:
+            levels = self._current()
+            for name in self.rates:
+                levels[name] = min(self.capacity[name], levels[name] + cost.get(name, 0))
+
+    def projected_wait(self, cost):
+        with self.lock:
+            return self._projected(self._current(), cost)
+
+    def levels(self):
+        with self.lock:
+            return {name: round(level, 2) for name, level in self._current().items()}
+
+
+class SQLiteBuckets(TokenBuckets):
+    """Buckets shared by every worker on the host through a small SQLite (WAL) table"""
+
+    blocking = True
+
+    def __init__(self, path, requests_per_minute=0, tokens_per_minute=0, burst_seconds=10):
+        super().__init__(requests_per_minute, tokens_per_minute, burst_seconds)
+        self.path = path
+        self.local = threading.local()
+
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                name TEXT PRIMARY KEY,
+                level REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def _connection(self):
+        """One connection per thread (and per process after a fork)"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    def _select_levels(self, connection, now):
+        """The stored levels refilled up to now (missing buckets start full)"""
+        rows = connection.execute("SELECT name, level, updated_at FROM rate_buckets").fetchall()
+        levels = {}
+        for name, level, updated_at in rows:
+            if name in self.rates:
+                levels[name] = self._refilled({name: level}, now - updated_at)[name]
+        return self._refilled(levels, 0)
+
+    def _read(self):
+        """Current levels from a plain read, without taking the write lock or storing the refill"""
+        return self._select_levels(self._connection(), time.time())
+
+    def _update(self, change):
+        """Run change(levels) -> result inside one write transaction and store the new levels"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            levels = self._select_levels(connection, now)
+            result = change(levels)
+            connection.executemany(
+                "INSERT OR REPLACE INTO rate_buckets (name, level, updated_at) VALUES (?, ?, ?)",
+                [(name, level, now) for name, level in levels.items()]
+            )
+            connection.execute("COMMIT")
+            return result
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def try_take(self, cost):
+        def take(levels):
+            wait = self._wait(levels, cost)
+            if wait == 0:
+                for name in self.rates:
+                    levels[name] -= cost[name]
+            return wait
+        return self._update(take)
+
+    def refund(self, cost):
+        def give_back(levels):
+            for name in self.rates:
+                levels[name] = min(self.capacity[name], levels[name] + cost.get(name, 0))
+        self._update(give_back)
+
+    def projected_wait(self, cost):
+        return self._projected(self._read(), cost)
+
+    def levels(self):
+        return {name: round(level, 2) for name, level in self._read().items()}
+
+
+class Permit:
+    """An admitted call; settle() returns the unused part of the token estimate"""
+
+    def __init__(self, controller, tokens, priority):
+        self.controller = controller
+        self.tokens = tokens
+        self.priority = priority
+        self.settled = False
+
+    async def settle(self, used_tokens):
+        if self.settled or used_tokens is None:
+            return
+        self.settled = True
+        unused = self.tokens - used_tokens
+        if unused > 0:
+            await self.controller._buckets(self.controller.buckets.refund, {'requests': 0, 'tokens': unused})
+
+
+class AdmissionController:
+    """Admits upstream calls through the buckets and concurrency cap, interactive calls first
+
+    Waiting calls are admitted by priority class, then in arrival order, so
+    interactive work overtakes queued background work. Background calls may
+    hold at most max_concurrency - interactive_reserve slots. A call that
+    would wait longer than max_wait (or past its request deadline) is shed
+    with RateLimited instead of piling onto the provider.
+    """
+
+    def __init__(self, buckets, max_concurrency=0, max_wait=10.0, interactive_reserve=0, on_wait=None):
+        self.buckets = buckets
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.interactive_reserve = min(interactive_reserve, max(0, max_concurrency - 1))
+        self.on_wait = on_wait
+        self.lock = threading.Lock()
+        self.waiting = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self.queued_tokens = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self.in_flight = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self.admitted = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self.shed = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self.wait_seconds = dict.fromkeys(PRIORITY_CLASSES, 0.0)
+        self.tickets = itertools.count()
+        self._loop = None
+        self._queue = []
+        self._changed = None
+
+    def _bind_loop(self):
+        """asyncio primitives belong to one loop; recreate them for a new one (e.g. after a fork)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = []
+            self._changed = asyncio.Condition()
+
+    def estimate(self, request):
+        """Tokens a chat completions request may use: its prompt plus the completion limit"""
+        return count_message_tokens(request.get('messages', [])) + (request.get('max_tokens') or 0)
+
+    @asynccontextmanager
+    async def admit(self, tokens, deadline=None, priority=None):
+        """Hold an admission (bucket capacity and a concurrency slot) for the body of the block"""
+        permit = await self.acquire(tokens, deadline, priority)
+        try:
+            yield permit
+        finally:
+            await self.release(permit)
+
+    async def acquire(self, tokens, deadline=None, priority=None):
+        """Wait for capacity and return a Permit, or raise RateLimited
+
+        deadline is a time.monotonic() timestamp; the wait never runs past it.
+        priority is 'interactive' (the default) or 'background'.
+        """
+        self._bind_loop()
+        priority = priority if priority in PRIORITY_CLASSES else INTERACTIVE
+        started = time.monotonic()
+        budget = self.max_wait
+        if deadline is not None:
+            budget = min(budget, max(0.0, deadline - started))
+
+        # Nobody queued and capacity to spare - admit without queueing
+        if not self._queue:
+            if await self._reserve_slot(priority, {'requests': 1, 'tokens': tokens}) == 0:
+                return self._admitted(tokens, priority, started)
+            # The slot held while asking the buckets may have kept a queued call waiting
+            await self._wake()
+
+        # Only work of the same or a higher priority is ahead of this call
+        with self.lock:
+            ahead = PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority) + 1]
+            queued = {
+                'requests': sum(self.waiting[name] for name in ahead) + 1,
+                'tokens': sum(self.queued_tokens[name] for name in ahead) + tokens
+            }
+        projected = await self._buckets(self.buckets.projected_wait, queued)
+        if projected > budget:
+            self._shed(priority, projected)
+
+        with self.lock:
+            self.waiting[priority] += 1
+            self.queued_tokens[priority] += tokens
+        try:
+            await asyncio.wait_for(self._take(tokens, priority), budget)
+        except asyncio.TimeoutError:
+            self._shed(priority, max(budget, await self._buckets(self.buckets.projected_wait, queued)))
+        finally:
+            with self.lock:
+                self.waiting[priority] -= 1
+                self.queued_tokens[priority] -= tokens
+
+        return self._admitted(tokens, priority, started)
+
+    def _has_slot(self, priority):
+        if self.max_concurrency <= 0:
+            return True
+        total = sum(self.in_flight.values())
+        if priority == BACKGROUND:
+            return total < self.max_concurrency - self.interactive_reserve
+        return total < self.max_concurrency
+
+    async def _buckets(self, method, *args):
+        """Call a bucket method, on a worker thread when the buckets do I/O"""
+        if self.buckets.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def _reserve_slot(self, priority, cost):
+        """Take a concurrency slot and the bucket cost together
+
+        Returns 0 once both are taken, otherwise the seconds to wait (None: until a slot is released).
+        The slot is held while the buckets are asked, so the lock is never held across their I/O.
+        """
+        with self.lock:
+            if not self._has_slot(priority):
+                return None
+            self.in_flight[priority] += 1
+        wait = None
+        try:
+            wait = await self._buckets(self.buckets.try_take, cost)
+        finally:
+            if wait != 0:
+                with self.lock:
+                    self.in_flight[priority] -= 1
+        return wait
+
+    async def _take(self, tokens, priority):
+        """Queue a ticket and take capacity once it is at the head of the queue"""
+        cost = {'requests': 1, 'tokens': tokens}
+        ticket = (PRIORITY_CLASSES.index(priority), next(self.tickets))
+        async with self._changed:
+            heapq.heappush(self._queue, ticket)
+            # A new interactive ticket may now be ahead of a background head - let it re-check
+            self._changed.notify_all()
+            try:
+                while True:
+                    wait = None
+                    if self._queue[0] == ticket:
+                        wait = await self._reserve_slot(priority, cost)
+                        if wait == 0:
+                            heapq.heappop(self._queue)
+                            self._changed.notify_all()
+                            return
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                    self._changed.notify_all()
+                raise
+
+    def _admitted(self, tokens, priority, started):
+        waited = time.monotonic() - started
+        with self.lock:
+            self.admitted[priority] += 1
+            self.wait_seconds[priority] += waited
+        if self.on_wait is not None:
+            self.on_wait(waited, priority)
+        return Permit(self, tokens, priority)
+
+    async def release(self, permit):
+        """Free the concurrency slot of a finished call and wake the queue"""
+        with self.lock:
+            self.in_flight[permit.priority] -= 1
+        await self._wake()
+
+    async def _wake(self):
+        if self._queue:
+            async with self._changed:
+                self._changed.notify_all()
+
+    def _shed(self, priority, retry_after):
+        with self.lock:
+            self.shed[priority] += 1
+        logger.warning(f"Shedding {priority} model call, client-side rate limit queue needs {retry_after:.1f}s")
+        raise RateLimited('Too many model requests right now, please retry shortly', retry_after=max(1.0, retry_after))
+
+    def stats(self):
+        with self.lock:
+            admitted = sum(self.admitted.values())
+            wait_seconds = sum(self.wait_seconds.values())
+            stats = {
+                'queue_depth': sum(self.waiting.values()),
+                'queued_tokens': sum(self.queued_tokens.values()),
+                'in_flight': sum(self.in_flight.values()),
+                'admitted': admitted,
+                'shed': sum(self.shed.values()),
+                'wait_seconds_total': round(wait_seconds, 3),
+                'avg_wait_seconds': round(wait_seconds / admitted, 4) if admitted else 0.0,
+                'priorities': {
+                    name: {
+                        'queue_depth': self.waiting[name],
+                        'in_flight': self.in_flight[name],
+                        'admitted': self.admitted[name],
+                        'shed': self.shed[name],
+                        'avg_wait_seconds': (
+                            round(self.wait_seconds[name] / self.admitted[name], 4) if self.admitted[name] else 0.0
+                        )
+                    }
+                    for name in PRIORITY_CLASSES
+                }
+            }
+        stats['bucket_levels'] = self.buckets.levels()
+        stats['bucket_capacity'] = {name: round(capacity, 2) for name, capacity in self.buckets.capacity.items()}
+        return stats
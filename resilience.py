@@ -0,0 +1,268 @@
+"""
+Resilience layer for upstream LLM calls
+Retries transient failures with jittered exponential backoff (honouring
+Retry-After), keeps every attempt inside the request's deadline budget, and
+trips a circuit breaker so calls fail fast while the provider is unhealthy
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from openai import APIConnectionError
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """The model call can't be made right now; maps to an HTTP status with an optional Retry-After"""
+
+    status_code = 503
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """The request's time budget ran out before a usable reply arrived"""
+
+    status_code = 504
+
+
+def is_retryable(error):
+    """Whether an upstream error is transient (rate limit, overload, timeout, connection)"""
+    if isinstance(error, (APIConnectionError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+
+def counts_as_outage(error):
+    """Whether an error says upstream is unhealthy (rate limits are backed off, not counted)"""
+    return is_retryable(error) and getattr(error, 'status_code', None) != 429
+
+
+def retry_after_seconds(error):
+    """Delay requested by the provider via retry-after-ms / Retry-After, if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+    except ValueError:
+        pass
+
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class RetryPolicy:
+    """Jittered exponential backoff"""
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt, retry_after=None):
+        """Seconds to wait before retry number attempt (1-based)"""
+        if retry_after is not None:
+            # The provider knows best; add a little jitter so workers don't return in lockstep
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    def __init__(self, failure_threshold=5, reset_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self):
+        return self.failure_threshold > 0
+
+    def state(self):
+        with self.lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half_open'
+        return 'open'
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go upstream now; returns whether the call is the half-open probe"""
+        if not self.enabled:
+            return False
+
+        with self.lock:
+            state = self._state()
+            if state == 'closed':
+                return False
+            if state == 'half_open' and not self.probing:
+                # Let exactly one request find out whether upstream has recovered
+                self.probing = True
+                return True
+
+            self.rejected += 1
+            retry_after = max(1.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+            raise CircuitOpenError('Model provider is unavailable, please retry shortly', retry_after=retry_after)
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self, probe=False):
+        with self.lock:
+            self.failures += 1
+            # A failed probe re-opens the circuit; otherwise open once the threshold is reached
+            if probe or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.trips += 1
+                self.opened_at = time.monotonic()
+            if probe:
+                self.probing = False
+
+    def release_probe(self, probe):
+        """Give up a half-open probe that ended without telling us anything (e.g. cancelled)"""
+        if not probe:
+            return
+        with self.lock:
+            self.probing = False
+
+    def stats(self):
+        with self.lock:
+            return {
+                'state': self._state(),
+                'consecutive_failures': self.failures,
+                'trips': self.trips,
+                'rejected': self.rejected
+            }
+
+
+class ResilientCaller:
+    """Runs upstream calls through the retry policy, deadline budget and circuit breaker"""
+
+    def __init__(self, policy, breaker, attempt_timeout=None):
+        self.policy = policy
+        self.breaker = breaker
+        self.attempt_timeout = attempt_timeout
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.deadline_exceeded = 0
+
+    async def call(self, factory, deadline=None):
+        """Await factory() until it succeeds, is not retryable, or the budget is spent
+
+        deadline is a time.monotonic() timestamp; None means no overall budget.
+        """
+        self._count('calls')
+        attempt = 1
+        while True:
+            # Check the budget first, so a spent deadline never takes the half-open probe
+            timeout = self._attempt_timeout(deadline)
+            probe = self.breaker.before_call()
+            try:
+                result = await asyncio.wait_for(factory(), timeout)
+            except asyncio.CancelledError:
+                self.breaker.release_probe(probe)
+                raise
+            except Exception as e:
+                remaining = self._remaining(deadline)
+                if remaining == 0 and isinstance(e, asyncio.TimeoutError):
+                    # Our own budget ran out - that says nothing about upstream health
+                    self.breaker.release_probe(probe)
+                    self._count('failures')
+                    self._count('deadline_exceeded')
+                    raise DeadlineExceeded('Model call did not finish within the request deadline') from e
+
+                if counts_as_outage(e):
+                    self.breaker.record_failure(probe)
+                else:
+                    self.breaker.release_probe(probe)
+
+                if not is_retryable(e) or attempt >= self.policy.max_attempts:
+                    self._count('failures')
+                    raise
+
+                delay = self.policy.backoff(attempt, retry_after_seconds(e))
+                if remaining is not None and delay >= remaining:
+                    self._count('failures')
+                    self._count('deadline_exceeded')
+                    raise DeadlineExceeded(
+                        'Model provider is busy and the request deadline would pass before a retry',
+                        retry_after=delay
+                    ) from e
+
+                logger.warning(f"Upstream call failed ({e.__class__.__name__}), retry {attempt} in {delay:.2f}s")
+                self._count('retries')
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    def _remaining(self, deadline):
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+
+    def _attempt_timeout(self, deadline):
+        remaining = self._remaining(deadline)
+        if remaining is not None and remaining <= 0:
+            self._count('deadline_exceeded')
+            raise DeadlineExceeded('Request deadline passed before the model call was made')
+        if remaining is None:
+            return self.attempt_timeout
+        if self.attempt_timeout is None:
+            return remaining
+        return min(remaining, self.attempt_timeout)
+
+    def _count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        with self.lock:
+            stats = {
+                'calls': self.calls,
+                'retries': self.retries,
+                'failures': self.failures,
+                'deadline_exceeded': self.deadline_exceeded,
+                'retry_rate': round(self.retries / self.calls, 4) if self.calls else 0.0
+            }
+        stats['circuit_breaker'] = self.breaker.stats()
+        return stats
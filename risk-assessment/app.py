@@ -10,10 +10,14 @@ import uuid
 import json
 import argparse
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from flask import Flask, request, jsonify, render_template, render_template_string, send_from_directory
 from flask_cors import CORS
 
+# Shared modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ttl_store import TTLStore, SQLiteTTLStore
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,8 +26,22 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for cross-origin requests
 
-# In-memory session storage (use Redis/database in production)
-sessions = {}
+# Session storage, expired after 24 hours: in memory, or shared by all workers in SQLite with RA_SESSION_DB_PATH
+session_limits = dict(
+    max_entries=int(os.environ.get("RA_SESSION_MAX_ENTRIES", 10000)),
+    max_bytes=int(float(os.environ.get("RA_SESSION_MAX_MB", 256)) * 1024 * 1024),
+    idle_ttl=int(os.environ.get("RA_SESSION_IDLE_TTL_SECONDS", 0)),
+    max_age=int(os.environ.get("RA_SESSION_MAX_AGE_SECONDS", 86400))
+)
+if os.environ.get("RA_SESSION_DB_PATH"):
+    sessions = SQLiteTTLStore(
+        os.environ["RA_SESSION_DB_PATH"], 'sessions',
+        columns=('status', 'created_at'),
+        json_columns=('event_data', 'assessment_results'),
+        **session_limits
+    )
+else:
+    sessions = TTLStore('sessions', **session_limits)
 
 # Configuration
 app.secret_key = os.environ.get("RA_SECRET_KEY", "ra-tool-secret-key")
@@ -72,7 +90,8 @@ def health():
         "status": "healthy",
         "message": "AIREKON Risk Assessment Tool is operational",
         "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "sessions": sessions.stats()
     })
 
 @app.route("/api/start-assessment", methods=["POST"])
@@ -125,16 +144,17 @@ def start_assessment():
 @app.route("/api/session/<session_id>")
 def get_session(session_id):
     """Get session data"""
-    if session_id not in sessions:
+    session_data = sessions.get(session_id)
+    if session_data is None:
         return jsonify({"error": "Session not found"}), 404
     
-    session_data = sessions[session_id]
     return jsonify(session_data)
 
 @app.route("/api/session/<session_id>/complete", methods=["POST"])
 def complete_session(session_id):
     """Mark session as complete with results"""
-    if session_id not in sessions:
+    session_data = sessions.get(session_id)
+    if session_data is None:
         return jsonify({"error": "Session not found"}), 404
     
     try:
@@ -143,12 +163,13 @@ def complete_session(session_id):
             return jsonify({"error": "No data provided"}), 400
         
         # Update session with results
-        sessions[session_id].update({
+        session_data.update({
             "status": "completed",
             "assessment_results": data,
             "completed_at": datetime.utcnow().isoformat(),
             "last_updated": datetime.utcnow().isoformat()
         })
+        sessions[session_id] = session_data
         
         logger.info(f"Completed assessment session {session_id}")
         
@@ -165,11 +186,10 @@ def complete_session(session_id):
 @app.route("/api/session/<session_id>/results")
 def get_session_results(session_id):
     """Get completed session results"""
-    if session_id not in sessions:
+    session_data = sessions.get(session_id)
+    if session_data is None:
         return jsonify({"error": "Session not found"}), 404
     
-    session_data = sessions[session_id]
-    
     if session_data["status"] != "completed":
         return jsonify({"error": "Assessment not yet completed"}), 400
     
@@ -196,10 +216,9 @@ def get_session_results(session_id):
 @app.route("/api/session/<session_id>", methods=["DELETE"])
 def delete_session(session_id):
     """Clean up session"""
-    if session_id not in sessions:
+    if sessions.pop(session_id) is None:
         return jsonify({"error": "Session not found"}), 404
     
-    del sessions[session_id]
     logger.info(f"Cleaned up session {session_id}")
     
     return jsonify({
@@ -501,21 +520,6 @@ def serve_images(filename):
     """Serve image files"""
     return send_from_directory('images', filename)
 
-# Session cleanup (run periodically in production)
-def cleanup_old_sessions():
-    """Remove sessions older than 24 hours"""
-    cutoff = datetime.utcnow() - timedelta(hours=24)
-    to_remove = []
-    
-    for session_id, session_data in sessions.items():
-        created_at = datetime.fromisoformat(session_data["created_at"])
-        if created_at < cutoff:
-            to_remove.append(session_id)
-    
-    for session_id in to_remove:
-        del sessions[session_id]
-        logger.info(f"Cleaned up expired session {session_id}")
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the AIREKON Risk Assessment Tool server")
     parser.add_argument('--port', type=int, default=7001, help='Port to run the server on (default: 7001)')
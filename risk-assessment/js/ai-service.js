@@ -9,7 +9,35 @@ class AIService {
         this.backendURL = 'http://localhost:8085';
         this.maxRetries = 3;
         this.retryDelay = 1000; // 1 second
+        this.jobPollInterval = 500;
+        // Give up on a job after this long (the backend's JOB_DEADLINE_SECONDS plus time queued)
+        this.jobTimeout = 15 * 60 * 1000;
+        this.jobsSupported = null;
         this.initialized = false;
+        // Background (speculative) requests are tagged with a work group so they can be dropped together
+        this.workGroup = this.newId();
+        this.backgroundControllers = new Set();
+        // Integrated sessions may have content prefetched by /api/start-assessment
+        this.sessionId = null;
+    }
+
+    /**
+     * Add the session ID to a request so the backend can answer it from the session's prefetched content
+     * @param {Object} data - Request data
+     * @returns {Object}
+     */
+    withSession(data) {
+        return this.sessionId ? { ...data, sessionId: this.sessionId } : data;
+    }
+
+    /**
+     * Random id for idempotency keys and work groups
+     * @returns {string}
+     */
+    newId() {
+        return (window.crypto && window.crypto.randomUUID)
+            ? window.crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
     }
 
     /**
@@ -33,26 +61,65 @@ class AIService {
      * Make a request to backend API with retry logic
      * @param {string} endpoint - API endpoint
      * @param {Object} data - Request data
+     * @param {Object} options - {priority: 'interactive' | 'background'}
      * @returns {Promise<Object>}
      */
-    async makeRequest(endpoint, data) {
+    async makeRequest(endpoint, data, options = {}) {
         if (!this.isConfigured()) {
             throw new Error('AI service not configured. Please initialize first.');
         }
 
+        // One key per logical request so a retry after a timeout replays the original result
+        const idempotencyKey = this.newId();
+        const headers = {
+            'Content-Type': 'application/json',
+            'Idempotency-Key': idempotencyKey,
+        };
+
+        // Background work yields to interactive calls on the backend and is dropped by cancelBackgroundWork()
+        let controller = null;
+        if (options.priority) {
+            headers['X-Request-Priority'] = options.priority;
+        }
+        if (options.priority === 'background') {
+            headers['X-Work-Group'] = this.workGroup;
+            controller = new AbortController();
+            this.backgroundControllers.add(controller);
+        }
+
+        try {
+            return await this.sendWithRetries(endpoint, data, headers, controller);
+        } finally {
+            if (controller) {
+                this.backgroundControllers.delete(controller);
+            }
+        }
+    }
+
+    /**
+     * POST with retries on network errors and "busy" responses
+     * @param {string} endpoint - API endpoint
+     * @param {Object} data - Request data
+     * @param {Object} headers - Request headers
+     * @param {AbortController|null} controller - Aborts the request and any pending retry
+     * @returns {Promise<Object>}
+     */
+    async sendWithRetries(endpoint, data, headers, controller) {
         for (let attempt = 1; attempt <= this.maxRetries; attempt++) {
             try {
                 const response = await fetch(`${this.backendURL}${endpoint}`, {
                     method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify(data)
+                    headers,
+                    body: JSON.stringify(data),
+                    signal: controller ? controller.signal : undefined
                 });
 
                 if (!response.ok) {
                     const errorData = await response.json().catch(() => ({}));
-                    throw new Error(`Backend request failed: ${response.status} - ${errorData.error || response.statusText}`);
+                    const error = new Error(`Backend request failed: ${response.status} - ${errorData.error || response.statusText}`);
+                    error.status = response.status;
+                    error.retryAfter = parseFloat(response.headers.get('Retry-After'));
+                    throw error;
                 }
 
                 const responseData = await response.json();
@@ -62,16 +129,232 @@ class AIService {
             } catch (error) {
                 console.error(`Backend request attempt ${attempt} failed:`, error);
 
-                if (attempt === this.maxRetries) {
+                // The backend already retries the model call; only retry network errors and
+                // "busy" responses, otherwise retries just pile onto the rate limit
+                const cancelled = error.name === 'AbortError' || (controller && controller.signal.aborted);
+                const retryable = !cancelled && (!error.status || [408, 429, 502, 503].includes(error.status));
+                if (attempt === this.maxRetries || !retryable) {
                     throw error;
                 }
 
-                // Wait before retrying
-                await new Promise(resolve => setTimeout(resolve, this.retryDelay * attempt));
+                // Wait before retrying - as long as the backend asked, else jittered exponential backoff
+                const delay = error.retryAfter > 0
+                    ? error.retryAfter * 1000
+                    : Math.random() * this.retryDelay * Math.pow(2, attempt - 1);
+                await new Promise(resolve => setTimeout(resolve, delay));
+                if (controller && controller.signal.aborted) {
+                    throw error;
+                }
             }
         }
     }
 
+    /**
+     * Whether the backend keeps jobs where every worker can answer for them (asked once, via /health)
+     * @returns {Promise<boolean>}
+     */
+    async supportsJobs() {
+        if (this.jobsSupported === null) {
+            this.jobsSupported = fetch(`${this.backendURL}/health`)
+                .then(response => response.ok ? response.json() : {})
+                .then(health => Boolean(health.jobs && health.jobs.shared))
+                .catch(() => false);
+        }
+        return this.jobsSupported;
+    }
+
+    /**
+     * Run a long generation as a job when the backend supports it, else as a direct request
+     * @param {string} route - Generation route, e.g. 'generate-risks'
+     * @param {Object} data - The route's request body
+     * @returns {Promise<Object>} - The route's response body
+     */
+    async runLongRequest(route, data) {
+        if (await this.supportsJobs()) {
+            return this.runJob(route, data);
+        }
+        return this.makeRequest(`/api/ai/${route}`, data);
+    }
+
+    /**
+     * Run a long generation as a backend job: submit it, then poll until it finishes
+     * (plain polls, so no backend worker is held while waiting)
+     * @param {string} route - Generation route, e.g. 'generate-risks'
+     * @param {Object} data - The route's request body
+     * @returns {Promise<Object>} - The route's response body
+     */
+    async runJob(route, data) {
+        const job = await this.makeRequest('/api/jobs', { route, data });
+        const giveUpAt = Date.now() + this.jobTimeout;
+
+        for (let failures = 0; ;) {
+            if (Date.now() >= giveUpAt) {
+                // Stop the job too, so it doesn't keep spending tokens nobody will read
+                fetch(`${this.backendURL}${job.status_url}`, { method: 'DELETE' }).catch(() => {});
+                const error = new Error(`Backend job ${job.job_id} did not finish in time`);
+                error.status = 504;
+                throw error;
+            }
+
+            let status;
+            try {
+                await new Promise(resolve => setTimeout(resolve, this.jobPollInterval));
+                const response = await fetch(`${this.backendURL}${job.status_url}`);
+                if (!response.ok) {
+                    throw new Error(`Job status request failed: ${response.status}`);
+                }
+                status = await response.json();
+                failures = 0;
+            } catch (error) {
+                if (++failures >= this.maxRetries) {
+                    throw error;
+                }
+                continue;
+            }
+
+            if (status.status === 'succeeded') {
+                return status.result;
+            }
+            if (status.status === 'failed' || status.status === 'cancelled') {
+                const error = new Error(`Backend request failed: ${status.status_code} - ${status.error}`);
+                error.status = status.status_code;
+                throw error;
+            }
+        }
+    }
+
+    /**
+     * Make a streaming (Server-Sent Events) request to the backend API
+     * @param {string} endpoint - API endpoint
+     * @param {Object} data - Request data
+     * @param {Function} onEvent - Called with (eventName, payload) for each event
+     * @returns {Promise<void>}
+     */
+    async streamRequest(endpoint, data, onEvent) {
+        if (!this.isConfigured()) {
+            throw new Error('AI service not configured. Please initialize first.');
+        }
+
+        const response = await fetch(`${this.backendURL}${endpoint}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream',
+            },
+            body: JSON.stringify(data)
+        });
+
+        if (!response.ok || !response.body) {
+            const errorData = await response.json().catch(() => ({}));
+            throw new Error(`Backend stream failed: ${response.status} - ${errorData.error || response.statusText}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            // SSE frames are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let eventName = 'message';
+                let payload = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) {
+                        eventName = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        payload += line.slice(5).trim();
+                    }
+                });
+
+                const parsed = payload ? JSON.parse(payload) : {};
+                if (eventName === 'error') {
+                    throw new Error(parsed.error || 'Stream error');
+                }
+                onEvent(eventName, parsed);
+            }
+        }
+    }
+
+    /**
+     * Stream a paragraph endpoint, reporting the text generated so far
+     * @param {string} endpoint - Streaming paragraph endpoint
+     * @param {Object} eventData - Event information
+     * @param {Function} onText - Called with the accumulated paragraph text
+     * @returns {Promise<string>} - The complete paragraph
+     */
+    async streamParagraph(endpoint, eventData, onText) {
+        let text = '';
+        let content = null;
+
+        await this.streamRequest(endpoint, eventData, (eventName, payload) => {
+            if (eventName === 'delta') {
+                text += payload.text;
+                onText(text);
+            } else if (eventName === 'done') {
+                content = payload.content;
+            }
+        });
+
+        return (content !== null ? content : text).trim();
+    }
+
+    /**
+     * Stream the overview paragraph
+     * @param {Object} eventData - Event information
+     * @param {Function} onText - Called with the accumulated paragraph text
+     * @returns {Promise<string>}
+     */
+    async streamOverviewParagraph(eventData, onText) {
+        return this.streamParagraph('/api/ai/generate-overview/stream', this.withSession(eventData), onText);
+    }
+
+    /**
+     * Stream the operational considerations paragraph
+     * @param {Object} eventData - Event information
+     * @param {Function} onText - Called with the accumulated paragraph text
+     * @returns {Promise<string>}
+     */
+    async streamOperationalParagraph(eventData, onText) {
+        return this.streamParagraph('/api/ai/generate-operational/stream', this.withSession(eventData), onText);
+    }
+
+    /**
+     * Stream the next risks in an ongoing conversation, one event per completed risk
+     * @param {string} conversationId - Conversation ID
+     * @param {number} riskNumber - First risk number to generate (1-based)
+     * @param {number} count - Number of risks to generate
+     * @param {Function} onRisk - Called with each risk as soon as it is complete
+     * @returns {Promise<Array>} - All risks generated
+     */
+    async streamNextRisks(conversationId, riskNumber, count, onRisk) {
+        const requestData = {
+            conversation_id: conversationId,
+            risk_number: riskNumber,
+            count
+        };
+        let risks = [];
+
+        await this.streamRequest('/api/ai/generate-next-risk/stream', requestData, (eventName, payload) => {
+            if (eventName === 'risk') {
+                onRisk(payload.risk);
+            } else if (eventName === 'done') {
+                risks = payload.risks;
+            }
+        });
+
+        return risks;
+    }
+
     /**
      * Generate contextual summary for the event using two separate prompts
      * @param {Object} eventData - Event information
@@ -100,7 +383,7 @@ class AIService {
      * @returns {Promise<string>}
      */
     async generateOverviewParagraph(eventData) {
-        const response = await this.makeRequest('/api/ai/generate-overview', eventData);
+        const response = await this.makeRequest('/api/ai/generate-overview', this.withSession(eventData));
         return response.content.trim();
     }
 
@@ -110,7 +393,7 @@ class AIService {
      * @returns {Promise<string>}
      */
     async generateOperationalParagraph(eventData) {
-        const response = await this.makeRequest('/api/ai/generate-operational', eventData);
+        const response = await this.makeRequest('/api/ai/generate-operational', this.withSession(eventData));
         return response.content.trim();
     }
 
@@ -120,7 +403,8 @@ class AIService {
      * @returns {Promise<Object>} - Full response with risk_data and legacy risks
      */
     async generateRiskAssessment(eventData) {
-        const response = await this.makeRequest('/api/ai/generate-risks', eventData);
+        // Runs as a job (where supported) so the backend doesn't hold a connection (and a worker) for the whole register
+        const response = await this.runLongRequest('generate-risks', this.withSession(eventData));
         console.log('🔧 AI Service received response:', response);
         return response; // Return full response instead of just response.risks
     }
@@ -178,9 +462,10 @@ class AIService {
         const requestData = {
             conversation_id: conversationId,
             existing_risks: existingRisks,
-            num_additional: numAdditional
+            num_additional: numAdditional,
+            parallel: true // Generate concurrently on the backend (one round trip)
         };
-        const response = await this.makeRequest('/api/ai/generate-additional-risks', requestData);
+        const response = await this.runLongRequest('generate-additional-risks', requestData);
         return response.risks;
     }
 
@@ -189,18 +474,29 @@ class AIService {
      * @param {string} fieldName - Name of the field
      * @param {string} fieldValue - Value of the field
      * @param {Object} context - Additional context
+     * @param {Object} options - {priority: 'background'} when pre-generating
      * @returns {Promise<Object>}
      */
-    async generateJustification(fieldName, fieldValue, context = {}) {
+    async generateJustification(fieldName, fieldValue, context = {}, options = {}) {
         const requestData = {
             fieldName,
             fieldValue,
             context
         };
 
-        const response = await this.makeRequest('/api/ai/generate-justification', requestData);
+        const response = await this.makeRequest('/api/ai/generate-justification', requestData, options);
         return response;
     }
+
+    /**
+     * Generate justifications for many fields in one batched request
+     * @param {Array} items - Array of {key, fieldName, fieldValue, context}
+     * @returns {Promise<Array>} - Array of {key, fieldName, fieldValue, reasoning, sources} in request order
+     */
+    async generateJustifications(items) {
+        const response = await this.makeRequest('/api/ai/generate-justifications', { items }, { priority: 'background' });
+        return response.justifications;
+    }
     /**
      * Generate RekonContext Index details
      * @param {Object} eventData - Event information
@@ -209,12 +505,12 @@ class AIService {
      * @returns {Promise<Array>} - Array of bullet point strings
      */
     async generateRekonContextDetails(eventData, score, level) {
-        const requestData = {
+        const requestData = this.withSession({
             ...eventData,
             score,
             level
-        };
-        const response = await this.makeRequest('/api/ai/generate-rekon-context', requestData);
+        });
+        const response = await this.makeRequest('/api/ai/generate-rekon-context', requestData, { priority: 'background' });
         return response.details;
     }
 
@@ -233,7 +529,7 @@ class AIService {
             score,
             level
         };
-        const response = await this.makeRequest('/api/ai/generate-rekon-risk', requestData);
+        const response = await this.makeRequest('/api/ai/generate-rekon-risk', requestData, { priority: 'background' });
         return response.details;
     }
 
@@ -250,10 +546,47 @@ class AIService {
             risks,
             status
         };
-        const response = await this.makeRequest('/api/ai/generate-rekon-compliance', requestData);
+        const response = await this.makeRequest('/api/ai/generate-rekon-compliance', requestData, { priority: 'background' });
         return response.details;
     }
 
+    /**
+     * Generate the details of several Rekon metrics in one request
+     * @param {Object} eventData - Event information
+     * @param {Array} risks - Array of risk objects
+     * @param {Object} sections - Any of {context: {score, level}, risk: {score, level}, compliance: {status}}
+     * @returns {Promise<Object>} - Array of bullet point strings per requested section
+     */
+    async generateRekonMetricsDetails(eventData, risks, sections) {
+        const requestData = {
+            eventData,
+            risks,
+            ...sections
+        };
+        return this.makeRequest('/api/ai/generate-rekon-metrics', requestData, { priority: 'background' });
+    }
+
+    /**
+     * Drop all background work of the current assessment (the user has moved on)
+     * Aborts the requests in this tab and asks the backend to cancel their model calls.
+     */
+    cancelBackgroundWork() {
+        const workGroup = this.workGroup;
+        this.workGroup = this.newId();
+
+        if (this.backgroundControllers.size === 0) {
+            return;
+        }
+        this.backgroundControllers.forEach(controller => controller.abort());
+        this.backgroundControllers.clear();
+
+        fetch(`${this.backendURL}/api/ai/background/cancel`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ work_group: workGroup })
+        }).catch(error => console.warn('Failed to cancel background work:', error));
+    }
+
 
 
 
@@ -477,7 +477,8 @@ console.log('🚀 MAIN.JS VERSION 2.0 LOADED - REDIRECT FIX ACTIVE');
 
             // API-Only Mode: Always require session parameter
             if (isApiMode && sessionId) {
-                // Load session data and start assessment
+                // Load session data and start assessment (picking up anything the backend prefetched)
+                aiService.sessionId = sessionId;
                 loadSessionData(sessionId).then(eventData => {
                     if (eventData) {
                         startApiModeAssessment(eventData);
@@ -526,6 +527,9 @@ console.log('🚀 MAIN.JS VERSION 2.0 LOADED - REDIRECT FIX ACTIVE');
             const resetScreen2 = () => {
                 riskData = [];
 
+                // Justifications and Rekon details still pending belong to the previous assessment
+                aiService.cancelBackgroundWork();
+
                 // Reset application state
                 updateApplicationState({
                     currentStep: 'setup',
@@ -1196,8 +1200,16 @@ console.log('🚀 MAIN.JS VERSION 2.0 LOADED - REDIRECT FIX ACTIVE');
                     aiStatus.textContent = "AI is generating overview...";
                     progressBar.style.width = '15%';
 
-                    // Generate and display first paragraph
-                    const paragraph1 = await aiService.generateOverviewParagraph(eventData);
+                    // Generate and display first paragraph, streaming text in as it arrives
+                    let paragraph1;
+                    try {
+                        paragraph1 = await aiService.streamOverviewParagraph(eventData, (text) => {
+                            summaryContent.innerHTML = `<p>${text}</p>`;
+                        });
+                    } catch (streamError) {
+                        console.warn('Overview streaming unavailable, falling back:', streamError);
+                        paragraph1 = await aiService.generateOverviewParagraph(eventData);
+                    }
                     summaryContent.innerHTML = `<p>${paragraph1}</p>`;
 
                     // Brief pause to let user see first paragraph
@@ -1214,8 +1226,16 @@ console.log('🚀 MAIN.JS VERSION 2.0 LOADED - REDIRECT FIX ACTIVE');
                     `;
                     progressBar.style.width = '25%';
 
-                    // Generate and add second paragraph
-                    const paragraph2 = await aiService.generateOperationalParagraph(eventData);
+                    // Generate and add second paragraph, streaming text in as it arrives
+                    let paragraph2;
+                    try {
+                        paragraph2 = await aiService.streamOperationalParagraph(eventData, (text) => {
+                            summaryContent.innerHTML = `<p>${paragraph1}</p>\n<p>${text}</p>`;
+                        });
+                    } catch (streamError) {
+                        console.warn('Operational streaming unavailable, falling back:', streamError);
+                        paragraph2 = await aiService.generateOperationalParagraph(eventData);
+                    }
                     summaryContent.innerHTML = `<p>${paragraph1}</p>\n<p>${paragraph2}</p>`;
 
                     // Update state to indicate summary is generated
@@ -1798,15 +1818,20 @@ console.log('🚀 MAIN.JS VERSION 2.0 LOADED - REDIRECT FIX ACTIVE');
                     description: descriptionInput.value.trim()
                 };
 
-                // Generate AI content for RekonRisk details
-                try {
-                    aiStatus.textContent = 'AI is generating comprehensive risk analysis...';
-                    progressBar.style.width = '95%';
-
-                    rekonRiskLoader.classList.remove('hidden');
-                    rekonRiskDescription.innerHTML = '';
+                // Generate AI content for the RekonRisk and RekonCompliance details in one request
+                aiStatus.textContent = 'AI is generating comprehensive risk analysis...';
+                progressBar.style.width = '95%';
+                rekonRiskLoader.classList.remove('hidden');
+                rekonRiskDescription.innerHTML = '';
+                rekonComplianceLoader.classList.remove('hidden');
+                rekonComplianceDescription.innerHTML = '';
+                const aiMetricsDetails = aiService.generateRekonMetricsDetails(eventData, allThreeTableRisks, {
+                    risk: { score, level: levelInfo.level },
+                    compliance: { status: compliance.status }
+                });
 
-                    const aiRiskDetails = await aiService.generateRekonRiskDetails(eventData, allThreeTableRisks, score, levelInfo.level);
+                try {
+                    const aiRiskDetails = (await aiMetricsDetails).risk;
 
                     // Display score/level with AI content simultaneously
                     rekonRiskLoader.classList.add('hidden');
@@ -1838,15 +1863,12 @@ console.log('🚀 MAIN.JS VERSION 2.0 LOADED - REDIRECT FIX ACTIVE');
                     rekonRiskDescription.innerHTML = riskDescHtml;
                 }
 
-                // Generate AI content for RekonCompliance details
+                // Show the RekonCompliance details from the same request
                 try {
                     aiStatus.textContent = 'AI is generating compliance analysis...';
                     progressBar.style.width = '98%';
 
-                    rekonComplianceLoader.classList.remove('hidden');
-                    rekonComplianceDescription.innerHTML = '';
-
-                    const aiComplianceDetails = await aiService.generateRekonComplianceDetails(eventData, allThreeTableRisks, compliance.status);
+                    const aiComplianceDetails = (await aiMetricsDetails).compliance;
 
                     // Display status/icon with AI content simultaneously
                     rekonComplianceLoader.classList.add('hidden');
@@ -2072,15 +2094,20 @@ console.log('🚀 MAIN.JS VERSION 2.0 LOADED - REDIRECT FIX ACTIVE');
                     description: descriptionInput.value.trim()
                 };
 
-                // Generate AI content for RekonRisk details
-                try {
-                    aiStatus.textContent = 'AI is generating risk analysis...';
-                    progressBar.style.width = '95%';
-
-                    rekonRiskLoader.classList.remove('hidden');
-                    rekonRiskDescription.innerHTML = '';
+                // Generate AI content for the RekonRisk and RekonCompliance details in one request
+                aiStatus.textContent = 'AI is generating risk analysis...';
+                progressBar.style.width = '95%';
+                rekonRiskLoader.classList.remove('hidden');
+                rekonRiskDescription.innerHTML = '';
+                rekonComplianceLoader.classList.remove('hidden');
+                rekonComplianceDescription.innerHTML = '';
+                const aiMetricsDetails = aiService.generateRekonMetricsDetails(eventData, riskData, {
+                    risk: { score, level: levelInfo.level },
+                    compliance: { status: compliance.status }
+                });
 
-                    const aiRiskDetails = await aiService.generateRekonRiskDetails(eventData, riskData, score, levelInfo.level);
+                try {
+                    const aiRiskDetails = (await aiMetricsDetails).risk;
 
                     // Display score/level with AI content simultaneously
                     rekonRiskLoader.classList.add('hidden');
@@ -2112,15 +2139,12 @@ console.log('🚀 MAIN.JS VERSION 2.0 LOADED - REDIRECT FIX ACTIVE');
                     rekonRiskDescription.innerHTML = riskDescHtml;
                 }
 
-                // Generate AI content for RekonCompliance details
+                // Show the RekonCompliance details from the same request
                 try {
                     aiStatus.textContent = 'AI is generating compliance analysis...';
                     progressBar.style.width = '98%';
 
-                    rekonComplianceLoader.classList.remove('hidden');
-                    rekonComplianceDescription.innerHTML = '';
-
-                    const aiComplianceDetails = await aiService.generateRekonComplianceDetails(eventData, riskData, compliance.status);
+                    const aiComplianceDetails = (await aiMetricsDetails).compliance;
 
                     // Display status/icon with AI content simultaneously
                     rekonComplianceLoader.classList.add('hidden');
@@ -2271,29 +2295,34 @@ console.log('🚀 MAIN.JS VERSION 2.0 LOADED - REDIRECT FIX ACTIVE');
                     { name: 'Mitigations', value: riskData.mitigation, key: 'mitigation' }
                 ];
 
-                // Generate justifications asynchronously without blocking UI
-                fieldsToPreGenerate.forEach(async (field) => {
-                    try {
-                        const justification = await aiService.generateJustification(
-                            field.name,
-                            field.value,
-                            context
-                        );
-
-                        // Store the justification
-                        if (!riskData.justifications) {
-                            riskData.justifications = {};
-                        }
-                        riskData.justifications[field.key] = {
+                // Generate all field justifications in one batched request without blocking UI
+                const items = fieldsToPreGenerate
+                    .filter(field => field.value)
+                    .map(field => ({
+                        key: field.key,
+                        fieldName: field.name,
+                        fieldValue: field.value,
+                        context
+                    }));
+
+                try {
+                    const justifications = await aiService.generateJustifications(items);
+
+                    // Store the justifications
+                    if (!riskData.justifications) {
+                        riskData.justifications = {};
+                    }
+                    justifications.forEach(justification => {
+                        riskData.justifications[justification.key] = {
                             reasoning: justification.reasoning,
                             sources: justification.sources
                         };
+                    });
 
-                        console.log(`🔄 Pre-generated justification for ${field.name} = "${field.value}"`);
-                    } catch (error) {
-                        console.error(`Error pre-generating justification for ${field.name}:`, error);
-                    }
-                });
+                    console.log(`🔄 Pre-generated ${justifications.length} justifications for risk "${riskData.risk}"`);
+                } catch (error) {
+                    console.error('Error pre-generating justifications:', error);
+                }
             };
 
             // Pre-generate summary justification in background
@@ -2302,7 +2331,8 @@ console.log('🚀 MAIN.JS VERSION 2.0 LOADED - REDIRECT FIX ACTIVE');
                     const justification = await aiService.generateJustification(
                         'Contextual Summary',
                         summaryContent.innerHTML,
-                        eventData
+                        eventData,
+                        { priority: 'background' }
                     );
 
                     // Store the justification in application state
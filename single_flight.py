@@ -0,0 +1,158 @@
+"""
+Single-flight request coalescing for AIREKON LLM calls
+Concurrent identical requests attach to one pending upstream call and all
+receive its result - within a worker via the shared event loop, and
+optionally across workers through a lease table next to the disk cache
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces identical in-flight coroutines on one event loop"""
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def run(self, key, factory, cancel_if_abandoned=False):
+        """Await the pending call for key, or start one with factory()
+
+        With cancel_if_abandoned (set by the caller that starts the call), the
+        call is cancelled once every caller waiting on it has been cancelled.
+        """
+        entry = self.calls.get(key)
+        if entry is None:
+            entry = {'task': asyncio.ensure_future(factory()), 'waiters': 0, 'cancel_if_abandoned': cancel_if_abandoned}
+            self.calls[key] = entry
+            entry['task'].add_done_callback(lambda _: self.calls.pop(key, None))
+            with self.lock:
+                self.leaders += 1
+        else:
+            with self.lock:
+                self.coalesced += 1
+
+        entry['waiters'] += 1
+        try:
+            # Shield so one caller giving up doesn't cancel the call for everyone else
+            return await asyncio.shield(entry['task'])
+        except asyncio.CancelledError:
+            if entry['cancel_if_abandoned'] and entry['waiters'] == 1 and not entry['task'].done():
+                entry['task'].cancel()
+                with self.lock:
+                    self.abandoned += 1
+            raise
+        finally:
+            entry['waiters'] -= 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'in_flight': len(self.calls),
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'abandoned': self.abandoned
+            }
+
+
+class SQLiteLeaseTable:
+    """Host-wide in-flight leases so workers can wait for each other's identical calls
+
+    The worker holding the lease makes the upstream call and writes the result
+    to the shared disk cache; other workers poll that cache until the lease is
+    released or expires. The async methods run their SQLite I/O on worker
+    threads, so a busy database never stalls the event loop.
+    """
+
+    def __init__(self, path, lease_seconds=60, poll_interval=0.05):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.waits = 0
+        self.wait_hits = 0
+
+        connection = self._connection()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS inflight (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def _connection(self):
+        """One connection per thread (and per process after a fork)"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    async def acquire(self, key):
+        """Try to take the lease for key; True if this worker should make the call"""
+        return await asyncio.to_thread(self._acquire, key)
+
+    async def release(self, key):
+        """Give up the lease for key"""
+        await asyncio.to_thread(self._release, key)
+
+    def _acquire(self, key):
+        now = time.time()
+        connection = self._connection()
+        connection.execute("DELETE FROM inflight WHERE key = ? AND expires_at <= ?", (key, now))
+        cursor = connection.execute(
+            "INSERT OR IGNORE INTO inflight (key, owner, expires_at) VALUES (?, ?, ?)",
+            (key, str(os.getpid()), now + self.lease_seconds)
+        )
+        return cursor.rowcount == 1
+
+    def _release(self, key):
+        self._connection().execute(
+            "DELETE FROM inflight WHERE key = ? AND owner = ?", (key, str(os.getpid()))
+        )
+
+    async def wait_for(self, key, lookup):
+        """Wait for another worker's result to land in the shared cache; None if its lease lapses"""
+        with self.lock:
+            self.waits += 1
+
+        deadline = time.time() + self.lease_seconds
+        while time.time() < deadline:
+            value = await asyncio.to_thread(lookup, key)
+            if value is not None:
+                with self.lock:
+                    self.wait_hits += 1
+                return value
+
+            if not await asyncio.to_thread(self._held, key):
+                # The owner finished without caching (e.g. it failed) - last look, then go ourselves
+                return await asyncio.to_thread(lookup, key)
+
+            await asyncio.sleep(self.poll_interval)
+        return None
+
+    def _held(self, key):
+        return self._connection().execute(
+            "SELECT 1 FROM inflight WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone() is not None
+
+    def stats(self):
+        with self.lock:
+            return {
+                'cross_worker_waits': self.waits,
+                'cross_worker_hits': self.wait_hits
+            }
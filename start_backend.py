@@ -4,6 +4,7 @@ Startup script for aiRekon Risk Assessment Backend
 """
 
 import os
+import re
 import sys
 import subprocess
 from pathlib import Path
@@ -32,6 +33,10 @@ def check_env_file():
     
     with open(env_path, 'r') as f:
         content = f.read()
+        provider = re.search(r'^LLM_PROVIDER=(\S+)', content, re.MULTILINE)
+        if provider and provider.group(1) != 'openai':
+            print("✅ .env file configured for a non-OpenAI LLM provider")
+            return True
         if 'OPENAI_API_KEY=' not in content or 'YOUR_API_KEY_HERE' in content:
             print("❌ OpenAI API key not properly configured in .env file")
             print("💡 Please set OPENAI_API_KEY=your-actual-api-key in .env file")
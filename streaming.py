@@ -0,0 +1,60 @@
+"""
+Server-Sent Events helpers for progressive AI content
+Formats SSE frames and picks complete JSON objects out of a token stream
+"""
+
+import json
+
+
+def format_sse(event, data):
+    """Format a single Server-Sent Events frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class JSONObjectStream:
+    """Incrementally extracts top-level JSON objects from streamed text
+
+    Text is fed chunk by chunk; every time an outermost {...} object closes
+    its source text is returned, so a risk can be shown before the model has
+    finished writing the ones after it. Anything outside objects (array
+    brackets, commas, code fences) is ignored.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.buffer = []
+
+    def feed(self, text):
+        """Consume a chunk of text and return the objects completed by it"""
+        completed = []
+        for char in text:
+            if self.depth == 0:
+                if char == '{':
+                    self.depth = 1
+                    self.buffer = [char]
+                continue
+
+            self.buffer.append(char)
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char == '{':
+                self.depth += 1
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    completed.append(''.join(self.buffer))
+                    self.buffer = []
+
+        return completed
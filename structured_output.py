@@ -0,0 +1,298 @@
+"""
+Structured (JSON) model output for AIREKON
+JSON schemas for schema-constrained completions, a tolerant parser that
+repairs fenced, chatty or truncated JSON, and parse/retry counters
+"""
+
+import re
+import json
+import threading
+
+RISK_CATEGORIES = ['Crowd Safety', 'Environmental', 'Security', 'Medical', 'Operational', 'Logistics']
+
+RISK_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'id': {'type': 'integer'},
+        'risk': {'type': 'string'},
+        'category': {'type': 'string', 'enum': RISK_CATEGORIES},
+        'impact': {'type': 'integer', 'enum': [1, 2, 3, 4, 5]},
+        'likelihood': {'type': 'integer', 'enum': [1, 2, 3, 4, 5]},
+        'mitigation': {'type': 'string'}
+    },
+    'required': ['id', 'risk', 'category', 'impact', 'likelihood', 'mitigation'],
+    'additionalProperties': False
+}
+
+# Schema-constrained output must be an object at the top level, so lists are wrapped
+RISK_LIST_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'risks': {'type': 'array', 'items': RISK_SCHEMA}
+    },
+    'required': ['risks'],
+    'additionalProperties': False
+}
+
+DETAILS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'details': {'type': 'array', 'items': {'type': 'string'}}
+    },
+    'required': ['details'],
+    'additionalProperties': False
+}
+
+# One entry per numbered field of a batch justification prompt
+JUSTIFICATIONS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'justifications': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'field': {'type': 'integer'},
+                    'reasoning': {'type': 'string'},
+                    'sources': {'type': 'array', 'items': {'type': 'string'}}
+                },
+                'required': ['field', 'reasoning', 'sources'],
+                'additionalProperties': False
+            }
+        }
+    },
+    'required': ['justifications'],
+    'additionalProperties': False
+}
+
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a completion can't be turned into the expected JSON shape"""
+
+
+def json_schema_format(name, schema):
+    """response_format argument asking the provider for JSON matching schema"""
+    return {
+        'type': 'json_schema',
+        'json_schema': {'name': name, 'strict': True, 'schema': schema}
+    }
+
+
+def schema_errors(value, schema, path='$'):
+    """Differences between value and the subset of JSON Schema used above (empty list when valid)"""
+    expected = schema.get('type')
+    checks = {
+        'object': lambda v: isinstance(v, dict),
+        'array': lambda v: isinstance(v, list),
+        'string': lambda v: isinstance(v, str),
+        'integer': lambda v: isinstance(v, int) and not isinstance(v, bool)
+    }
+    if expected in checks and not checks[expected](value):
+        return [f"{path}: expected {expected}"]
+    if 'enum' in schema and value not in schema['enum']:
+        return [f"{path}: {value!r} not one of {schema['enum']}"]
+
+    errors = []
+    if expected == 'object':
+        properties = schema.get('properties', {})
+        errors += [f"{path}.{name}: missing" for name in schema.get('required', []) if name not in value]
+        if schema.get('additionalProperties') is False:
+            errors += [f"{path}.{name}: not allowed" for name in value if name not in properties]
+        for name, child in properties.items():
+            if name in value:
+                errors += schema_errors(value[name], child, f"{path}.{name}")
+    elif expected == 'array' and 'items' in schema:
+        for index, item in enumerate(value):
+            errors += schema_errors(item, schema['items'], f"{path}[{index}]")
+    return errors
+
+
+def parse_json_response(content):
+    """Parse model output as JSON, repairing it where needed
+
+    Handles markdown fences, prose around the JSON, trailing commas and output
+    cut off by max_tokens. Returns (value, repaired) and raises
+    StructuredOutputError when nothing usable is left.
+    """
+    text = (content or '').strip()
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    fence = re.search(r'```(?:json)?\s*(.*?)(?:```|$)', text, re.DOTALL)
+    if fence:
+        text = fence.group(1).strip()
+
+    starts = [index for index in (text.find('{'), text.find('[')) if index >= 0]
+    if not starts:
+        raise StructuredOutputError('No JSON object or array in response')
+    text = text[min(starts):]
+
+    for candidate in _repair_candidates(text):
+        try:
+            return json.loads(candidate), True
+        except json.JSONDecodeError:
+            continue
+
+    raise StructuredOutputError('Response is not valid or repairable JSON')
+
+
+def _repair_candidates(text):
+    """Yield progressively more aggressive repairs of JSON text that starts at its first bracket"""
+    closers = []
+    commas = []
+    in_string = False
+    escaped = False
+
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            closers.append('}' if char == '{' else ']')
+        elif char in '}]':
+            if closers and closers[-1] == char:
+                closers.pop()
+            if not closers:
+                # A complete value - anything after it is commentary
+                complete = text[:index + 1]
+                yield complete
+                yield _drop_trailing_commas(complete)
+                return
+        elif char == ',':
+            commas.append((index, list(closers)))
+
+    # Truncated output: close the open string and brackets
+    tail = text[:-1] if escaped else text
+    if in_string:
+        tail += '"'
+    yield _drop_trailing_commas(tail.rstrip().rstrip(',') + ''.join(reversed(closers)))
+
+    # Otherwise cut back to the last complete member and close from there
+    for index, open_closers in reversed(commas):
+        yield _drop_trailing_commas(text[:index] + ''.join(reversed(open_closers)))
+
+
+def _drop_trailing_commas(text):
+    return re.sub(r',\s*([}\]])', r'\1', text)
+
+
+def coerce_risk(value):
+    """Return the risk object from a parsed completion"""
+    if isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    if isinstance(value, dict) and isinstance(value.get('risks'), list) and len(value['risks']) == 1:
+        value = value['risks'][0]
+    if not isinstance(value, dict) or not str(value.get('risk') or '').strip():
+        raise StructuredOutputError('Expected a risk object with a description')
+    return value
+
+
+def coerce_risk_list(value):
+    """Return the list of risk objects from a parsed completion"""
+    if isinstance(value, dict):
+        value = value.get('risks')
+    if not isinstance(value, list) or not value:
+        raise StructuredOutputError('Expected a non-empty array of risks')
+    risks = [risk for risk in value if isinstance(risk, dict) and str(risk.get('risk') or '').strip()]
+    if not risks:
+        raise StructuredOutputError('No usable risks in array')
+    return risks
+
+
+def coerce_details(value, count=3):
+    """Return exactly count detail strings from a parsed completion"""
+    if isinstance(value, dict):
+        value = value.get('details')
+    if not isinstance(value, list):
+        raise StructuredOutputError(f"Expected array of {count} strings")
+    details = [str(detail).strip() for detail in value if isinstance(detail, str) and detail.strip()]
+    if len(details) < count:
+        raise StructuredOutputError(f"Expected array of {count} strings")
+    return details[:count]
+
+
+def details_sections_schema(sections):
+    """Schema for an object holding one array of detail strings per section"""
+    return {
+        'type': 'object',
+        'properties': {section: DETAILS_SCHEMA['properties']['details'] for section in sections},
+        'required': list(sections),
+        'additionalProperties': False
+    }
+
+
+def coerce_details_sections(value, sections, count=3):
+    """Return {section: details} for every section of a parsed completion that has count usable strings"""
+    if not isinstance(value, dict):
+        raise StructuredOutputError('Expected an object of detail arrays')
+    details = {}
+    for section in sections:
+        try:
+            details[section] = coerce_details(value.get(section), count)
+        except StructuredOutputError:
+            continue
+    if not details:
+        raise StructuredOutputError(f"No usable detail arrays for {', '.join(sections)}")
+    return details
+
+
+class StructuredOutputStats:
+    """Thread-safe per-endpoint counts of parse outcomes and retried completions"""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.lock = threading.Lock()
+
+    def _counters(self, endpoint):
+        return self.endpoints.setdefault(endpoint or 'unknown', {
+            'completions': 0,
+            'parsed': 0,
+            'repaired': 0,
+            'failed': 0,
+            'retries': 0
+        })
+
+    def record(self, endpoint, outcome):
+        """Count one completion as 'parsed', 'repaired' or 'failed'"""
+        with self.lock:
+            counters = self._counters(endpoint)
+            counters['completions'] += 1
+            counters[outcome] += 1
+
+    def record_retry(self, endpoint):
+        """Count a completion re-requested because the previous one was unusable"""
+        with self.lock:
+            self._counters(endpoint)['retries'] += 1
+
+    def stats(self):
+        """Per-endpoint counts with failure and retry rates"""
+        with self.lock:
+            endpoints = {}
+            for endpoint, counters in self.endpoints.items():
+                completions = counters['completions']
+                endpoints[endpoint] = dict(counters)
+                endpoints[endpoint]['failure_rate'] = round(counters['failed'] / completions, 4) if completions else 0.0
+                endpoints[endpoint]['retry_rate'] = round(counters['retries'] / completions, 4) if completions else 0.0
+
+        completions = sum(counters['completions'] for counters in endpoints.values())
+        failed = sum(counters['failed'] for counters in endpoints.values())
+        retries = sum(counters['retries'] for counters in endpoints.values())
+        return {
+            'endpoints': endpoints,
+            'completions': completions,
+            'failed': failed,
+            'retries': retries,
+            'failure_rate': round(failed / completions, 4) if completions else 0.0,
+            'retry_rate': round(retries / completions, 4) if completions else 0.0
+        }
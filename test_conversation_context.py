@@ -0,0 +1,61 @@
+"""
+Unit tests for conversation_context.py (token-capped conversation windows)
+"""
+
+from conversation_context import ConversationContextManager, count_message_tokens, compact_turn_prompt
+
+
+def conversation(turns):
+    messages = [
+        {'role': 'system', 'content': 'You are a risk assessor.'},
+        {'role': 'user', 'content': 'Event: summer festival in the park.'}
+    ]
+    for index in range(turns):
+        messages += [
+            {'role': 'user', 'content': f'Generate risk #{index + 1}\nCovered so far: ' + 'crowd safety, ' * 20},
+            {'role': 'assistant', 'content': f'{{"id": {index + 1}, "risk": "risk {index + 1}"}}'}
+        ]
+    return messages + [{'role': 'user', 'content': f'Generate risk #{turns + 1}'}]
+
+
+def test_head_and_prompt_are_always_kept():
+    messages = conversation(5)
+    window, _ = ConversationContextManager(max_prompt_tokens=1).build(messages)
+
+    assert window == messages[:2] + [messages[-1]]
+
+
+def test_only_recent_turns_are_replayed():
+    messages = conversation(6)
+    window, tokens = ConversationContextManager(max_prompt_tokens=10000, recent_turns=2).build(messages)
+
+    assert len(window) == 2 + 4 + 1
+    assert window[3]['content'] == '{"id": 5, "risk": "risk 5"}'
+    assert window[5]['content'] == '{"id": 6, "risk": "risk 6"}'
+    assert tokens == count_message_tokens(window)
+
+
+def test_replayed_prompts_are_compacted():
+    messages = conversation(2)
+    window, _ = ConversationContextManager(max_prompt_tokens=10000).build(messages)
+
+    assert window[2] == {'role': 'user', 'content': 'Generate risk #1'}
+    assert compact_turn_prompt(window[3]) is window[3]
+
+
+def test_turns_are_dropped_to_fit_the_budget():
+    messages = conversation(4)
+    manager = ConversationContextManager(recent_turns=4)
+    pinned = count_message_tokens(messages[:2] + [messages[-1]])
+    turn = count_message_tokens([compact_turn_prompt(messages[-3]), messages[-2]])
+    manager.max_prompt_tokens = pinned + turn
+
+    window, tokens = manager.build(messages)
+    assert window == messages[:2] + [compact_turn_prompt(messages[-3]), messages[-2], messages[-1]]
+    assert tokens <= manager.max_prompt_tokens
+
+
+def test_prompt_size_stays_flat_as_the_conversation_grows():
+    manager = ConversationContextManager(max_prompt_tokens=10000, recent_turns=2)
+
+    assert manager.build(conversation(20))[1] == manager.build(conversation(40))[1]
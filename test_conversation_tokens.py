@@ -0,0 +1,72 @@
+"""
+Unit tests for conversation_tokens.py (signed, stateless conversation tokens)
+"""
+
+import json
+import time
+import zlib
+import pytest
+
+from conversation_tokens import ConversationTokens, InvalidConversationToken, _b64encode, _b64decode
+
+
+STATE = {'event_data': {'eventTitle': 'Summer Festival'}, 'generated_risks': [{'id': 1, 'risk': 'Crowd crush'}]}
+
+
+def test_state_round_trips():
+    tokens = ConversationTokens('secret')
+    state, started_at = tokens.decode(tokens.encode(STATE, started_at=100.0))
+
+    assert state == STATE
+    assert started_at == 100.0
+
+
+def test_tampered_payload_is_rejected():
+    tokens = ConversationTokens('secret')
+    version, payload, signature = tokens.encode(STATE).split('.')
+    envelope = json.loads(zlib.decompress(_b64decode(payload)))
+    envelope['state']['generated_risks'] = []
+    forged = _b64encode(zlib.compress(json.dumps(envelope).encode('utf-8')))
+
+    with pytest.raises(InvalidConversationToken):
+        tokens.decode(f"{version}.{forged}.{signature}")
+
+
+def test_token_signed_with_another_secret_is_rejected():
+    with pytest.raises(InvalidConversationToken):
+        ConversationTokens('secret').decode(ConversationTokens('other').encode(STATE))
+
+
+@pytest.mark.parametrize('token', [None, '', 'v1.abc', 'v1.é.sig', 'v2.abc.def', 'not-a-token'])
+def test_malformed_tokens_are_rejected(token):
+    with pytest.raises(InvalidConversationToken):
+        ConversationTokens('secret').decode(token)
+
+
+def test_idle_token_expires():
+    tokens = ConversationTokens('secret', idle_ttl=60)
+    token = tokens.encode(STATE)
+    tokens.decode(token)
+
+    tokens.idle_ttl = 0.01
+    time.sleep(0.02)
+    with pytest.raises(InvalidConversationToken):
+        tokens.decode(token)
+
+
+def test_conversation_expires_at_max_age_even_with_fresh_tokens():
+    tokens = ConversationTokens('secret', max_age=60)
+    token = tokens.encode(STATE, started_at=time.time() - 61)
+
+    with pytest.raises(InvalidConversationToken):
+        tokens.decode(token)
+
+
+def test_oversized_state_is_rejected():
+    tokens = ConversationTokens('secret', max_bytes=1024)
+    # Compresses to a short token but would inflate past max_bytes
+    token = tokens.encode({'padding': 'x' * 100000})
+
+    assert len(token) < 1024
+    with pytest.raises(InvalidConversationToken):
+        tokens.decode(token)
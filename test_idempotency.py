@@ -0,0 +1,99 @@
+"""
+Unit tests for idempotency.py and the Idempotency-Key request hooks in app.py
+"""
+
+import os
+import threading
+import pytest
+
+os.environ.setdefault('LLM_PROVIDER', 'fake')
+
+import app as app_module
+from idempotency import IdempotencyStore, IdempotencyConflict
+
+
+def test_completed_request_is_replayed():
+    store = IdempotencyStore()
+    assert store.begin('key', 'body') is None
+    store.complete('key', 200, {'Content-Type': 'application/json'}, b'{}')
+
+    assert store.begin('key', 'body') == (200, {'Content-Type': 'application/json'}, b'{}')
+    assert store.stats()['replays'] == 1
+
+
+def test_key_reused_for_another_request_is_rejected():
+    store = IdempotencyStore()
+    store.begin('key', 'body')
+
+    with pytest.raises(IdempotencyConflict) as raised:
+        store.begin('key', 'other body')
+    assert raised.value.status_code == 422
+
+
+def test_retry_waits_for_the_running_original():
+    store = IdempotencyStore(wait_seconds=2)
+    store.begin('key', 'body')
+    threading.Timer(0.05, store.complete, ('key', 201, {}, b'done')).start()
+
+    assert store.begin('key', 'body') == (201, {}, b'done')
+
+
+def test_retry_gives_up_on_a_stuck_original():
+    store = IdempotencyStore(wait_seconds=0.05)
+    store.begin('key', 'body')
+
+    with pytest.raises(IdempotencyConflict) as raised:
+        store.begin('key', 'body')
+    assert raised.value.status_code == 409
+
+
+def test_released_key_runs_again():
+    store = IdempotencyStore()
+    store.begin('key', 'body')
+    store.release('key')
+
+    assert store.begin('key', 'body') is None
+
+
+def test_expired_records_are_pruned():
+    store = IdempotencyStore(ttl_seconds=0)
+    store.begin('key', 'body')
+    store.complete('key', 200, {}, b'')
+
+    assert store.begin('key', 'body') is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module, 'idempotency_store', IdempotencyStore())
+    return app_module.app.test_client()
+
+
+def test_keyed_response_is_replayed(client):
+    headers = {'Idempotency-Key': 'abc'}
+    first = client.post('/api/ai/generate-justifications', json={'items': []}, headers=headers)
+    second = client.post('/api/ai/generate-justifications', json={'items': []}, headers=headers)
+
+    assert first.status_code == second.status_code == 400
+    assert second.get_json() == first.get_json()
+    assert second.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_key_is_released_after_a_server_error(client, monkeypatch):
+    headers = {'Idempotency-Key': 'abc'}
+    items = [{'fieldName': 'Impact', 'fieldValue': '4', 'context': {}}]
+
+    def fail(items):
+        raise RuntimeError('boom')
+
+    async def answer(items):
+        return [{'reasoning': 'because', 'sources': []} for _ in items]
+
+    monkeypatch.setattr(app_module, 'agenerate_justification_batch', fail)
+    assert client.post('/api/ai/generate-justifications', json={'items': items}, headers=headers).status_code == 500
+
+    monkeypatch.setattr(app_module, 'agenerate_justification_batch', answer)
+    retry = client.post('/api/ai/generate-justifications', json={'items': items}, headers=headers)
+    assert retry.status_code == 200
+    assert 'Idempotent-Replayed' not in retry.headers
+    assert retry.get_json()['justifications'][0]['reasoning'] == 'because'
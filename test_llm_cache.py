@@ -0,0 +1,73 @@
+"""
+Unit tests for llm_cache.py (memory, disk and tiered response caches)
+"""
+
+import time
+
+from llm_cache import ResponseCache, DiskResponseCache, TieredResponseCache, make_cache_key
+
+
+def test_cache_key_covers_the_whole_request():
+    messages = [{'role': 'user', 'content': 'hi'}]
+    key = make_cache_key('gpt-4', messages, 0.7, 100)
+
+    assert key == make_cache_key('gpt-4', [dict(messages[0])], 0.7, 100)
+    assert key != make_cache_key('gpt-4', messages, 0.2, 100)
+    assert key != make_cache_key('gpt-4', messages, 0.7, 100, response_format={'type': 'json_object'})
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', '1')
+    cache.set('b', '2')
+    cache.get('a')
+    cache.set('c', '3')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == '1'
+    assert cache.get('c') == '3'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_memory_cache_expires_entries():
+    cache = ResponseCache(max_entries=4, ttl_seconds=0.02)
+    cache.set('a', '1')
+    time.sleep(0.03)
+
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_disk_cache_evicts_past_its_caps(tmp_path):
+    cache = DiskResponseCache(str(tmp_path / 'cache.db'), max_entries=5, evict_every=1)
+    for index in range(8):
+        cache.set(f'key-{index}', 'value')
+
+    assert cache.stats()['entries'] <= 5
+    assert cache.get('key-7') == 'value'
+    assert cache.get('key-0') is None
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    disk = DiskResponseCache(str(tmp_path / 'cache.db'))
+    disk.set('key', 'value')
+    cache = TieredResponseCache(ResponseCache(max_entries=4), disk)
+
+    assert cache.get('key') == 'value'
+    assert cache.memory.get('key') == 'value'
+    assert cache.stats()['disk']['hits'] == 1
+
+
+def test_warm_start_loads_the_most_recent_entries(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    previous = DiskResponseCache(path)
+    for index in range(5):
+        previous.set(f'key-{index}', f'value-{index}')
+        time.sleep(0.002)
+
+    cache = TieredResponseCache(ResponseCache(max_entries=3), DiskResponseCache(path))
+    assert cache.warm(10) == 3
+
+    assert sorted(cache.memory.entries) == ['key-2', 'key-3', 'key-4']
+    # The most recently used entry sits at the MRU end
+    assert list(cache.memory.entries)[-1] == 'key-4'
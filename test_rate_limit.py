@@ -0,0 +1,89 @@
+"""
+Unit tests for rate_limit.py (token buckets and the admission controller)
+"""
+
+import asyncio
+import sqlite3
+import pytest
+
+from rate_limit import (
+    AdmissionController, LocalBuckets, SQLiteBuckets, RateLimited, INTERACTIVE, BACKGROUND
+)
+
+
+def test_buckets_report_the_wait_for_capacity():
+    buckets = LocalBuckets(requests_per_minute=60, burst_seconds=2)
+
+    assert buckets.try_take({'requests': 2, 'tokens': 0}) == 0
+    assert buckets.try_take({'requests': 1, 'tokens': 0}) == pytest.approx(1, abs=0.05)
+
+
+def test_unused_tokens_are_refunded():
+    buckets = LocalBuckets(tokens_per_minute=600, burst_seconds=10)
+
+    buckets.try_take({'requests': 1, 'tokens': 80})
+    buckets.refund({'tokens': 50})
+    assert buckets.levels()['tokens'] == pytest.approx(70, abs=0.5)
+
+
+def test_interactive_calls_overtake_queued_background_calls():
+    controller = AdmissionController(LocalBuckets(), max_concurrency=1)
+    order = []
+
+    async def run():
+        held = await controller.acquire(10, priority=BACKGROUND)
+
+        async def call(name, priority):
+            permit = await controller.acquire(10, priority=priority)
+            order.append(name)
+            await controller.release(permit)
+
+        background = asyncio.ensure_future(call('background', BACKGROUND))
+        await asyncio.sleep(0.01)
+        interactive = asyncio.ensure_future(call('interactive', INTERACTIVE))
+        await asyncio.sleep(0.01)
+        await controller.release(held)
+        await asyncio.gather(background, interactive)
+
+    asyncio.run(run())
+    assert order == ['interactive', 'background']
+
+
+def test_background_calls_leave_the_interactive_reserve_free():
+    controller = AdmissionController(LocalBuckets(), max_concurrency=2, max_wait=0.05, interactive_reserve=1)
+
+    async def run():
+        await controller.acquire(10, priority=BACKGROUND)
+        with pytest.raises(RateLimited):
+            await controller.acquire(10, priority=BACKGROUND)
+        await controller.acquire(10, priority=INTERACTIVE)
+
+    asyncio.run(run())
+    stats = controller.stats()['priorities']
+    assert stats[BACKGROUND]['shed'] == 1
+    assert stats[INTERACTIVE]['in_flight'] == 1
+
+
+def test_calls_are_shed_when_the_queue_would_outlast_max_wait():
+    controller = AdmissionController(LocalBuckets(tokens_per_minute=60, burst_seconds=1), max_wait=0.5)
+
+    async def run():
+        await controller.acquire(1)
+        await controller.acquire(30)
+
+    with pytest.raises(RateLimited) as raised:
+        asyncio.run(run())
+    assert raised.value.retry_after >= 1
+
+
+def test_sqlite_buckets_are_shared_and_read_without_writing(tmp_path):
+    path = str(tmp_path / 'buckets.db')
+    first = SQLiteBuckets(path, requests_per_minute=60, burst_seconds=10)
+    second = SQLiteBuckets(path, requests_per_minute=60, burst_seconds=10)
+
+    assert second.levels() == {'requests': 10.0}
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0] == 0
+
+    assert first.try_take({'requests': 4, 'tokens': 0}) == 0
+    assert second.levels()['requests'] == pytest.approx(6, abs=0.1)
+    assert second.projected_wait({'requests': 10, 'tokens': 0}) == pytest.approx(4, abs=0.1)
@@ -0,0 +1,166 @@
+"""
+Unit tests for resilience.py (retries, deadlines and the circuit breaker)
+"""
+
+import time
+import asyncio
+import pytest
+
+from resilience import (
+    RetryPolicy, CircuitBreaker, ResilientCaller, CircuitOpenError, DeadlineExceeded
+)
+
+
+class UpstreamError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"upstream {status_code}")
+        self.status_code = status_code
+
+
+def flaky(*outcomes):
+    """Factory returning each outcome in turn (exceptions are raised)"""
+    calls = []
+
+    async def factory():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return factory, calls
+
+
+def make_caller(max_attempts=3, failure_threshold=5, reset_seconds=30, attempt_timeout=None):
+    breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_seconds=reset_seconds)
+    return ResilientCaller(RetryPolicy(max_attempts, base_delay=0.001, max_delay=0.001), breaker, attempt_timeout)
+
+
+def test_retries_transient_errors_until_success():
+    caller = make_caller()
+    factory, calls = flaky(UpstreamError(503), UpstreamError(429), 'ok')
+
+    assert asyncio.run(caller.call(factory)) == 'ok'
+    assert len(calls) == 3
+    assert caller.stats()['retries'] == 2
+    assert caller.breaker.state() == 'closed'
+
+
+def test_does_not_retry_client_errors():
+    caller = make_caller()
+    factory, calls = flaky(UpstreamError(400), 'ok')
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(caller.call(factory))
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_attempts():
+    caller = make_caller(max_attempts=2)
+    factory, calls = flaky(UpstreamError(503), UpstreamError(503), 'ok')
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(caller.call(factory))
+    assert len(calls) == 2
+    assert caller.stats()['failures'] == 1
+
+
+def test_spent_deadline_never_calls_upstream():
+    caller = make_caller()
+    factory, calls = flaky('ok')
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(caller.call(factory, deadline=time.monotonic() - 1))
+    assert calls == []
+
+
+def test_slow_call_is_cut_off_at_the_deadline():
+    caller = make_caller()
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(caller.call(slow, deadline=time.monotonic() + 0.05))
+    assert time.monotonic() - started < 0.5
+    # Running out of our own budget says nothing about upstream health
+    assert caller.breaker.stats()['consecutive_failures'] == 0
+
+
+def test_retry_that_would_outlive_the_deadline_fails_fast():
+    caller = make_caller()
+    error = UpstreamError(429)
+    error.response = type('Response', (), {'headers': {'retry-after': '5'}})()
+    factory, calls = flaky(error, 'ok')
+
+    with pytest.raises(DeadlineExceeded) as raised:
+        asyncio.run(caller.call(factory, deadline=time.monotonic() + 1))
+    assert len(calls) == 1
+    assert raised.value.retry_after >= 5
+
+
+def test_breaker_opens_after_consecutive_failures():
+    caller = make_caller(max_attempts=1, failure_threshold=2)
+
+    for _ in range(2):
+        factory, _ = flaky(UpstreamError(503))
+        with pytest.raises(UpstreamError):
+            asyncio.run(caller.call(factory))
+
+    factory, calls = flaky('ok')
+    with pytest.raises(CircuitOpenError) as raised:
+        asyncio.run(caller.call(factory))
+    assert calls == []
+    assert raised.value.retry_after >= 1
+    assert caller.breaker.stats()['rejected'] == 1
+
+
+def test_rate_limits_do_not_trip_the_breaker():
+    caller = make_caller(max_attempts=1, failure_threshold=1)
+    factory, _ = flaky(UpstreamError(429))
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(caller.call(factory))
+    assert caller.breaker.state() == 'closed'
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.state() == 'half_open'
+
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state() == 'closed'
+    assert breaker.before_call() is False
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    probe = breaker.before_call()
+    breaker.record_failure(probe)
+    assert breaker.state() == 'open'
+    assert breaker.stats()['trips'] == 2
+
+
+def test_cancelled_probe_is_released():
+    caller = make_caller(failure_threshold=1, reset_seconds=0)
+    caller.breaker.record_failure()
+
+    async def run():
+        task = asyncio.ensure_future(caller.call(lambda: asyncio.sleep(1)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    # Another caller may take the probe now
+    assert caller.breaker.before_call() is True
@@ -0,0 +1,112 @@
+"""
+Unit tests for single_flight.py (in-process coalescing and cross-worker leases)
+"""
+
+import asyncio
+import pytest
+
+from single_flight import SingleFlight, SQLiteLeaseTable
+
+
+def test_identical_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return 'reply'
+
+    async def run():
+        return await asyncio.gather(*[flight.run('key', upstream) for _ in range(5)])
+
+    assert asyncio.run(run()) == ['reply'] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {'in_flight': 0, 'leaders': 1, 'coalesced': 4, 'abandoned': 0}
+
+
+def test_one_caller_giving_up_leaves_the_call_for_the_others():
+    flight = SingleFlight()
+
+    async def run():
+        first = asyncio.ensure_future(flight.run('key', lambda: asyncio.sleep(0.05, 'reply'), cancel_if_abandoned=True))
+        second = asyncio.ensure_future(flight.run('key', lambda: asyncio.sleep(0.05, 'other')))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == 'reply'
+    assert flight.stats()['abandoned'] == 0
+
+
+def test_abandoned_call_is_cancelled():
+    flight = SingleFlight()
+    finished = []
+
+    async def upstream():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+
+    async def run():
+        caller = asyncio.ensure_future(flight.run('key', upstream, cancel_if_abandoned=True))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0.08)
+
+    asyncio.run(run())
+    assert finished == []
+    assert flight.stats()['abandoned'] == 1
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_call_survives_abandonment_without_the_flag():
+    flight = SingleFlight()
+    finished = []
+
+    async def upstream():
+        await asyncio.sleep(0.03)
+        finished.append(1)
+
+    async def run():
+        caller = asyncio.ensure_future(flight.run('key', upstream))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert finished == [1]
+
+
+def test_lease_is_held_by_one_worker_at_a_time(tmp_path):
+    leases = SQLiteLeaseTable(str(tmp_path / 'leases.db'), poll_interval=0.01)
+
+    async def run():
+        assert await leases.acquire('key') is True
+        assert await leases.acquire('key') is False
+        await leases.release('key')
+        assert await leases.acquire('key') is True
+
+    asyncio.run(run())
+
+
+def test_waiter_picks_up_the_owner_result(tmp_path):
+    leases = SQLiteLeaseTable(str(tmp_path / 'leases.db'), poll_interval=0.01)
+    cache = {}
+
+    async def owner():
+        await leases.acquire('key')
+        await asyncio.sleep(0.03)
+        cache['key'] = 'reply'
+        await leases.release('key')
+
+    async def run():
+        task = asyncio.ensure_future(owner())
+        await asyncio.sleep(0.01)
+        value = await leases.wait_for('key', cache.get)
+        await task
+        return value
+
+    assert asyncio.run(run()) == 'reply'
+    assert leases.stats() == {'cross_worker_waits': 1, 'cross_worker_hits': 1}
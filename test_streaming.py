@@ -0,0 +1,52 @@
+"""
+Unit tests for streaming.py (SSE frames and incremental JSON object extraction)
+"""
+
+import json
+
+from streaming import JSONObjectStream, format_sse
+
+
+RISKS = [
+    {'id': 1, 'risk': 'Crowd crush at the {main} gate', 'mitigation': 'Say "stop" \\ slow entry'},
+    {'id': 2, 'risk': 'Heat exhaustion', 'details': {'peak': '14:00'}}
+]
+
+
+def feed_in_chunks(text, size):
+    stream = JSONObjectStream()
+    objects = []
+    for index in range(0, len(text), size):
+        objects += stream.feed(text[index:index + size])
+    return objects
+
+
+def test_frame_format():
+    assert format_sse('risk', {'id': 1}) == 'event: risk\ndata: {"id": 1}\n\n'
+
+
+def test_each_object_is_emitted_once_the_model_closes_it():
+    stream = JSONObjectStream()
+    text = json.dumps(RISKS)
+    boundary = text.index(', {"id": 2')
+
+    assert [json.loads(obj) for obj in stream.feed(text[:boundary])] == [RISKS[0]]
+    assert stream.feed(text[boundary:-2]) == []
+    assert [json.loads(obj) for obj in stream.feed(text[-2:])] == [RISKS[1]]
+
+
+def test_chunk_boundaries_do_not_matter():
+    text = '```json\n' + json.dumps(RISKS, indent=2) + '\n```'
+
+    for size in (1, 3, 7, len(text)):
+        assert [json.loads(obj) for obj in feed_in_chunks(text, size)] == RISKS
+
+
+def test_braces_and_quotes_inside_strings_are_ignored():
+    text = json.dumps({'risk': 'a } b { c', 'quote': 'he said "}"', 'path': 'C:\\'})
+
+    assert [json.loads(obj) for obj in feed_in_chunks(text, 2)] == [json.loads(text)]
+
+
+def test_unfinished_object_is_not_emitted():
+    assert feed_in_chunks('[{"id": 1}, {"id": 2, "risk": "cut o', 5) == ['{"id": 1}']
@@ -0,0 +1,99 @@
+"""
+Unit tests for structured_output.py (JSON repair, coercion and schema checks)
+"""
+
+import pytest
+
+from structured_output import (
+    RISK_SCHEMA, JUSTIFICATIONS_SCHEMA, StructuredOutputError, StructuredOutputStats,
+    parse_json_response, schema_errors, coerce_risk, coerce_risk_list, coerce_details, coerce_details_sections
+)
+
+
+RISK = {'id': 1, 'risk': 'Crowd crush', 'category': 'Security', 'impact': 4, 'likelihood': 3, 'mitigation': 'Stewards'}
+
+
+def test_valid_json_is_not_repaired():
+    assert parse_json_response('{"a": 1}') == ({'a': 1}, False)
+
+
+@pytest.mark.parametrize('content, expected', [
+    ('```json\n{"a": 1}\n```', {'a': 1}),
+    ('Here is the risk:\n{"a": 1}\nHope that helps!', {'a': 1}),
+    ('{"a": [1, 2,],}', {'a': [1, 2]}),
+    ('[{"a": 1}, {"b": 2}] trailing', [{'a': 1}, {'b': 2}]),
+])
+def test_wrapped_or_sloppy_json_is_repaired(content, expected):
+    assert parse_json_response(content) == (expected, True)
+
+
+def test_truncated_json_is_closed():
+    value, repaired = parse_json_response('{"risks": [{"risk": "Crowd crush", "impact": 4}, {"risk": "Heat exh')
+
+    assert repaired
+    assert value['risks'][0] == {'risk': 'Crowd crush', 'impact': 4}
+
+
+def test_truncated_member_is_cut_back():
+    value, _ = parse_json_response('{"details": ["one", "two"], "extra": tr')
+
+    assert value == {'details': ['one', 'two']}
+
+
+@pytest.mark.parametrize('content', [None, '', 'No JSON here', '{"a": }}}'])
+def test_unusable_output_raises(content):
+    with pytest.raises(StructuredOutputError):
+        parse_json_response(content)
+
+
+def test_schema_errors_list_every_difference():
+    assert schema_errors(RISK, RISK_SCHEMA) == []
+
+    errors = schema_errors(dict(RISK, impact=9, extra=True, id='1'), RISK_SCHEMA)
+    assert '$.impact: 9 not one of [1, 2, 3, 4, 5]' in errors
+    assert '$.extra: not allowed' in errors
+    assert '$.id: expected integer' in errors
+
+
+def test_justifications_schema_matches_the_batch_prompt_format():
+    reply = {'justifications': [{'field': 1, 'reasoning': 'Because', 'sources': ['ISO 31000 [public]']}]}
+
+    assert schema_errors(reply, JUSTIFICATIONS_SCHEMA) == []
+
+
+def test_risk_is_unwrapped():
+    assert coerce_risk([RISK]) == RISK
+    assert coerce_risk({'risks': [RISK]}) == RISK
+    with pytest.raises(StructuredOutputError):
+        coerce_risk({'risk': ' '})
+
+
+def test_risk_list_drops_unusable_entries():
+    assert coerce_risk_list({'risks': [RISK, {'risk': ''}, 'text']}) == [RISK]
+    with pytest.raises(StructuredOutputError):
+        coerce_risk_list({'risks': []})
+
+
+def test_details_need_enough_strings():
+    assert coerce_details({'details': ['a', ' b ', 'c', 'd']}) == ['a', 'b', 'c']
+    with pytest.raises(StructuredOutputError):
+        coerce_details(['a', '', 3])
+
+
+def test_detail_sections_keep_the_usable_ones():
+    value = {'overview': ['a', 'b', 'c'], 'operational': ['a']}
+
+    assert coerce_details_sections(value, ['overview', 'operational']) == {'overview': ['a', 'b', 'c']}
+    with pytest.raises(StructuredOutputError):
+        coerce_details_sections({'operational': []}, ['overview', 'operational'])
+
+
+def test_stats_track_rates_per_endpoint():
+    stats = StructuredOutputStats()
+    stats.record('risks', 'parsed')
+    stats.record('risks', 'failed')
+    stats.record_retry('risks')
+
+    summary = stats.stats()
+    assert summary['endpoints']['risks']['failure_rate'] == 0.5
+    assert summary['retry_rate'] == 0.5
@@ -0,0 +1,139 @@
+"""
+Unit tests for ttl_store.py (memory, SQLite and Redis expiring stores)
+"""
+
+import time
+import threading
+import pytest
+
+from ttl_store import TTLStore, SQLiteTTLStore, RedisTTLStore, EntryLocked
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def make_store(request, tmp_path):
+    """Build a store of the parametrised backend with the given limits"""
+    def make(**limits):
+        if request.param == 'memory':
+            return TTLStore('sessions', **limits)
+        if request.param == 'sqlite':
+            return SQLiteTTLStore(str(tmp_path / 'store.db'), 'sessions', columns=('status',),
+                                  flush_interval=0, evict_every=1, lock_poll=0.01, **limits)
+        fakeredis = pytest.importorskip('fakeredis')
+        return RedisTTLStore(None, 'sessions', client=fakeredis.FakeRedis(), flush_interval=0, evict_every=1, **limits)
+    return make
+
+
+def test_values_round_trip(make_store):
+    store = make_store()
+    store['a'] = {'status': 'active', 'risks': [1, 2]}
+
+    assert store['a'] == {'status': 'active', 'risks': [1, 2]}
+    assert 'b' not in store
+    assert store.pop('a') == {'status': 'active', 'risks': [1, 2]}
+    assert store.get('a') is None
+
+
+def test_idle_entries_expire(make_store):
+    store = make_store(idle_ttl=0.2)
+    store['a'] = {'n': 1}
+    time.sleep(0.3)
+
+    store.expire()
+    assert store.get('a') is None
+    assert store.stats()['evictions']['idle'] == 1
+
+
+def test_reads_refresh_the_idle_ttl(make_store):
+    store = make_store(idle_ttl=0.3)
+    store['a'] = {'n': 1}
+    for _ in range(3):
+        time.sleep(0.15)
+        assert store.get('a') == {'n': 1}
+
+
+def test_max_age_is_not_extended_by_reads(make_store):
+    store = make_store(max_age=0.3)
+    store['a'] = {'n': 1}
+    time.sleep(0.15)
+    store['a'] = {'n': 2}
+    time.sleep(0.2)
+
+    assert store.get('a') is None
+
+
+def test_least_recently_used_entries_are_evicted_past_max_entries(make_store):
+    store = make_store(max_entries=2)
+    store['a'] = {'n': 1}
+    time.sleep(0.01)
+    store['b'] = {'n': 2}
+    time.sleep(0.01)
+    store.get('a')
+    store.expire()
+    time.sleep(0.01)
+    store['c'] = {'n': 3}
+    store.expire()
+
+    assert store.get('b') is None
+    assert store.get('a') == {'n': 1}
+    assert store.get('c') == {'n': 3}
+
+
+def test_memory_store_evicts_past_max_bytes():
+    evicted = []
+    store = TTLStore('sessions', max_bytes=30, on_evict=lambda key, value, reason: evicted.append((key, reason)))
+    store['a'] = {'text': 'x' * 10}
+    store['b'] = {'text': 'y' * 10}
+
+    assert evicted == [('a', 'max_bytes')]
+    assert store.stats()['bytes'] <= 30
+
+
+def test_lock_is_exclusive(make_store):
+    store = make_store()
+    held = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with store.lock('a'):
+            held.set()
+            release.wait(2)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    held.wait(2)
+    try:
+        with pytest.raises(EntryLocked):
+            with store.lock('a', timeout=0.05):
+                pass
+        # Other keys are not affected
+        with store.lock('b', timeout=0.05):
+            pass
+    finally:
+        release.set()
+        thread.join()
+
+    with store.lock('a', timeout=0.5):
+        pass
+    assert store.stats()['locks']['timeouts'] == 1
+
+
+def test_sqlite_lock_is_shared_between_stores(tmp_path):
+    path = str(tmp_path / 'store.db')
+    first = SQLiteTTLStore(path, 'sessions', lock_poll=0.01)
+    second = SQLiteTTLStore(path, 'sessions', lock_poll=0.01)
+
+    with first.lock('a'):
+        with pytest.raises(EntryLocked):
+            with second.lock('a', timeout=0.05):
+                pass
+    with second.lock('a', timeout=0.05):
+        pass
+
+
+def test_sqlite_store_keeps_column_fields(tmp_path):
+    store = SQLiteTTLStore(str(tmp_path / 'store.db'), 'sessions', columns=('status',), json_columns=('risks',))
+    store['a'] = {'status': 'active', 'risks': [{'id': 1}], 'title': 'Festival', 'note': None}
+
+    assert store['a'] == {'status': 'active', 'risks': [{'id': 1}], 'title': 'Festival', 'note': None}
+    store['b'] = {'title': 'Fair', 'risks': None}
+    assert store['b'] == {'title': 'Fair'}
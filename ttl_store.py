@@ -0,0 +1,720 @@
+"""
+Bounded, expiring key/value stores for AIREKON sessions and conversations
+They cap the number of entries and their approximate size, and drop entries
+that have been idle too long or have reached a maximum age. TTLStore keeps
+them in memory and finds due entries through a heap of deadlines;
+SQLiteTTLStore keeps them in a SQLite (WAL) table shared by every worker
+on the host, and RedisTTLStore in Redis, shared by every node.
+"""
+
+import os
+import json
+import time
+import uuid
+import heapq
+import sqlite3
+import logging
+import threading
+import contextlib
+from collections import OrderedDict
+
+from keyed_locks import KeyedLockManager
+
+logger = logging.getLogger(__name__)
+
+EVICTION_REASONS = ('idle', 'max_age', 'max_entries', 'max_bytes')
+
+
+class EntryLocked(Exception):
+    """Another request is still updating the entry"""
+
+    status_code = 409
+
+
+def json_size(value):
+    """Approximate size of a value in bytes (its JSON encoding)"""
+    return len(json.dumps(value, default=str))
+
+
+class ExpiringStore:
+    """Dict-style access, limits and eviction bookkeeping shared by the stores
+
+    Values are stored by copy or by reference depending on the store, so write a
+    value back after changing it. Least recently used entries are evicted first
+    when a cap is exceeded. on_evict(key, value, reason) is called for every
+    eviction. 0 turns any limit off.
+    """
+
+    def __init__(self, name, max_entries=10000, max_bytes=0, idle_ttl=0, max_age=0, on_evict=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.max_age = max_age
+        self.on_evict = on_evict
+        self.evictions = {reason: 0 for reason in EVICTION_REASONS}
+        self.locks = KeyedLockManager()
+
+    @contextlib.contextmanager
+    def lock(self, key, timeout=None):
+        """Hold key's lock (within this worker) around a read-modify-write; raises EntryLocked after timeout seconds"""
+        if not self.locks.acquire(key, timeout):
+            raise EntryLocked(f"{self.name} entry {key} is busy, retry later")
+        try:
+            yield
+        finally:
+            self.locks.release(key)
+
+    def _notify(self, evicted):
+        for key, value, reason in evicted:
+            logger.info(f"Evicted {self.name} entry {key} ({reason})")
+            if self.on_evict is not None:
+                try:
+                    self.on_evict(key, value, reason)
+                except Exception as e:
+                    logger.error(f"Eviction callback for {self.name} failed: {e}")
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+
+class TTLStore(ExpiringStore):
+    """Thread-safe in-memory store for this worker process only
+
+    Values are held by reference and sized (as JSON) when they are stored.
+    """
+
+    def __init__(self, name, max_entries=10000, max_bytes=0, idle_ttl=0, max_age=0, sizeof=json_size,
+                 on_evict=None):
+        super().__init__(name, max_entries, max_bytes, idle_ttl, max_age, on_evict)
+        self.sizeof = sizeof
+        self.entries = OrderedDict()
+        self.deadlines = []
+        self.bytes = 0
+        self.mutex = threading.RLock()
+
+    def _deadline(self, entry):
+        """When the entry expires (None if neither TTL applies)"""
+        deadlines = []
+        if self.idle_ttl:
+            deadlines.append(entry['accessed_at'] + self.idle_ttl)
+        if self.max_age:
+            deadlines.append(entry['created_at'] + self.max_age)
+        return min(deadlines) if deadlines else None
+
+    def _expired_reason(self, entry, now):
+        if self.max_age and entry['created_at'] + self.max_age <= now:
+            return 'max_age'
+        if self.idle_ttl and entry['accessed_at'] + self.idle_ttl <= now:
+            return 'idle'
+        return None
+
+    def _evict(self, key, reason, evicted):
+        entry = self.entries.pop(key)
+        self.bytes -= entry['size']
+        self.evictions[reason] += 1
+        evicted.append((key, entry['value'], reason))
+
+    def _schedule(self, key, entry):
+        entry['scheduled'] = self._deadline(entry)
+        if entry['scheduled'] is not None:
+            heapq.heappush(self.deadlines, (entry['scheduled'], key))
+
+    def _expire(self, now, evicted):
+        """Pop due deadlines off the heap; entries used since their deadline was pushed go back on
+
+        Deadlines only move later, so each entry keeps a single heap item.
+        """
+        while self.deadlines and self.deadlines[0][0] <= now:
+            deadline, key = heapq.heappop(self.deadlines)
+            entry = self.entries.get(key)
+            if entry is None or entry['scheduled'] != deadline:
+                # Left behind by an entry that was removed
+                continue
+            reason = self._expired_reason(entry, now)
+            if reason is not None:
+                self._evict(key, reason, evicted)
+            else:
+                self._schedule(key, entry)
+
+    def _enforce_caps(self, keep, evicted):
+        """Evict least recently used entries (never keep) until both caps hold"""
+        while self.entries:
+            if self.max_entries and len(self.entries) > self.max_entries:
+                reason = 'max_entries'
+            elif self.max_bytes and self.bytes > self.max_bytes:
+                reason = 'max_bytes'
+            else:
+                return
+            key = next(iter(self.entries))
+            if key == keep:
+                if len(self.entries) == 1:
+                    return
+                self.entries.move_to_end(key)
+                key = next(iter(self.entries))
+            self._evict(key, reason, evicted)
+
+    def get(self, key, default=None):
+        """The value for key (refreshing its idle TTL), or default if it is missing or expired"""
+        evicted = []
+        with self.mutex:
+            now = time.time()
+            self._expire(now, evicted)
+            entry = self.entries.get(key)
+            if entry is not None and self._expired_reason(entry, now) is not None:
+                self._evict(key, self._expired_reason(entry, now), evicted)
+                entry = None
+            if entry is not None:
+                entry['accessed_at'] = now
+                self.entries.move_to_end(key)
+        self._notify(evicted)
+        return entry['value'] if entry is not None else default
+
+    def set(self, key, value):
+        """Store value under key; an existing entry keeps its creation time (and maximum age)"""
+        evicted = []
+        size = self.sizeof(value)
+        with self.mutex:
+            now = time.time()
+            self._expire(now, evicted)
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = {'created_at': now, 'value': value, 'size': size, 'accessed_at': now}
+                self.entries[key] = entry
+                self._schedule(key, entry)
+            else:
+                self.bytes -= entry['size']
+                self.entries.move_to_end(key)
+                entry.update(value=value, size=size, accessed_at=now)
+            self.bytes += size
+            self._enforce_caps(key, evicted)
+        self._notify(evicted)
+
+    def pop(self, key, default=None):
+        """Remove key and return its value (default if missing)"""
+        with self.mutex:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return default
+            self.bytes -= entry['size']
+            return entry['value']
+
+    def expire(self):
+        """Evict everything that is due now; returns how many entries were evicted"""
+        evicted = []
+        with self.mutex:
+            self._expire(time.time(), evicted)
+        self._notify(evicted)
+        return len(evicted)
+
+    def __len__(self):
+        self.expire()
+        with self.mutex:
+            return len(self.entries)
+
+    def stats(self):
+        self.expire()
+        with self.mutex:
+            return {
+                'backend': 'memory',
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'evictions': dict(self.evictions),
+                'locks': self.locks.stats()
+            }
+
+
+class SQLiteTTLStore(ExpiringStore):
+    """Store of dict values in one SQLite (WAL) table, shared by every worker on the host
+
+    Fields listed in columns are kept in their own (indexed) columns and those
+    in json_columns as JSON text; the rest of a value goes into one JSON
+    document. Fields stored as None come back missing. Reads are primary key
+    lookups on prepared (cached) statements; the access times they refresh
+    are written in one batch every flush_interval seconds, and expiry and cap
+    eviction run once every evict_every writes. on_evict gets None for the
+    value, which is not read back. Eviction counts are this worker's; lock(key)
+    is a lease row in the same database (expiring after lock_ttl seconds in
+    case its holder dies), so a read-modify-write is exclusive across workers.
+    """
+
+    def __init__(self, path, name, columns=(), json_columns=(), max_entries=10000, max_bytes=0, idle_ttl=0,
+                 max_age=0, on_evict=None, flush_interval=1.0, evict_every=64, lock_ttl=120, lock_poll=0.05):
+        super().__init__(name, max_entries, max_bytes, idle_ttl, max_age, on_evict)
+        self.path = path
+        self.lock_ttl = lock_ttl
+        self.lock_poll = lock_poll
+        self.columns = tuple(columns)
+        self.json_columns = tuple(json_columns)
+        self.flush_interval = flush_interval
+        self.evict_every = evict_every
+        self.local = threading.local()
+        self.mutex = threading.Lock()
+        self.touched = {}
+        self.last_flush = time.monotonic()
+        self.writes_since_evict = 0
+
+        fields = self.columns + self.json_columns
+        self.select_sql = f"SELECT {', '.join(fields + ('document',))} FROM {name} WHERE key = ? AND expires_at > ?"
+        self.upsert_sql = (
+            f"INSERT INTO {name} (key, stored_at, accessed_at, expires_at, size, document"
+            f"{''.join(', ' + field for field in fields)}) VALUES ({', '.join('?' * (6 + len(fields)))}) "
+            f"ON CONFLICT(key) DO UPDATE SET accessed_at = excluded.accessed_at, "
+            f"expires_at = MIN(excluded.accessed_at + ?, stored_at + ?), size = excluded.size, "
+            f"document = excluded.document{''.join(f', {field} = excluded.{field}' for field in fields)}"
+        )
+        self.touch_sql = f"UPDATE {name} SET accessed_at = ?, expires_at = MIN(? + ?, stored_at + ?) WHERE key = ?"
+        # Takes the lease unless another holder's is still live
+        self.lease_sql = (
+            f"INSERT INTO {name}_leases (key, token, expires_at) VALUES (?, ?, ?) "
+            f"ON CONFLICT(key) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+            f"WHERE {name}_leases.expires_at <= ?"
+        )
+
+        connection = self._connection()
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {name} (
+                key TEXT PRIMARY KEY,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                document TEXT NOT NULL{''.join(f',{chr(10)}                {field} TEXT' for field in fields)}
+            )
+        """)
+        connection.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_expires_at ON {name} (expires_at)")
+        connection.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_accessed_at ON {name} (accessed_at)")
+        for field in self.columns:
+            connection.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_{field} ON {name} ({field})")
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {name}_leases (
+                key TEXT PRIMARY KEY,
+                token TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def _connection(self):
+        """One connection per thread (and per process after a fork)"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, cached_statements=256)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    def _ttls(self):
+        """Idle TTL and maximum age as SQL operands (off is infinitely far away)"""
+        return self.idle_ttl or float('inf'), self.max_age or float('inf')
+
+    def _decode(self, row):
+        value = json.loads(row[-1])
+        for field, column in zip(self.columns + self.json_columns, row):
+            if column is not None:
+                value[field] = json.loads(column) if field in self.json_columns else column
+        return value
+
+    def get(self, key, default=None):
+        """The value for key (refreshing its idle TTL), or default if it is missing or expired"""
+        now = time.time()
+        row = self._connection().execute(self.select_sql, (key, now)).fetchone()
+        if row is None:
+            return default
+
+        with self.mutex:
+            self.touched[key] = now
+            due = time.monotonic() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+        return self._decode(row)
+
+    def flush(self):
+        """Write the access times refreshed by reads, in one transaction"""
+        with self.mutex:
+            touched, self.touched = self.touched, {}
+            self.last_flush = time.monotonic()
+        if not touched:
+            return
+
+        idle_ttl, max_age = self._ttls()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(self.touch_sql, [(accessed_at, accessed_at, idle_ttl, max_age, key)
+                                                    for key, accessed_at in touched.items()])
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def set(self, key, value):
+        """Store value under key; an existing entry keeps its creation time (and maximum age)"""
+        value = dict(value)
+        fields = []
+        for field in self.columns + self.json_columns:
+            column = value.pop(field, None)
+            if column is not None and field in self.json_columns:
+                column = json.dumps(column, default=str)
+            fields.append(column)
+        document = json.dumps(value, default=str)
+        size = len(document) + sum(len(str(column)) for column in fields if column is not None)
+
+        now = time.time()
+        idle_ttl, max_age = self._ttls()
+        self._connection().execute(
+            self.upsert_sql,
+            [key, now, now, min(now + idle_ttl, now + max_age), size, document] + fields + [idle_ttl, max_age]
+        )
+        with self.mutex:
+            self.touched.pop(key, None)
+            self.writes_since_evict += 1
+            due = self.writes_since_evict >= self.evict_every
+            if due:
+                self.writes_since_evict = 0
+        if due:
+            self.expire()
+
+    def pop(self, key, default=None):
+        """Remove key and return its value (default if missing)"""
+        with self.mutex:
+            self.touched.pop(key, None)
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(self.select_sql, (key, time.time())).fetchone()
+            connection.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return self._decode(row) if row is not None else default
+
+    def expire(self):
+        """Delete expired rows, then least recently used rows beyond the caps; returns how many were evicted"""
+        self.flush()
+        now = time.time()
+        max_age = self._ttls()[1]
+        evicted = []
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for key, aged_out in connection.execute(
+                f"SELECT key, expires_at >= stored_at + ? FROM {self.name} WHERE expires_at <= ?", (max_age, now)
+            ).fetchall():
+                evicted.append((key, None, 'max_age' if aged_out else 'idle'))
+
+            count, total_bytes = connection.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.name} WHERE expires_at > ?", (now,)
+            ).fetchone()
+            # Least recently used first; the newest entry always stays
+            for key, size in connection.execute(
+                f"SELECT key, size FROM {self.name} WHERE expires_at > ? ORDER BY accessed_at LIMIT ?",
+                (now, max(count - 1, 0))
+            ).fetchall():
+                if self.max_entries and count > self.max_entries:
+                    reason = 'max_entries'
+                elif self.max_bytes and total_bytes > self.max_bytes:
+                    reason = 'max_bytes'
+                else:
+                    break
+                evicted.append((key, None, reason))
+                count -= 1
+                total_bytes -= size
+
+            connection.executemany(f"DELETE FROM {self.name} WHERE key = ?", [(key,) for key, _, _ in evicted])
+            # Leases left behind by workers that died holding them
+            connection.execute(f"DELETE FROM {self.name}_leases WHERE expires_at <= ?", (now,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        with self.mutex:
+            for _, _, reason in evicted:
+                self.evictions[reason] += 1
+        self._notify(evicted)
+        return len(evicted)
+
+    def _take_lease(self, key, token):
+        now = time.time()
+        return self._connection().execute(self.lease_sql, (key, token, now + self.lock_ttl, now)).rowcount == 1
+
+    @contextlib.contextmanager
+    def lock(self, key, timeout=None):
+        """Hold key's lease, shared by every worker on the host, around a read-modify-write; raises EntryLocked after timeout seconds
+
+        Threads of this worker queue on the local lock first, so only one of
+        them at a time polls the lease.
+        """
+        deadline = None if timeout is None else time.monotonic() + max(0, timeout)
+        with super().lock(key, timeout):
+            token = uuid.uuid4().hex
+            acquired = self._take_lease(key, token)
+            if not acquired:
+                started = time.monotonic()
+                while not acquired and (deadline is None or time.monotonic() < deadline):
+                    time.sleep(self.lock_poll if deadline is None else min(self.lock_poll, max(0, deadline - time.monotonic())))
+                    acquired = self._take_lease(key, token)
+                self.locks.observe(time.monotonic() - started, acquired)
+            if not acquired:
+                raise EntryLocked(f"{self.name} entry {key} is busy, retry later")
+            try:
+                yield
+            finally:
+                released = self._connection().execute(
+                    f"DELETE FROM {self.name}_leases WHERE key = ? AND token = ?", (key, token)
+                ).rowcount
+                if not released:
+                    logger.warning(f"Lease on {self.name} entry {key} expired before release")
+
+    def __len__(self):
+        return self._connection().execute(
+            f"SELECT COUNT(*) FROM {self.name} WHERE expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+
+    def stats(self):
+        self.expire()
+        count, total_bytes = self._connection().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.name} WHERE expires_at > ?", (time.time(),)
+        ).fetchone()
+        with self.mutex:
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'entries': count,
+                'bytes': total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'evictions': dict(self.evictions),
+                'locks': self.locks.stats()
+            }
+
+
+class RedisTTLStore(ExpiringStore):
+    """Store of JSON values in Redis, shared by every worker on every node
+
+    Each entry is a hash (value, size, stored_at) that Redis expires after the
+    idle TTL; the maximum age is checked on read. A sorted set of access times
+    orders entries for the caps and finds the ones Redis has expired, which
+    are counted as idle.
+    Writes are single MULTI/EXEC pipelines. The access times that reads refresh
+    are pipelined in one batch every flush_interval seconds. lock(key) is a
+    Redis lock, so a read-modify-write is exclusive across nodes.
+    """
+
+    def __init__(self, url, name, prefix='airekon:', max_entries=10000, max_bytes=0, idle_ttl=0, max_age=0,
+                 on_evict=None, flush_interval=1.0, evict_every=64, lock_ttl=120, client=None):
+        super().__init__(name, max_entries, max_bytes, idle_ttl, max_age, on_evict)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = f"{prefix}{name}:"
+        self.index = f"{self.prefix}index"
+        self.sizes = f"{self.prefix}sizes"
+        self.flush_interval = flush_interval
+        self.evict_every = evict_every
+        self.lock_ttl = lock_ttl
+        self.mutex = threading.Lock()
+        self.touched = {}
+        self.last_flush = time.monotonic()
+        self.writes_since_evict = 0
+
+    def _key(self, key):
+        return f"{self.prefix}entry:{key}"
+
+    def _remove(self, pipeline, keys):
+        for key in keys:
+            pipeline.delete(self._key(key))
+        if keys:
+            pipeline.zrem(self.index, *keys)
+            pipeline.hdel(self.sizes, *keys)
+
+    def _count(self, evicted):
+        with self.mutex:
+            for _, _, reason in evicted:
+                self.evictions[reason] += 1
+        self._notify(evicted)
+
+    def get(self, key, default=None):
+        """The value for key (refreshing its idle TTL), or default if it is missing or expired"""
+        value, stored_at = self.client.hmget(self._key(key), 'value', 'stored_at')
+        if value is None:
+            return default
+
+        now = time.time()
+        stored_at = float(stored_at)
+        if self.max_age and stored_at + self.max_age <= now:
+            pipeline = self.client.pipeline()
+            self._remove(pipeline, [key])
+            pipeline.execute()
+            self._count([(key, None, 'max_age')])
+            return default
+
+        with self.mutex:
+            self.touched[key] = (now, stored_at)
+            due = time.monotonic() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+        return json.loads(value)
+
+    def _expires_at(self, accessed_at, stored_at):
+        deadlines = []
+        if self.idle_ttl:
+            deadlines.append(accessed_at + self.idle_ttl)
+        if self.max_age:
+            deadlines.append(stored_at + self.max_age)
+        return min(deadlines) if deadlines else None
+
+    def flush(self):
+        """Pipeline the access times refreshed by reads (TTLs and recency) in one round trip"""
+        with self.mutex:
+            touched, self.touched = self.touched, {}
+            self.last_flush = time.monotonic()
+        if not touched:
+            return
+
+        pipeline = self.client.pipeline(transaction=False)
+        for key, (accessed_at, stored_at) in touched.items():
+            expires_at = self._expires_at(accessed_at, stored_at)
+            if expires_at is not None:
+                pipeline.pexpireat(self._key(key), int(expires_at * 1000))
+            pipeline.zadd(self.index, {key: accessed_at}, xx=True)
+        pipeline.execute()
+
+    def set(self, key, value):
+        """Store value under key; an existing entry keeps its creation time (and maximum age)"""
+        value = json.dumps(value, default=str)
+        now = time.time()
+        pipeline = self.client.pipeline()
+        pipeline.hsetnx(self._key(key), 'stored_at', now)
+        pipeline.hset(self._key(key), mapping={'value': value, 'size': len(value)})
+        ttl = min(ttl for ttl in (self.idle_ttl, self.max_age, float('inf')) if ttl)
+        if ttl != float('inf'):
+            pipeline.pexpire(self._key(key), int(ttl * 1000))
+        pipeline.zadd(self.index, {key: now})
+        pipeline.hset(self.sizes, key, len(value))
+        pipeline.execute()
+
+        with self.mutex:
+            self.touched.pop(key, None)
+            self.writes_since_evict += 1
+            due = self.writes_since_evict >= self.evict_every
+            if due:
+                self.writes_since_evict = 0
+        if due:
+            self.expire()
+
+    def pop(self, key, default=None):
+        """Remove key and return its value (default if missing)"""
+        with self.mutex:
+            self.touched.pop(key, None)
+        pipeline = self.client.pipeline()
+        pipeline.hget(self._key(key), 'value')
+        self._remove(pipeline, [key])
+        value = pipeline.execute()[0]
+        return json.loads(value) if value is not None else default
+
+    def expire(self):
+        """Drop index entries Redis has expired, then least recently used entries beyond the caps"""
+        self.flush()
+        evicted = []
+        if self.idle_ttl:
+            idle = [key.decode() for key in self.client.zrangebyscore(self.index, '-inf', time.time() - self.idle_ttl)]
+            evicted += [(key, None, 'idle') for key in idle]
+
+        count, total_bytes = self._totals()
+        count -= len(evicted)
+        if self.max_entries and count > self.max_entries or self.max_bytes and total_bytes > self.max_bytes:
+            # Least recently used first; the newest entry always stays
+            oldest = [key.decode() for key in self.client.zrange(self.index, len(evicted), len(evicted) + count - 2)]
+            sizes = self.client.hmget(self.sizes, oldest) if oldest else []
+            for key, size in zip(oldest, sizes):
+                if self.max_entries and count > self.max_entries:
+                    reason = 'max_entries'
+                elif self.max_bytes and total_bytes > self.max_bytes:
+                    reason = 'max_bytes'
+                else:
+                    break
+                evicted.append((key, None, reason))
+                count -= 1
+                total_bytes -= int(size or 0)
+
+        if evicted:
+            pipeline = self.client.pipeline()
+            self._remove(pipeline, [key for key, _, _ in evicted])
+            pipeline.execute()
+        self._count(evicted)
+        return len(evicted)
+
+    def _totals(self):
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.zcard(self.index)
+        pipeline.hvals(self.sizes)
+        count, sizes = pipeline.execute()
+        return count, sum(int(size) for size in sizes)
+
+    @contextlib.contextmanager
+    def lock(self, key, timeout=None):
+        """Hold key's lock on every node around a read-modify-write; raises EntryLocked after timeout seconds
+
+        Threads of this worker queue on the local lock first, so only one of
+        them at a time waits on the Redis lock.
+        """
+        deadline = None if timeout is None else time.monotonic() + max(0, timeout)
+        with super().lock(key, timeout):
+            lock = self.client.lock(f"{self.prefix}lock:{key}", timeout=self.lock_ttl, thread_local=False)
+            token = uuid.uuid4().hex
+            acquired = lock.acquire(blocking=False, token=token)
+            if not acquired:
+                started = time.monotonic()
+                remaining = None if deadline is None else max(0, deadline - started)
+                acquired = lock.acquire(blocking_timeout=remaining, token=token)
+                self.locks.observe(time.monotonic() - started, acquired)
+            if not acquired:
+                raise EntryLocked(f"{self.name} entry {key} is busy, retry later")
+            try:
+                yield
+            finally:
+                try:
+                    lock.release()
+                except Exception as e:
+                    logger.warning(f"Lock on {self.name} entry {key} expired before release: {e}")
+
+    def __len__(self):
+        self.expire()
+        return self.client.zcard(self.index)
+
+    def stats(self):
+        self.expire()
+        count, total_bytes = self._totals()
+        with self.mutex:
+            return {
+                'backend': 'redis',
+                'entries': count,
+                'bytes': total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'evictions': dict(self.evictions),
+                'locks': self.locks.stats()
+            }
+
+
+_MISSING = object()